@@ -0,0 +1,124 @@
+"""
+Cold start benchmark: import-time audit and time to first response
+
+Run with `python -m app.bench_startup` from the backend directory. Each run
+uses a fresh interpreter, like a Render instance waking up:
+
+- `python -X importtime -c "import app.main"` is parsed to report the
+  total import time and the slowest top-level packages
+- uvicorn is started and /health polled until it answers, giving the time
+  to first response (MongoDB must be reachable for a "healthy" answer, but
+  any response counts; DATABASE_BACKEND=memory benchmarks without one)
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Tuple
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_times() -> Tuple[float, Dict[str, float]]:
+    """
+    Import time of app.main and of what it pulls in, in ms
+    
+    Packages are reported by their top-level name, app modules when
+    app.main imports them directly.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            entries.append((len(match.group(3)), match.group(4), int(match.group(2)) / 1000))
+    
+    # Children are printed before their parent: app.main's imports are the
+    # entries between it and the previous top-level import
+    end = next(index for index, (_, name, _) in enumerate(entries) if name == "app.main")
+    start = end
+    while start > 0 and entries[start - 1][0] > 1:
+        start -= 1
+    
+    packages = {}
+    for depth, name, cumulative in entries[start:end]:
+        if "." not in name or (name.startswith("app.") and depth == 3):
+            packages[name] = max(packages.get(name, 0.0), cumulative)
+    return entries[end][2], packages
+
+
+def time_to_first_response(timeout: float = 60) -> float:
+    """Seconds from launching uvicorn until /health answers"""
+    port = _free_port()
+    log = tempfile.TemporaryFile()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=log, env=os.environ.copy()
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                log.seek(0)
+                output = log.read().decode(errors="replace").strip().splitlines()
+                raise RuntimeError(
+                    f"uvicorn exited with code {server.returncode} before answering: "
+                    + (output[-1] if output else "no output")
+                )
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1).read()
+                return time.perf_counter() - started
+            except urllib.error.HTTPError:
+                return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("Server did not answer /health")
+    finally:
+        server.terminate()
+        server.wait()
+        log.close()
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    args = parser.parse_args(argv)
+    
+    totals, slowest = [], {}
+    for _ in range(args.runs):
+        total, packages = import_times()
+        totals.append(total)
+        for name, cumulative in packages.items():
+            slowest.setdefault(name, []).append(cumulative)
+    
+    print(f"import app.main: median {statistics.median(totals):.0f} ms over {args.runs} runs")
+    ranked = sorted(slowest.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, samples in ranked[:args.top]:
+        print(f"  {statistics.median(samples):8.1f} ms  {name}")
+    
+    first_responses = [time_to_first_response() for _ in range(args.runs)]
+    print(
+        f"time to first response: median {statistics.median(first_responses) * 1000:.0f} ms, "
+        f"max {max(first_responses) * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
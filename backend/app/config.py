@@ -17,10 +17,12 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30  # Idle sessions end after this; every refresh extends them
     
     # Database
     MONGODB_URL: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "fintech_app"
+    DATABASE_BACKEND: str = "mongo"  # "memory": in-process data for tests and benchmarks (mongomock-motor)
     
     # CORS
     CORS_ORIGINS: list = ["http://localhost:5173", "http://localhost:3000"]
@@ -30,6 +32,59 @@ class Settings(BaseSettings):
     TWILIO_AUTH_TOKEN: Optional[str] = None
     TWILIO_WHATSAPP_FROM: Optional[str] = None  # Format: whatsapp:+14155238886
     
+    # Feed live dashboard streams from MongoDB change streams instead of
+    # in-process events (needed when running several API replicas)
+    DASHBOARD_CHANGE_STREAMS: bool = False
+    
+    # Users allowed to answer chats in the support inbox
+    SUPPORT_USER_IDS: list = []
+    
+    # UPI transaction storage: "documents" (one per transaction) or "buckets"
+    # (one per user and month); run app.migrate_upi_buckets before switching.
+    # Buckets have no text search: /api/search/upi matches q as a substring
+    UPI_STORAGE: str = "documents"
+    
+    # Exchange rate table (JSON); defaults to the table shipped in app/data
+    FX_RATES_PATH: Optional[str] = None
+    
+    # Monthly statements
+    STATEMENTS_AT_MONTH_CLOSE: bool = True  # Enqueue last month's statements as a background job
+    STATEMENT_WORKERS: int = 8  # Users processed concurrently
+    STATEMENT_MONGO_CONCURRENCY: int = 16  # Queries in flight across all workers
+    
+    # Spending anomalies: expenses this many standard deviations above their
+    # category's mean are flagged once the category has enough history
+    ANOMALY_Z_SCORE: float = 3.0
+    ANOMALY_MIN_SAMPLES: int = 5
+    ANOMALY_ALERTS: bool = False  # Also send a WhatsApp alert
+    
+    # Background jobs
+    JOB_WORKERS_IN_PROCESS: bool = True  # Run workers inside the API; disable when using app.worker
+    JOB_SCHEDULER: bool = True  # Enqueue periodic jobs (reminders, month close)
+    JOB_QUEUES: list = ["notifications", "default", "statements"]  # Served in this order
+    JOB_CONCURRENCY: int = 4  # Jobs run at once per worker process
+    JOB_VISIBILITY_TIMEOUT_SECONDS: int = 300  # Lease length; renewed while a job runs
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 5
+    
+    # Responses smaller than this (bytes) are sent uncompressed
+    COMPRESSION_MIN_SIZE: int = 1024
+    
+    # Rate limiting: token buckets per user (per IP for auth), "count/second|minute|hour"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "mongo" shares buckets across workers and replicas
+    # Proxies in front of the API that append the address they saw to
+    # X-Forwarded-For; IP budgets use the entry added by the outermost one.
+    # Entries to its left are set by the client and never trusted.
+    TRUSTED_PROXY_HOPS: int = 0
+    RATE_LIMITS: dict = {
+        "auth": "10/minute",
+        "auth_refresh": "30/minute",
+        "dashboard": "30/minute",
+        "emi_schedule": "60/minute",
+        "default": "600/minute"
+    }
+    
     # Reminder settings
     REMINDER_DAYS_BEFORE: int = 3  # Send reminder 3 days before due date
     
@@ -1,22 +1,185 @@
 """
 MongoDB database connection and utilities
 """
+import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
 from .config import settings
 
+# Stored responses of Idempotency-Key requests are kept this long
+IDEMPOTENCY_KEY_TTL_SECONDS = 24 * 60 * 60
+
+# Idle rate limit buckets are full again well within this, so they can go
+RATE_LIMIT_BUCKET_TTL_SECONDS = 60 * 60
+
+# Cached heatmap windows are rebuilt at least this often
+HEATMAP_CACHE_TTL_SECONDS = 24 * 60 * 60
+
 # Global database client
 client: AsyncIOMotorClient = None
 database = None
 
 
-async def connect_to_mongo():
-    """Connect to MongoDB"""
+async def connect_to_mongo(wait_for_indexes: bool = True):
+    """
+    Connect to MongoDB
+    
+    Unique and TTL indexes are always created before returning: upsert
+    deduplication relies on them, and duplicates written before they exist
+    would keep them from ever being built. The API passes
+    wait_for_indexes=False and creates the query indexes in the background
+    with ensure_indexes, so their round trips do not hold back the first
+    request on every cold start.
+    """
     global client, database
-    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    if settings.DATABASE_BACKEND == "memory":
+        from .memory_database import MemoryClient
+        client = MemoryClient()
+    else:
+        client = AsyncIOMotorClient(settings.MONGODB_URL)
     database = client[settings.DATABASE_NAME]
+    await create_constraint_indexes()
+    if wait_for_indexes:
+        await create_query_indexes()
     print(f"✅ Connected to MongoDB: {settings.DATABASE_NAME}")
 
 
+async def ensure_indexes():
+    """create_query_indexes for a background task, reporting failures instead of raising"""
+    try:
+        await create_query_indexes()
+    except Exception as e:
+        print(f"⚠️ Could not create indexes: {e}")
+
+
+async def create_indexes():
+    """Create indexes used by the services (no-op when they already exist)"""
+    await create_constraint_indexes()
+    await create_query_indexes()
+
+
+async def _create_upi_transaction_index():
+    """Unique (user_id, transaction_id) index that makes UPI ingestion idempotent"""
+    try:
+        await database.upi_transactions.create_index(
+            [("user_id", ASCENDING), ("transaction_id", ASCENDING)], unique=True
+        )
+    except OperationFailure as e:
+        # Existing duplicates must be cleaned up before the index can be built
+        print(f"⚠️ Could not create unique UPI transaction index: {e}")
+
+
+async def create_constraint_indexes():
+    """
+    Create the unique and TTL indexes
+    
+    Writes rely on these for correctness (upsert deduplication, expiry), so
+    they are created concurrently before the API serves requests.
+    """
+    await asyncio.gather(
+        # Derived models, one document per key
+        database.recurring_expenses.create_index([("user_id", ASCENDING), ("key", ASCENDING)], unique=True),
+        database.forecast_models.create_index("user_id", unique=True),
+        database.budgets.create_index([("user_id", ASCENDING), ("category", ASCENDING)], unique=True),
+        database.spending_rollups.create_index(
+            [("user_id", ASCENDING), ("year", ASCENDING), ("month", ASCENDING), ("category", ASCENDING)],
+            unique=True
+        ),
+        database.spending_rollup_state.create_index("user_id", unique=True),
+        database.spending_stats.create_index([("user_id", ASCENDING), ("category", ASCENDING)], unique=True),
+        database.spending_stats_state.create_index("user_id", unique=True),
+        database.spending_heatmaps.create_index([("user_id", ASCENDING), ("start", ASCENDING)], unique=True),
+        database.spending_heatmaps.create_index("built_at", expireAfterSeconds=HEATMAP_CACHE_TTL_SECONDS),
+        database.payee_stats.create_index(
+            [("user_id", ASCENDING), ("period", ASCENDING), ("payee_upi", ASCENDING)], unique=True
+        ),
+        database.payee_stats_state.create_index("user_id", unique=True),
+        database.chat_conversations.create_index("user_id", unique=True),
+        database.statements.create_index(
+            [("user_id", ASCENDING), ("year", DESCENDING), ("month", DESCENDING)], unique=True
+        ),
+        
+        # Background jobs
+        database.jobs.create_index(
+            "dedupe_key", unique=True, partialFilterExpression={"dedupe_key": {"$exists": True}}
+        ),
+        database.jobs.create_index("expire_at", expireAfterSeconds=0),
+        
+        # Monthly UPI buckets (UPI_STORAGE=buckets)
+        database.upi_buckets.create_index([("user_id", ASCENDING), ("month", DESCENDING)], unique=True),
+        database.upi_buckets.create_index(
+            [("user_id", ASCENDING), ("transactions.transaction_id", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"count": {"$gt": 0}}
+        ),
+        
+        # Idempotent writes
+        _create_upi_transaction_index(),
+        database.idempotency_keys.create_index([("user_id", ASCENDING), ("key", ASCENDING)], unique=True),
+        database.idempotency_keys.create_index("created_at", expireAfterSeconds=IDEMPOTENCY_KEY_TTL_SECONDS),
+        
+        # Refresh token sessions, removed once idle past their expiry
+        database.sessions.create_index("token_hash", unique=True),
+        database.sessions.create_index("expires_at", expireAfterSeconds=0),
+        
+        # Shared rate limit buckets
+        database.rate_limits.create_index("updated_at", expireAfterSeconds=RATE_LIMIT_BUCKET_TTL_SECONDS)
+    )
+
+
+async def create_query_indexes():
+    """Create the indexes that only speed up queries"""
+    # Listing, date range and faceted search
+    await database.expenses.create_index([("user_id", ASCENDING), ("date", DESCENDING)])
+    await database.expenses.create_index([("user_id", ASCENDING), ("category", ASCENDING), ("date", DESCENDING)])
+    await database.expenses.create_index([("user_id", ASCENDING), ("payment_method", ASCENDING), ("date", DESCENDING)])
+    await database.expenses.create_index([("user_id", ASCENDING), ("description", TEXT)])
+    await database.upi_transactions.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
+    await database.upi_transactions.create_index([("user_id", ASCENDING), ("status", ASCENDING), ("timestamp", DESCENDING)])
+    await database.upi_transactions.create_index([
+        ("user_id", ASCENDING),
+        ("payee_name", TEXT),
+        ("payee_upi", TEXT),
+        ("transaction_id", TEXT)
+    ])
+    
+    # Reconciliation candidate lookups
+    await database.upi_transactions.create_index([("user_id", ASCENDING), ("amount", ASCENDING), ("timestamp", ASCENDING)])
+    await database.expenses.create_index([("user_id", ASCENDING), ("amount", ASCENDING), ("date", ASCENDING)])
+    
+    # Derived models
+    await database.expenses.create_index([("user_id", ASCENDING), ("recurring_key", ASCENDING), ("date", ASCENDING)])
+    await database.spending_anomalies.create_index([("user_id", ASCENDING), ("detected_at", DESCENDING)])
+    await database.spending_anomalies.create_index([("user_id", ASCENDING), ("expense_id", ASCENDING)])
+    await database.payee_stats.create_index([("user_id", ASCENDING), ("period", ASCENDING), ("total", DESCENDING)])
+    await database.payee_stats.create_index([("user_id", ASCENDING), ("period", ASCENDING), ("count", DESCENDING)])
+    await database.category_rules.create_index("user_id")
+    
+    # Chat history and support inbox
+    await database.chat_messages.create_index(
+        [("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]
+    )
+    await database.chat_conversations.create_index([("last_message_at", DESCENDING), ("user_id", DESCENDING)])
+    await database.chat_conversations.create_index(
+        [("awaiting_support", ASCENDING), ("last_message_at", DESCENDING), ("user_id", DESCENDING)]
+    )
+    
+    # Background jobs
+    await database.jobs.create_index(
+        [("queue", ASCENDING), ("status", ASCENDING), ("priority", DESCENDING), ("run_at", ASCENDING)]
+    )
+    await database.jobs.create_index([("status", ASCENDING), ("lease_until", ASCENDING)])
+    await database.jobs.create_index([("status", ASCENDING), ("finished_at", DESCENDING)])
+    
+    # Monthly UPI buckets (UPI_STORAGE=buckets)
+    await database.upi_buckets.create_index([("user_id", ASCENDING), ("transactions._id", ASCENDING)])
+    
+    # Refresh token sessions
+    await database.sessions.create_index("previous_token_hash", sparse=True)
+    await database.sessions.create_index("user_id")
+
+
 async def close_mongo_connection():
     """Close MongoDB connection"""
     global client
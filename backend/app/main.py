@@ -1,12 +1,15 @@
 """
 Main FastAPI application
 """
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from .config import settings
-from .database import connect_to_mongo, close_mongo_connection
+from .database import connect_to_mongo, close_mongo_connection, ensure_indexes
+from .utils.compression import CompressionMiddleware
+from .utils.rate_limit import RateLimitMiddleware
 from .routes import auth
 
 
@@ -14,9 +17,23 @@ from .routes import auth
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
-    await connect_to_mongo()
+    await connect_to_mongo(wait_for_indexes=False)
+    # Unique and TTL indexes exist before serving; on a brand-new database
+    # the query indexes appear a moment after the first requests
+    background = [asyncio.create_task(ensure_indexes())]
+    if settings.DASHBOARD_CHANGE_STREAMS:
+        from .services.dashboard_stream_service import watch_change_streams
+        background.append(asyncio.create_task(watch_change_streams()))
+    if settings.JOB_SCHEDULER:
+        from .services.job_handlers import run_job_scheduler
+        background.append(asyncio.create_task(run_job_scheduler()))
+    if settings.JOB_WORKERS_IN_PROCESS:
+        from .services.job_service import JobWorker
+        background.append(asyncio.create_task(JobWorker().run()))
     yield
     # Shutdown
+    for task in background:
+        task.cancel()
     await close_mongo_connection()
 
 
@@ -27,6 +44,12 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Rate limiting runs inside CORS so 429 responses still carry CORS headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -37,7 +60,10 @@ app.add_middleware(
 )
 
 # Include routers
-from .routes import expenses, emis, analytics, bank_accounts, assets, liabilities, upi, goals
+from .routes import (
+    expenses, emis, analytics, bank_accounts, assets, liabilities, upi, goals,
+    budgets, search, reconciliation, categorization, chat, statements, jobs, batch
+)
 
 app.include_router(auth.router)
 app.include_router(expenses.router)
@@ -48,6 +74,14 @@ app.include_router(assets.router)
 app.include_router(liabilities.router)
 app.include_router(upi.router)
 app.include_router(goals.router)
+app.include_router(budgets.router)
+app.include_router(search.router)
+app.include_router(reconciliation.router)
+app.include_router(categorization.router)
+app.include_router(chat.router)
+app.include_router(statements.router)
+app.include_router(jobs.router)
+app.include_router(batch.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,626 @@
+"""
+In-process database backend
+
+Selected with DATABASE_BACKEND="memory". Services only use the Motor
+collection API through get_database(), so an in-memory implementation of
+that API lets tests, local development and benchmarks run without a
+MongoDB server. Queries, updates (including pipeline updates) and the
+aggregation stages the services use are evaluated by mongomock, an
+optional dependency: `pip install mongomock-motor`.
+
+What mongomock lacks is filled in here:
+
+- $dateTrunc, $dateAdd and $dateSubtract, for /api/analytics/periods
+- $text queries, matched as case-insensitive word prefixes over the
+  fields of the collection's text index, without stemming or stop words;
+  textScore counts the matched words
+- the positional projection ("transactions.$") and array filters
+  ("transactions.$[t]") of UPI_STORAGE="buckets"
+- change streams (database.watch), fed by the writes made through this
+  client, which is all there is for a single process
+
+Written documents are round-tripped through BSON, so what is read back
+has the types MongoDB would return. TTL indexes are accepted but
+documents never expire.
+
+The test suite (backend/tests, requirements-dev.txt) runs on this backend.
+"""
+import asyncio
+import calendar
+import copy
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import count
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+import bson
+from bson import ObjectId, Timestamp
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import OperationFailure
+from pymongo.results import BulkWriteResult, UpdateResult
+
+# Field the textScore of a document is kept in while a $text pipeline runs
+_SCORE_FIELD = "__text_score"
+
+_TEXT_SCORE = {"$meta": "textScore"}
+
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+_MONTHS_PER_UNIT = {"year": 12, "quarter": 3, "month": 1}
+
+_FIXED_UNITS = {
+    "week": timedelta(weeks=1),
+    "day": timedelta(days=1),
+    "hour": timedelta(hours=1),
+    "minute": timedelta(minutes=1),
+    "second": timedelta(seconds=1),
+    "millisecond": timedelta(milliseconds=1)
+}
+
+
+def _encoded(value: Any) -> Any:
+    """
+    A value as MongoDB would store it
+    
+    mongomock keeps written values as they are, but the server gets BSON:
+    str enums arrive as plain strings, aware dates as naive UTC and times
+    are cut to milliseconds.
+    """
+    return bson.decode(bson.encode({"value": value}))["value"]
+
+
+def _is_collection(value: Any) -> bool:
+    from mongomock_motor import AsyncMongoMockCollection
+    return isinstance(value, AsyncMongoMockCollection)
+
+
+# Date expressions
+
+def _local(value: datetime, zone: ZoneInfo) -> datetime:
+    """A stored (naive UTC) date in the given zone"""
+    return value.replace(tzinfo=dt_timezone.utc).astimezone(zone)
+
+
+def _stored(value: datetime) -> datetime:
+    """Back to a naive UTC date, as mongomock stores them"""
+    return value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    """Shift by calendar months, clamping to the last day like MongoDB"""
+    year, month = divmod(value.month - 1 + months, 12)
+    year += value.year
+    day = min(value.day, calendar.monthrange(year, month + 1)[1])
+    return value.replace(year=year, month=month + 1, day=day)
+
+
+def _date_trunc(parse, values: Dict[str, Any]) -> Optional[datetime]:
+    value = parse(values["date"])
+    if value is None:
+        return None
+    unit = parse(values["unit"])
+    if parse(values.get("binSize", 1)) != 1:
+        raise NotImplementedError("$dateTrunc binSize is not supported in memory")
+    zone = ZoneInfo(parse(values.get("timezone", "UTC")))
+    local = _local(value, zone)
+    
+    if unit in _MONTHS_PER_UNIT:
+        months = _MONTHS_PER_UNIT[unit]
+        month = (local.month - 1) // months * months + 1
+        local = datetime(local.year, month, 1, tzinfo=zone)
+    elif unit == "week":
+        start = _WEEKDAYS.index(parse(values.get("startOfWeek", "sunday")).lower())
+        day = local.date() - timedelta(days=(local.weekday() - start) % 7)
+        local = datetime(day.year, day.month, day.day, tzinfo=zone)
+    elif unit == "day":
+        local = datetime(local.year, local.month, local.day, tzinfo=zone)
+    elif unit in ("hour", "minute", "second"):
+        # Whole-hour offsets cannot move these boundaries
+        size = _FIXED_UNITS[unit]
+        return value - (value - datetime.min) % size
+    else:
+        raise OperationFailure(f"$dateTrunc: unknown unit {unit!r}")
+    return _stored(local)
+
+
+def _date_add(parse, values: Dict[str, Any], sign: int = 1) -> Optional[datetime]:
+    value = parse(values["startDate"])
+    amount = parse(values["amount"])
+    if value is None or amount is None:
+        return None
+    unit = parse(values["unit"])
+    
+    if unit in _MONTHS_PER_UNIT:
+        zone = ZoneInfo(parse(values.get("timezone", "UTC")))
+        return _stored(_add_months(_local(value, zone), sign * amount * _MONTHS_PER_UNIT[unit]))
+    if unit in ("day", "week"):
+        # Calendar days: the wall clock time is kept across DST changes
+        zone = ZoneInfo(parse(values.get("timezone", "UTC")))
+        local = _local(value, zone).replace(tzinfo=None) + sign * amount * _FIXED_UNITS[unit]
+        return _stored(local.replace(tzinfo=zone))
+    if unit in _FIXED_UNITS:
+        return value + sign * amount * _FIXED_UNITS[unit]
+    raise OperationFailure(f"$dateAdd: unknown unit {unit!r}")
+
+
+_DATE_OPERATORS = {
+    "$dateTrunc": _date_trunc,
+    "$dateAdd": _date_add,
+    "$dateSubtract": lambda parse, values: _date_add(parse, values, sign=-1)
+}
+
+
+def _install_date_operators() -> None:
+    """Teach mongomock's expression parser the date operators above"""
+    from mongomock import aggregate
+    if "$dateTrunc" in aggregate.date_operators:
+        return
+    
+    handle = aggregate._Parser._handle_date_operator
+    
+    def _handle_date_operator(parser, operator, values):
+        if operator in _DATE_OPERATORS:
+            return _DATE_OPERATORS[operator](parser.parse, values)
+        return handle(parser, operator, values)
+    
+    aggregate.date_operators.extend(_DATE_OPERATORS)
+    aggregate._Parser._handle_date_operator = _handle_date_operator
+
+
+# $text
+
+def _text_patterns(search: str) -> Tuple[List[str], List[str], List[str]]:
+    """Regular expressions for the words, phrases and negated words of a $search"""
+    phrases = re.findall(r'"([^"]*)"', search)
+    words = re.sub(r'"[^"]*"', " ", search).split()
+    terms = [rf"\b{re.escape(word)}" for word in words if not word.startswith("-")]
+    negated = [rf"\b{re.escape(word[1:])}" for word in words if word.startswith("-") and len(word) > 1]
+    return terms, [re.escape(phrase) for phrase in phrases if phrase], negated
+
+
+def _text_filter(search: str, fields: List[str]) -> Dict[str, Any]:
+    """
+    Query matching what {"$text": {"$search": search}} would
+    
+    Any word matches, every phrase must match and no negated word may.
+    """
+    terms, phrases, negated = _text_patterns(search)
+    
+    def anywhere(patterns: List[str]) -> List[Dict[str, Any]]:
+        return [{field: {"$regex": pattern, "$options": "i"}} for pattern in patterns for field in fields]
+    
+    clauses = [{"$or": anywhere([pattern])} for pattern in phrases]
+    if terms:
+        clauses.append({"$or": anywhere(terms)})
+    if negated:
+        clauses.append({"$nor": anywhere(negated)})
+    if not terms and not phrases:
+        clauses.append({"_id": {"$exists": False}})
+    return {"$and": clauses}
+
+
+def _text_score(document: Dict[str, Any], search: str, fields: List[str]) -> float:
+    """Number of words and phrases of the search found in a document"""
+    terms, phrases, _ = _text_patterns(search)
+    score = 0
+    for field in fields:
+        value = document.get(field)
+        if isinstance(value, str):
+            score += sum(len(re.findall(pattern, value, re.IGNORECASE)) for pattern in terms + phrases)
+    return float(score)
+
+
+def _with_score(value: Any) -> Any:
+    """Pipeline stages with textScore read from _SCORE_FIELD"""
+    if value == _TEXT_SCORE:
+        return f"${_SCORE_FIELD}"
+    if isinstance(value, list):
+        return [_with_score(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "$sort" in value:
+        return {"$sort": {
+            (_SCORE_FIELD if direction == _TEXT_SCORE else key): (-1 if direction == _TEXT_SCORE else direction)
+            for key, direction in value["$sort"].items()
+        }}
+    return {key: _with_score(item) for key, item in value.items()}
+
+
+# Positional operators
+
+def _element_query(query: Dict[str, Any], field: str) -> Dict[str, Any]:
+    """Conditions of a query on the elements of an array field"""
+    conditions = {}
+    for key, condition in query.items():
+        if key == field and isinstance(condition, dict) and "$elemMatch" in condition:
+            conditions.update(condition["$elemMatch"])
+        elif key.startswith(f"{field}."):
+            conditions[key[len(field) + 1:]] = condition
+    return conditions
+
+
+def _array_filter_applies(array_filter: Dict[str, Any], identifier: str, element: Any) -> bool:
+    """Whether an array filter on `identifier` selects an element"""
+    from mongomock.filtering import filter_applies
+    query = {
+        "element" + key[len(identifier):]: condition
+        for key, condition in array_filter.items()
+    }
+    return filter_applies(query, {"element": element})
+
+
+def _set_path(document: Dict[str, Any], path: List[str], operator: str, value: Any) -> None:
+    for key in path[:-1]:
+        document = document.setdefault(key, {})
+    if operator == "$set":
+        document[path[-1]] = value
+    elif operator == "$unset":
+        document.pop(path[-1], None)
+    elif operator == "$inc":
+        document[path[-1]] = document.get(path[-1], 0) + value
+    else:
+        raise NotImplementedError(f"{operator} with array filters is not supported in memory")
+
+
+def _apply_array_filters(document: Dict[str, Any], update: Dict[str, Any],
+                         array_filters: List[Dict[str, Any]]) -> None:
+    """Apply $set, $unset and $inc on paths like "transactions.$[t].status" in place"""
+    filters = {next(iter(item)).split(".")[0]: item for item in array_filters}
+    for operator, fields in update.items():
+        for path, value in fields.items():
+            match = re.fullmatch(r"([^$]+)\.\$\[(\w+)\]\.(.+)", path)
+            if not match:
+                _set_path(document, path.split("."), operator, value)
+                continue
+            array, identifier, rest = match.groups()
+            for element in document.get(array) or []:
+                if _array_filter_applies(filters[identifier], identifier, element):
+                    _set_path(element, rest.split("."), operator, value)
+
+
+class MemoryChangeStream:
+    """Motor-compatible change stream over the writes made in this process"""
+    
+    _tokens = count(1)
+    
+    def __init__(self, database: "MemoryDatabase", pipeline: Optional[List[Dict[str, Any]]],
+                 full_document: Optional[str], full_document_before_change: Optional[str]):
+        self._database = database
+        self._matches = []
+        for stage in pipeline or []:
+            if set(stage) != {"$match"}:
+                raise NotImplementedError("Change streams in memory only support $match stages")
+            self._matches.append(stage["$match"])
+        self._full_document = full_document in ("updateLookup", "whenAvailable", "required")
+        self._pre_images = full_document_before_change in ("whenAvailable", "required")
+        self._queue: asyncio.Queue = asyncio.Queue()
+        database._streams.append(self)
+    
+    async def __aenter__(self) -> "MemoryChangeStream":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+    
+    def __aiter__(self) -> "MemoryChangeStream":
+        return self
+    
+    async def __anext__(self) -> Dict[str, Any]:
+        return await self._queue.get()
+    
+    next = __anext__
+    
+    async def close(self) -> None:
+        if self in self._database._streams:
+            self._database._streams.remove(self)
+    
+    def _publish(self, collection: str, operation: str, before: Optional[Dict[str, Any]],
+                 after: Optional[Dict[str, Any]]) -> None:
+        from mongomock.filtering import filter_applies
+        key = (after or before)["_id"]
+        now = datetime.now(dt_timezone.utc)
+        change = {
+            "_id": {"_data": f"{next(self._tokens):016x}"},
+            "operationType": operation,
+            "clusterTime": Timestamp(int(now.timestamp()), 1),
+            "wallTime": now.replace(tzinfo=None),
+            "ns": {"db": self._database.name, "coll": collection},
+            "documentKey": {"_id": key}
+        }
+        if operation in ("insert", "replace") or (operation == "update" and self._full_document):
+            change["fullDocument"] = copy.deepcopy(after)
+        if operation == "update":
+            change["updateDescription"] = {
+                "updatedFields": {k: copy.deepcopy(v) for k, v in after.items() if before.get(k) != v},
+                "removedFields": [k for k in before if k not in after]
+            }
+        if operation != "insert" and self._pre_images:
+            change["fullDocumentBeforeChange"] = copy.deepcopy(before)
+        if all(filter_applies(match, change) for match in self._matches):
+            self._queue.put_nowait(change)
+
+
+class MemoryCollection:
+    """Motor-compatible collection over a mongomock collection"""
+    
+    def __init__(self, collection, database: "MemoryDatabase"):
+        self._collection = collection
+        self._database = database
+        # The synchronous mongomock collection, for work done between calls
+        self._sync = collection.database.delegate.get_collection(collection.name)
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._collection, name)
+    
+    def _text_fields(self) -> List[str]:
+        for index in self._sync.index_information().values():
+            fields = [field for field, kind in index["key"] if kind == "text"]
+            if fields:
+                return fields
+        raise OperationFailure("text index required for $text query", code=27)
+    
+    def _without_text(self, query: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """A query with its $text condition rewritten as regular expressions"""
+        if not query or "$text" not in query:
+            return query
+        query = dict(query)
+        search = query.pop("$text")["$search"]
+        query["$and"] = query.get("$and", []) + [_text_filter(search, self._text_fields())]
+        return query
+    
+    # Reads
+    
+    def find(self, filter: Optional[Dict[str, Any]] = None, *args, **kwargs):
+        return self._collection.find(self._without_text(filter), *args, **kwargs)
+    
+    async def find_one(self, filter: Optional[Dict[str, Any]] = None,
+                       projection: Optional[Dict[str, Any]] = None, **kwargs) -> Optional[Dict[str, Any]]:
+        """find_one, keeping only the first matching element for a "field.$" projection"""
+        from mongomock.filtering import filter_applies
+        positional = next((key[:-2] for key in projection or {} if key.endswith(".$")), None)
+        if positional:
+            projection = {key: value for key, value in projection.items() if key != f"{positional}.$"}
+            projection[positional] = 1
+        
+        document = await self._collection.find_one(self._without_text(filter), projection, **kwargs)
+        if document and positional:
+            conditions = _element_query(filter, positional)
+            document[positional] = [
+                element for element in document.get(positional) or [] if filter_applies(conditions, element)
+            ][:1]
+        return document
+    
+    async def count_documents(self, filter: Dict[str, Any], **kwargs) -> int:
+        return await self._collection.count_documents(self._without_text(filter), **kwargs)
+    
+    def aggregate(self, pipeline: List[Dict[str, Any]], **kwargs):
+        """
+        aggregate, answering a leading $text match itself
+        
+        The matches are scored and copied into a scratch collection, where
+        the rest of the pipeline runs with textScore read from a field.
+        """
+        match = pipeline[0].get("$match", {}) if pipeline else {}
+        if "$text" not in match:
+            return self._collection.aggregate(pipeline, **kwargs)
+        
+        from mongomock import MongoClient
+        from mongomock.command_cursor import CommandCursor
+        from mongomock_motor import AsyncCommandCursor
+        search, fields = match["$text"]["$search"], self._text_fields()
+        scratch = MongoClient().db[self._sync.name]
+        for document in self._sync.find(self._without_text(match)):
+            document[_SCORE_FIELD] = _text_score(document, search, fields)
+            scratch.insert_one(document)
+        
+        results = []
+        for document in scratch.aggregate(_with_score(pipeline[1:]), **kwargs):
+            document.pop(_SCORE_FIELD, None)
+            results.append(document)
+        return AsyncCommandCursor(CommandCursor(results))
+    
+    # Writes, published to change streams when any are open
+    
+    def _publish(self, operation: str, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> None:
+        for stream in list(self._database._streams):
+            stream._publish(self._collection.name, operation, before, after)
+    
+    def _matching(self, filter: Dict[str, Any], many: bool, sort: Any = None) -> List[Dict[str, Any]]:
+        """Documents a write is about to change, when change streams need them"""
+        if not self._database._streams:
+            return []
+        cursor = self._sync.find(self._without_text(filter), sort=sort)
+        return list(cursor if many else cursor.limit(1))
+    
+    def _publish_writes(self, before: List[Dict[str, Any]], upserted_id: Any = None, replace: bool = False) -> None:
+        if not self._database._streams:
+            return
+        for previous in before:
+            current = self._sync.find_one({"_id": previous["_id"]})
+            if current is None:
+                self._publish("delete", previous, None)
+            elif current != previous or replace:
+                self._publish("replace" if replace else "update", previous, current)
+        if upserted_id is not None:
+            self._publish("insert", None, self._sync.find_one({"_id": upserted_id}))
+    
+    async def insert_one(self, document: Dict[str, Any], **kwargs):
+        # Like pymongo, give the caller's document its _id
+        document.setdefault("_id", ObjectId())
+        result = await self._collection.insert_one(_encoded(document), **kwargs)
+        self._publish_writes([], result.inserted_id)
+        return result
+    
+    async def insert_many(self, documents: List[Dict[str, Any]], **kwargs):
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        result = await self._collection.insert_many([_encoded(document) for document in documents], **kwargs)
+        for inserted_id in result.inserted_ids:
+            self._publish_writes([], inserted_id)
+        return result
+    
+    async def _update(self, filter: Dict[str, Any], update: Any, many: bool, upsert: bool,
+                      array_filters: Optional[List[Dict[str, Any]]], **kwargs) -> UpdateResult:
+        before = self._matching(filter, many)
+        update = _encoded(update)
+        if not array_filters:
+            write = self._collection.update_many if many else self._collection.update_one
+            # Upserts copy equality conditions into the new document
+            filter = _encoded(filter) if upsert else filter
+            result = await write(self._without_text(filter), update, upsert=upsert, **kwargs)
+            self._publish_writes(before, result.upserted_id)
+            return result
+        
+        if upsert:
+            raise NotImplementedError("Upserts with array filters are not supported in memory")
+        cursor = self._sync.find(self._without_text(filter))
+        documents = list(cursor if many else cursor.limit(1))
+        modified = 0
+        for document in documents:
+            updated = copy.deepcopy(document)
+            _apply_array_filters(updated, update, array_filters)
+            if updated != document:
+                self._sync.replace_one({"_id": document["_id"]}, updated)
+                modified += 1
+        self._publish_writes(before)
+        return UpdateResult({"n": len(documents), "nModified": modified}, acknowledged=True)
+    
+    async def update_one(self, filter: Dict[str, Any], update: Any, upsert: bool = False,
+                         array_filters: Optional[List[Dict[str, Any]]] = None, **kwargs) -> UpdateResult:
+        return await self._update(filter, update, False, upsert, array_filters, **kwargs)
+    
+    async def update_many(self, filter: Dict[str, Any], update: Any, upsert: bool = False,
+                          array_filters: Optional[List[Dict[str, Any]]] = None, **kwargs) -> UpdateResult:
+        return await self._update(filter, update, True, upsert, array_filters, **kwargs)
+    
+    async def replace_one(self, filter: Dict[str, Any], replacement: Dict[str, Any], upsert: bool = False, **kwargs):
+        before = self._matching(filter, False)
+        result = await self._collection.replace_one(filter, _encoded(replacement), upsert=upsert, **kwargs)
+        self._publish_writes(before, result.upserted_id, replace=True)
+        return result
+    
+    async def delete_one(self, filter: Dict[str, Any], **kwargs):
+        before = self._matching(filter, False)
+        result = await self._collection.delete_one(filter, **kwargs)
+        self._publish_writes(before)
+        return result
+    
+    async def delete_many(self, filter: Dict[str, Any], **kwargs):
+        before = self._matching(filter, True)
+        result = await self._collection.delete_many(filter, **kwargs)
+        self._publish_writes(before)
+        return result
+    
+    async def find_one_and_update(self, filter: Dict[str, Any], update: Any, *args, **kwargs):
+        before = self._matching(filter, False, kwargs.get("sort"))
+        if kwargs.get("upsert"):
+            filter = _encoded(filter)
+        result = await self._collection.find_one_and_update(filter, _encoded(update), *args, **kwargs)
+        if before or not kwargs.get("upsert"):
+            self._publish_writes(before)
+        else:
+            # An upserted document matches the filter it was created from
+            self._publish_writes([], next(iter(self._matching(filter, False)), {}).get("_id"))
+        return result
+    
+    async def find_one_and_replace(self, filter: Dict[str, Any], replacement: Dict[str, Any], *args, **kwargs):
+        before = self._matching(filter, False, kwargs.get("sort"))
+        result = await self._collection.find_one_and_replace(filter, _encoded(replacement), *args, **kwargs)
+        self._publish_writes(before, replace=True)
+        return result
+    
+    async def find_one_and_delete(self, filter: Dict[str, Any], *args, **kwargs):
+        before = self._matching(filter, False, kwargs.get("sort"))
+        result = await self._collection.find_one_and_delete(filter, *args, **kwargs)
+        self._publish_writes(before)
+        return result
+    
+    async def bulk_write(self, requests: List[Any], ordered: bool = True, **kwargs) -> BulkWriteResult:
+        """
+        Apply write operations one by one
+        
+        mongomock builds bulk writes through pymongo internals that changed
+        in pymongo 4.9, so operations are replayed as single writes.
+        """
+        counts = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "nUpserted": 0}
+        upserted = []
+        
+        for index, operation in enumerate(requests):
+            if isinstance(operation, InsertOne):
+                await self.insert_one(operation._doc)
+                counts["nInserted"] += 1
+                continue
+            
+            if isinstance(operation, DeleteOne):
+                result = await self.delete_one(operation._filter)
+                counts["nRemoved"] += result.deleted_count
+                continue
+            if isinstance(operation, DeleteMany):
+                result = await self.delete_many(operation._filter)
+                counts["nRemoved"] += result.deleted_count
+                continue
+            
+            if isinstance(operation, ReplaceOne):
+                result = await self.replace_one(operation._filter, operation._doc, upsert=operation._upsert)
+            elif isinstance(operation, (UpdateOne, UpdateMany)):
+                update = self.update_one if isinstance(operation, UpdateOne) else self.update_many
+                result = await update(
+                    operation._filter, operation._doc,
+                    upsert=operation._upsert, array_filters=operation._array_filters
+                )
+            else:
+                raise TypeError(f"Unsupported bulk write operation: {operation!r}")
+            
+            counts["nMatched"] += result.matched_count
+            counts["nModified"] += result.modified_count
+            if result.upserted_id is not None:
+                counts["nUpserted"] += 1
+                upserted.append({"index": index, "_id": result.upserted_id})
+        
+        return BulkWriteResult({**counts, "upserted": upserted, "writeErrors": []}, acknowledged=True)
+
+
+class MemoryDatabase:
+    """Motor-compatible database whose collections live in process memory"""
+    
+    def __init__(self, database):
+        self._database = database
+        self._streams: List[MemoryChangeStream] = []
+    
+    def __getitem__(self, name: str) -> MemoryCollection:
+        return MemoryCollection(self._database[name], self)
+    
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        value = getattr(self._database, name)
+        return MemoryCollection(value, self) if _is_collection(value) else value
+    
+    def watch(self, pipeline: Optional[List[Dict[str, Any]]] = None, full_document: Optional[str] = None,
+              full_document_before_change: Optional[str] = None, **kwargs) -> MemoryChangeStream:
+        """Change stream over every collection, opened immediately"""
+        return MemoryChangeStream(self, pipeline, full_document, full_document_before_change)
+
+
+class MemoryClient:
+    """Motor-compatible client for DATABASE_BACKEND="memory" """
+    
+    def __init__(self):
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError as e:
+            raise RuntimeError(
+                'DATABASE_BACKEND "memory" needs mongomock-motor: pip install mongomock-motor'
+            ) from e
+        _install_date_operators()
+        self._client = AsyncMongoMockClient()
+        self._databases: Dict[str, MemoryDatabase] = {}
+    
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        # Cached so change streams see writes made through any reference
+        if name not in self._databases:
+            self._databases[name] = MemoryDatabase(self._client[name])
+        return self._databases[name]
+    
+    def close(self) -> None:
+        """Nothing to release; data is dropped with the client"""
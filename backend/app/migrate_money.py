@@ -0,0 +1,105 @@
+"""
+Convert stored money amounts from float rupees to integer paise
+
+Run with `python -m app.migrate_money` while deploying the paise money
+layer. Only fields still stored as doubles are converted, so the migration
+can be re-run safely. Spending rollups and recurring expense patterns are
+derived from amounts; they are dropped here and rebuilt on next use.
+"""
+import asyncio
+
+from .database import connect_to_mongo, close_mongo_connection, get_database
+from .models.asset import AssetResponse
+from .models.bank_account import BankAccountResponse
+from .models.budget import BudgetResponse
+from .models.category_rule import CategoryRuleResponse
+from .models.emi import EMIResponse
+from .models.expense import ExpenseResponse
+from .models.financial_goal import FinancialGoalResponse
+from .models.liability import LiabilityResponse
+from .models.upi_transaction import UPITransactionResponse
+from .utils.money import money_fields
+
+COLLECTIONS = {
+    "expenses": ExpenseResponse,
+    "upi_transactions": UPITransactionResponse,
+    "bank_accounts": BankAccountResponse,
+    "emis": EMIResponse,
+    "assets": AssetResponse,
+    "liabilities": LiabilityResponse,
+    "financial_goals": FinancialGoalResponse,
+    "budgets": BudgetResponse,
+    "category_rules": CategoryRuleResponse
+}
+
+
+def _paise(value: str):
+    """
+    Expression converting a rupee double to paise
+    
+    Halves are rounded away from zero, like to_paise: the magnitude is
+    rounded and the sign put back. $round would round halves to even.
+    """
+    return {"$cond": [
+        {"$eq": [{"$type": value}, "double"]},
+        {"$let": {
+            "vars": {"paise": {"$multiply": [{"$toDecimal": value}, 100]}},
+            "in": {"$toLong": {"$multiply": [
+                {"$cond": [{"$lt": ["$$paise", 0]}, -1, 1]},
+                {"$floor": {"$add": [{"$abs": "$$paise"}, 0.5]}}
+            ]}}
+        }},
+        value
+    ]}
+
+
+def _paise_items(array: str, field: str):
+    """Expression converting a field of every element of an array"""
+    return {"$map": {
+        "input": array,
+        "in": {"$mergeObjects": ["$$this", {field: _paise(f"$$this.{field}")}]}
+    }}
+
+
+async def migrate() -> None:
+    """Convert every money field still stored in rupees"""
+    db = get_database()
+    
+    for name, model in COLLECTIONS.items():
+        for field in money_fields(model):
+            result = await db[name].update_many(
+                {field: {"$type": "double"}},
+                [{"$set": {field: _paise(f"${field}")}}]
+            )
+            print(f"✅ {name}.{field}: {result.modified_count} documents converted")
+    
+    result = await db.financial_goals.update_many(
+        {"contribution_history.amount": {"$type": "double"}},
+        [{"$set": {"contribution_history": _paise_items("$contribution_history", "amount")}}]
+    )
+    print(f"✅ financial_goals.contribution_history: {result.modified_count} documents converted")
+    
+    result = await db.upi_buckets.update_many(
+        {"transactions.amount": {"$type": "double"}},
+        [
+            {"$set": {"transactions": _paise_items("$transactions", "amount")}},
+            {"$set": {"total": {"$sum": "$transactions.amount"}}}
+        ]
+    )
+    print(f"✅ upi_buckets: {result.modified_count} buckets converted")
+    
+    for name in ("spending_rollups", "spending_rollup_state", "recurring_expenses", "forecast_models"):
+        await db[name].delete_many({})
+    print("✅ Rollups and recurring patterns cleared for rebuild")
+
+
+async def main() -> None:
+    await connect_to_mongo()
+    try:
+        await migrate()
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
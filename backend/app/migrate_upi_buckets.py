@@ -0,0 +1,52 @@
+"""
+Copy UPI transactions from upi_transactions into monthly buckets
+
+Run with `python -m app.migrate_upi_buckets` before setting
+UPI_STORAGE=buckets. Transactions keep their IDs, and ones already in a
+bucket are skipped, so the migration can be re-run to pick up writes made
+while it ran. upi_transactions is left untouched; drop it once the bucket
+storage is verified.
+"""
+import asyncio
+
+from .database import connect_to_mongo, close_mongo_connection, get_database
+from .services.upi_store import BucketUPIStore
+
+# Transactions written per bucket update
+BATCH_SIZE = 500
+
+
+async def migrate() -> None:
+    """Copy every user's transactions into buckets"""
+    db = get_database()
+    store = BucketUPIStore()
+    copied = skipped = 0
+    
+    for user_id in await db.upi_transactions.distinct("user_id"):
+        batch = []
+        cursor = db.upi_transactions.find({"user_id": user_id}).sort("timestamp", 1)
+        async for transaction in cursor:
+            batch.append(transaction)
+            if len(batch) == BATCH_SIZE:
+                inserted = await store.insert_many(batch)
+                copied += len(inserted)
+                skipped += len(batch) - len(inserted)
+                batch = []
+        if batch:
+            inserted = await store.insert_many(batch)
+            copied += len(inserted)
+            skipped += len(batch) - len(inserted)
+    
+    print(f"✅ UPI buckets: {copied} transactions copied, {skipped} already present")
+
+
+async def main() -> None:
+    await connect_to_mongo()
+    try:
+        await migrate()
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
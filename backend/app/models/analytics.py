@@ -0,0 +1,58 @@
+"""
+Period analytics and heatmap model and schemas
+"""
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date, datetime
+from enum import Enum
+
+
+class Granularity(str, Enum):
+    """Length of the periods spending is bucketed into"""
+    DAY = "day"
+    WEEK = "week"  # Starting Monday
+    MONTH = "month"
+    QUARTER = "quarter"  # Calendar quarters
+    FISCAL_YEAR = "fiscal_year"  # Indian financial year, April to March
+
+
+class PeriodGroupBy(str, Enum):
+    """Expense field spending can be split by within each period"""
+    CATEGORY = "category"
+    PAYMENT_METHOD = "payment_method"
+
+
+class PeriodBucket(BaseModel):
+    """Spending in one period (and group)"""
+    period_start: date
+    group: Optional[str] = None
+    total: float
+    count: int
+
+
+class PeriodAnalytics(BaseModel):
+    """Spending over a date range bucketed by period"""
+    start: datetime
+    end: datetime
+    granularity: Granularity
+    group_by: Optional[PeriodGroupBy] = None
+    timezone: str
+    total: float
+    buckets: List[PeriodBucket]  # Periods without spending are omitted
+    rollup_months: int  # Whole months answered from spending rollups
+
+
+class SpendingHeatmap(BaseModel):
+    """
+    Daily spending over a 12-month window, for calendar heatmaps
+    
+    Only days with spending are listed, as parallel arrays: day i of the
+    window (start + offsets[i] days) has totals[i] spent over counts[i]
+    expenses.
+    """
+    start: date
+    end: date  # Exclusive
+    offsets: List[int]
+    totals: List[float]
+    counts: List[int]
+    max_total: float  # Largest daily total, for scaling colours
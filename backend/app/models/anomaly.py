@@ -0,0 +1,32 @@
+"""
+Spending anomaly models and schemas
+"""
+from pydantic import BaseModel, Field
+from datetime import datetime
+from .expense import ExpenseCategory
+from ..utils.money import Money
+
+
+class CategorySpendingStats(BaseModel):
+    """Running statistics of a user's expenses in one category"""
+    category: ExpenseCategory
+    count: int
+    mean: Money
+    std_dev: Money
+
+
+class SpendingAnomaly(BaseModel):
+    """Expense scored as unusually large for its category"""
+    id: str = Field(..., alias="_id")
+    expense_id: str
+    category: ExpenseCategory
+    description: str
+    amount: Money
+    date: datetime
+    mean: Money  # Category average before this expense
+    std_dev: Money
+    z_score: float
+    detected_at: datetime
+    
+    class Config:
+        populate_by_name = True
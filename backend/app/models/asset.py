@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime, date
 from enum import Enum
+from ..utils.money import Money
 
 
 class AssetType(str, Enum):
@@ -21,8 +22,8 @@ class AssetBase(BaseModel):
     """Base asset schema"""
     asset_type: AssetType
     name: str = Field(..., min_length=2, max_length=100)
-    current_value: float = Field(..., ge=0)
-    purchase_value: Optional[float] = Field(None, ge=0)
+    current_value: Money = Field(..., ge=0)
+    purchase_value: Optional[Money] = Field(None, ge=0)
     purchase_date: Optional[date] = None
     description: Optional[str] = Field(None, max_length=500)
 
@@ -36,8 +37,8 @@ class AssetUpdate(BaseModel):
     """Asset update schema"""
     asset_type: Optional[AssetType] = None
     name: Optional[str] = Field(None, min_length=2, max_length=100)
-    current_value: Optional[float] = Field(None, ge=0)
-    purchase_value: Optional[float] = Field(None, ge=0)
+    current_value: Optional[Money] = Field(None, ge=0)
+    purchase_value: Optional[Money] = Field(None, ge=0)
     purchase_date: Optional[date] = None
     description: Optional[str] = Field(None, max_length=500)
 
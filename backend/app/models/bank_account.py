@@ -1,10 +1,11 @@
 """
 Bank account model and schemas
 """
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, List, Optional
 from datetime import datetime
 from enum import Enum
+from ..utils.money import Money
 
 
 class AccountType(str, Enum):
@@ -19,8 +20,14 @@ class BankAccountBase(BaseModel):
     bank_name: str = Field(..., min_length=2, max_length=100)
     account_number: str = Field(..., min_length=5, max_length=20)
     account_type: AccountType
-    balance: float = Field(..., ge=0)
-    currency: str = Field(default="INR")
+    balance: Money = Field(..., ge=0)
+    currency: str = Field(default="INR", min_length=3, max_length=3)  # ISO 4217 code
+    
+    @field_validator("currency")
+    @classmethod
+    def normalize_currency(cls, value: str) -> str:
+        """Store currency codes in upper case"""
+        return value.upper()
 
 
 class BankAccountCreate(BankAccountBase):
@@ -32,7 +39,7 @@ class BankAccountUpdate(BaseModel):
     """Bank account update schema"""
     bank_name: Optional[str] = None
     account_type: Optional[AccountType] = None
-    balance: Optional[float] = Field(None, ge=0)
+    balance: Optional[Money] = Field(None, ge=0)
 
 
 class BankAccountResponse(BankAccountBase):
@@ -44,3 +51,20 @@ class BankAccountResponse(BankAccountBase):
     
     class Config:
         populate_by_name = True
+
+
+class CurrencyBalance(BaseModel):
+    """Balance held in one currency"""
+    currency: str
+    balance: float
+    rate: Optional[float] = None  # Units of the base currency per unit, None if unknown
+    converted: Optional[float] = None
+
+
+class BalanceSummary(BaseModel):
+    """Balances per currency and their total in the user's base currency"""
+    base_currency: str
+    total_balance: float
+    by_currency: List[CurrencyBalance]
+    unconverted_currencies: List[str] = []  # Left out of the total for lack of a rate
+    fx_version: str
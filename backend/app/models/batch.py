@@ -0,0 +1,29 @@
+"""
+Batch request schemas
+"""
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List
+
+
+class BatchSubRequest(BaseModel):
+    """GET request for an existing resource, e.g. /api/emis/upcoming?days=7"""
+    id: str = Field(..., min_length=1, max_length=50)  # Echoed back to match responses
+    path: str = Field(..., pattern=r"^/api/", max_length=2000)
+
+
+class BatchRequest(BaseModel):
+    """Sub-requests executed together"""
+    requests: List[BatchSubRequest] = Field(..., min_length=1, max_length=20)
+
+
+class BatchSubResponse(BaseModel):
+    """Outcome of one sub-request, as the endpoint would have answered it"""
+    id: str
+    status: int
+    headers: Dict[str, str] = {}  # ETag of list endpoints
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    """Sub-request outcomes in request order"""
+    responses: List[BatchSubResponse]
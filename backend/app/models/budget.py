@@ -0,0 +1,57 @@
+"""
+Budget model and schemas
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from .anomaly import SpendingAnomaly
+from .expense import ExpenseCategory, ExpenseResponse
+from ..utils.money import Money
+
+
+class BudgetBase(BaseModel):
+    """Base budget schema"""
+    category: ExpenseCategory
+    monthly_limit: Money = Field(..., gt=0)
+    alert_threshold: float = Field(default=80, gt=0, le=100)  # Percentage of limit
+
+
+class BudgetCreate(BudgetBase):
+    """Budget creation schema"""
+    pass
+
+
+class BudgetUpdate(BaseModel):
+    """Budget update schema"""
+    monthly_limit: Optional[Money] = Field(None, gt=0)
+    alert_threshold: Optional[float] = Field(None, gt=0, le=100)
+
+
+class BudgetResponse(BudgetBase):
+    """Budget response schema"""
+    id: str = Field(..., alias="_id")
+    user_id: str
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        populate_by_name = True
+
+
+class BudgetStatus(BaseModel):
+    """Spending against a category budget for one month"""
+    category: ExpenseCategory
+    month: int
+    year: int
+    spent: float
+    monthly_limit: Optional[float] = None
+    remaining: Optional[float] = None
+    percentage_used: Optional[float] = None
+    threshold_reached: bool = False
+    exceeded: bool = False
+
+
+class ExpenseBudgetResponse(ExpenseResponse):
+    """Expense write response with the affected budget status"""
+    budget_status: Optional[BudgetStatus] = None
+    anomaly: Optional[SpendingAnomaly] = None  # Set when the amount is unusual for the category
@@ -0,0 +1,76 @@
+"""
+Categorization rule model and schemas
+"""
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional
+from datetime import datetime
+from enum import Enum
+from .expense import ExpenseCategory
+from ..utils.money import Money
+
+
+class RuleType(str, Enum):
+    """Categorization rule types"""
+    PAYEE_UPI = "payee_upi"  # Exact UPI ID or handle, e.g. swiggy@icici or swiggy
+    KEYWORD = "keyword"  # Word or phrase in the description or payee name
+    AMOUNT_RANGE = "amount_range"
+
+
+class CategoryRuleBase(BaseModel):
+    """Base categorization rule schema"""
+    rule_type: RuleType
+    pattern: Optional[str] = Field(None, min_length=2, max_length=100)
+    min_amount: Optional[Money] = Field(None, ge=0)
+    max_amount: Optional[Money] = Field(None, gt=0)
+    category: ExpenseCategory
+    priority: int = Field(default=0, ge=0, le=100)
+    
+    @model_validator(mode="after")
+    def check_rule(self):
+        """Require the fields each rule type matches on"""
+        if self.rule_type == RuleType.AMOUNT_RANGE:
+            if self.min_amount is None and self.max_amount is None:
+                raise ValueError("Amount range rules need min_amount or max_amount")
+        elif not self.pattern:
+            raise ValueError("Payee and keyword rules need a pattern")
+        return self
+
+
+class CategoryRuleCreate(CategoryRuleBase):
+    """Categorization rule creation schema"""
+    pass
+
+
+class CategoryRuleResponse(CategoryRuleBase):
+    """Categorization rule response schema"""
+    id: str = Field(..., alias="_id")
+    user_id: str
+    created_at: datetime
+    
+    class Config:
+        populate_by_name = True
+
+
+class ClassifyRequest(BaseModel):
+    """Ad-hoc classification request"""
+    description: Optional[str] = Field(None, max_length=500)
+    payee_name: Optional[str] = Field(None, max_length=100)
+    payee_upi: Optional[str] = Field(None, max_length=100)
+    amount: Optional[float] = Field(None, gt=0)
+
+
+class ClassifyResponse(BaseModel):
+    """Classification outcome"""
+    category: ExpenseCategory
+    matched_rule: Optional[str] = None  # "user" or "global", None for the fallback
+
+
+class RecategorizeJob(BaseModel):
+    """Accepted recategorization, followed through GET /api/jobs/{job_id}"""
+    job_id: str
+
+
+class RecategorizeResult(BaseModel):
+    """Outcome of a history re-categorization"""
+    expenses_updated: int
+    transactions_updated: int
@@ -2,7 +2,7 @@
 Chat model and schemas
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -35,3 +35,30 @@ class ChatMessageResponse(ChatMessageBase):
     
     class Config:
         populate_by_name = True
+
+
+class ChatHistoryPage(BaseModel):
+    """Page of chat messages, newest first"""
+    messages: List[ChatMessageResponse]
+    next_cursor: Optional[str] = None  # Pass as "before" to get older messages
+
+
+class ChatConversation(BaseModel):
+    """Conversation summary shown in the support inbox"""
+    user_id: str
+    last_message: str
+    last_sender: MessageSender
+    last_message_at: datetime
+    unread: int  # User messages support has not read yet
+    awaiting_support: bool
+
+
+class ChatConversationPage(BaseModel):
+    """Page of conversations, most recent first"""
+    conversations: List[ChatConversation]
+    next_cursor: Optional[str] = None
+
+
+class ChatUnreadCount(BaseModel):
+    """Unread message counter"""
+    unread: int
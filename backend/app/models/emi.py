@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime, date
 from enum import Enum
+from ..utils.money import Money
 
 
 class EMIStatus(str, Enum):
@@ -17,7 +18,7 @@ class EMIStatus(str, Enum):
 class EMIBase(BaseModel):
     """Base EMI schema"""
     loan_name: str = Field(..., min_length=2, max_length=100)
-    principal_amount: float = Field(..., gt=0)
+    principal_amount: Money = Field(..., gt=0)
     interest_rate: float = Field(..., ge=0, le=100)  # Annual interest rate in percentage
     tenure: int = Field(..., gt=0)  # Tenure in months
     start_date: date
@@ -40,11 +41,11 @@ class EMIResponse(EMIBase):
     """EMI response schema"""
     id: str = Field(..., alias="_id")
     user_id: str
-    emi_amount: float
+    emi_amount: Money
     next_payment_date: date
     remaining_tenure: int
-    total_interest_paid: float
-    principal_outstanding: float
+    total_interest_paid: Money
+    principal_outstanding: Money
     status: EMIStatus
     created_at: datetime
     updated_at: datetime
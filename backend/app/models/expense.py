@@ -1,10 +1,11 @@
 """
 Expense model and schemas
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
+from ..utils.money import Money
 
 
 class ExpenseCategory(str, Enum):
@@ -30,33 +31,51 @@ class PaymentMethod(str, Enum):
     NET_BANKING = "Net Banking"
 
 
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Store offset-aware dates as naive UTC, like every date read back from MongoDB"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
 class ExpenseBase(BaseModel):
     """Base expense schema"""
     category: ExpenseCategory
-    amount: float = Field(..., gt=0)
+    amount: Money = Field(..., gt=0)
     description: str = Field(..., min_length=1, max_length=500)
     date: datetime
     payment_method: PaymentMethod
+    
+    @field_validator("date")
+    @classmethod
+    def normalize_date(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return naive_utc(value)
 
 
 class ExpenseCreate(ExpenseBase):
     """Expense creation schema"""
-    pass
+    category: Optional[ExpenseCategory] = None  # Auto-categorized when omitted
 
 
 class ExpenseUpdate(BaseModel):
     """Expense update schema"""
     category: Optional[ExpenseCategory] = None
-    amount: Optional[float] = Field(None, gt=0)
+    amount: Optional[Money] = Field(None, gt=0)
     description: Optional[str] = Field(None, min_length=1, max_length=500)
     date: Optional[datetime] = None
     payment_method: Optional[PaymentMethod] = None
+    
+    @field_validator("date")
+    @classmethod
+    def normalize_date(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return naive_utc(value)
 
 
 class ExpenseResponse(ExpenseBase):
     """Expense response schema"""
     id: str = Field(..., alias="_id")
     user_id: str
+    upi_transaction_id: Optional[str] = None  # Linked UPI transaction, set by reconciliation
     created_at: datetime
     updated_at: datetime
     
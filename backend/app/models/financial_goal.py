@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime, date
 from enum import Enum
+from ..utils.money import Money
 
 
 class GoalStatus(str, Enum):
@@ -29,8 +30,8 @@ class GoalCategory(str, Enum):
 class FinancialGoalBase(BaseModel):
     """Base financial goal schema"""
     goal_name: str = Field(..., min_length=2, max_length=100)
-    target_amount: float = Field(..., gt=0)
-    current_amount: float = Field(default=0, ge=0)
+    target_amount: Money = Field(..., gt=0)
+    current_amount: Money = Field(default=0, ge=0)
     deadline: date
     category: GoalCategory
 
@@ -43,8 +44,8 @@ class FinancialGoalCreate(FinancialGoalBase):
 class FinancialGoalUpdate(BaseModel):
     """Financial goal update schema"""
     goal_name: Optional[str] = Field(None, min_length=2, max_length=100)
-    target_amount: Optional[float] = Field(None, gt=0)
-    current_amount: Optional[float] = Field(None, ge=0)
+    target_amount: Optional[Money] = Field(None, gt=0)
+    current_amount: Optional[Money] = Field(None, ge=0)
     deadline: Optional[date] = None
     category: Optional[GoalCategory] = None
     status: Optional[GoalStatus] = None
@@ -61,3 +62,18 @@ class FinancialGoalResponse(FinancialGoalBase):
     
     class Config:
         populate_by_name = True
+
+
+class GoalProjection(BaseModel):
+    """Projected completion for a financial goal"""
+    goal_id: str
+    goal_name: str
+    status: GoalStatus
+    target_amount: float
+    current_amount: float
+    remaining_amount: float
+    deadline: date
+    monthly_velocity: float  # Average monthly contribution observed so far
+    projected_completion_date: Optional[date] = None
+    required_monthly_amount: float
+    on_track: bool
@@ -0,0 +1,53 @@
+"""
+Cash flow forecast model and schemas
+"""
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date
+from enum import Enum
+
+
+class ForecastSource(str, Enum):
+    """Origin of a projected cash flow"""
+    RECURRING_EXPENSE = "recurring_expense"
+    EMI = "emi"
+    GOAL = "goal"
+
+
+class RecurringExpense(BaseModel):
+    """Recurring expense pattern detected from expense history"""
+    category: str
+    description: str
+    average_amount: float
+    interval_days: float
+    occurrences: int
+    last_date: date
+    next_date: date
+
+
+class ForecastEvent(BaseModel):
+    """Single projected outflow on a forecast day"""
+    source: ForecastSource
+    name: str
+    amount: float
+
+
+class ForecastDay(BaseModel):
+    """Projected cash position for one day"""
+    date: date
+    outflow: float
+    balance: float
+    events: List[ForecastEvent] = Field(default_factory=list)
+
+
+class CashFlowForecast(BaseModel):
+    """Daily cash flow forecast"""
+    start_date: date
+    days: int
+    opening_balance: float
+    closing_balance: float
+    total_outflow: float
+    lowest_balance: float
+    lowest_balance_date: Optional[date] = None
+    recurring_expenses: List[RecurringExpense]
+    daily: List[ForecastDay]
@@ -0,0 +1,54 @@
+"""
+Background job model and schemas
+"""
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from enum import Enum
+
+
+class JobStatus(str, Enum):
+    """Job lifecycle states"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    DEAD = "dead"  # Failed on every attempt
+
+
+class JobResponse(BaseModel):
+    """Job response schema"""
+    id: str = Field(..., alias="_id")
+    queue: str
+    name: str
+    payload: Dict[str, Any]
+    priority: int
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None  # Returned by the handler
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        populate_by_name = True
+
+
+class QueueStats(BaseModel):
+    """Monitoring figures for one queue"""
+    queue: str
+    queued: int
+    ready: int  # Queued jobs whose run_at has passed
+    running: int
+    dead: int
+    succeeded_last_window: int
+    throughput_per_minute: float  # Succeeded jobs per minute over the window
+    lag_seconds: float  # Age of the oldest ready job, 0 when none is waiting
+
+
+class JobQueueStats(BaseModel):
+    """Monitoring figures for all queues"""
+    window_minutes: int
+    queues: List[QueueStats]
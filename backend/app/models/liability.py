@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime, date
 from enum import Enum
+from ..utils.money import Money
 
 
 class LiabilityType(str, Enum):
@@ -29,7 +30,7 @@ class LiabilityBase(BaseModel):
     """Base liability schema"""
     liability_type: LiabilityType
     name: str = Field(..., min_length=2, max_length=100)
-    amount: float = Field(..., gt=0)
+    amount: Money = Field(..., gt=0)
     interest_rate: Optional[float] = Field(None, ge=0, le=100)
     due_date: Optional[date] = None
 
@@ -43,7 +44,7 @@ class LiabilityUpdate(BaseModel):
     """Liability update schema"""
     liability_type: Optional[LiabilityType] = None
     name: Optional[str] = Field(None, min_length=2, max_length=100)
-    amount: Optional[float] = Field(None, gt=0)
+    amount: Optional[Money] = Field(None, gt=0)
     interest_rate: Optional[float] = Field(None, ge=0, le=100)
     due_date: Optional[date] = None
     status: Optional[LiabilityStatus] = None
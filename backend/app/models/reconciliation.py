@@ -0,0 +1,33 @@
+"""
+UPI reconciliation model and schemas
+"""
+from pydantic import BaseModel
+from typing import List
+from .expense import ExpenseResponse
+from .upi_transaction import UPITransactionResponse
+
+
+class ReconciliationMatch(BaseModel):
+    """Candidate pairing of a UPI transaction with an expense"""
+    transaction_id: str
+    expense_id: str
+    amount: float
+    confidence: float
+
+
+class ReconciliationResult(BaseModel):
+    """Outcome of a reconciliation run"""
+    linked: List[ReconciliationMatch]
+    suggestions: List[ReconciliationMatch]
+
+
+class UnmatchedItems(BaseModel):
+    """UPI transactions and UPI expenses without a counterpart"""
+    transactions: List[UPITransactionResponse]
+    expenses: List[ExpenseResponse]
+
+
+class LinkRequest(BaseModel):
+    """Manual link request"""
+    transaction_id: str
+    expense_id: str
@@ -0,0 +1,41 @@
+"""
+Search model and schemas
+"""
+from pydantic import BaseModel
+from typing import Dict, List
+from enum import Enum
+from .expense import ExpenseResponse
+from .upi_transaction import UPITransactionResponse
+
+
+class SearchSort(str, Enum):
+    """Search result ordering"""
+    DATE = "date"
+    AMOUNT = "amount"
+    RELEVANCE = "relevance"
+
+
+class FacetCount(BaseModel):
+    """Number of matches for one facet value"""
+    value: str
+    count: int
+
+
+class ExpenseSearchResult(BaseModel):
+    """Paginated expense search result with facet counts"""
+    items: List[ExpenseResponse]
+    total: int
+    counts_capped: bool = False  # Total and facets counted over the first 10,000 matches only
+    page: int
+    page_size: int
+    facets: Dict[str, List[FacetCount]]
+
+
+class UPISearchResult(BaseModel):
+    """Paginated UPI transaction search result with facet counts"""
+    items: List[UPITransactionResponse]
+    total: int
+    counts_capped: bool = False  # Total and facets counted over the first 10,000 matches only
+    page: int
+    page_size: int
+    facets: Dict[str, List[FacetCount]]
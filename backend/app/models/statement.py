@@ -0,0 +1,66 @@
+"""
+Monthly statement model and schemas
+"""
+from pydantic import BaseModel
+from typing import Dict, List
+from datetime import date, datetime
+
+
+class StatementEMIPayment(BaseModel):
+    """EMI instalment falling in the statement month"""
+    loan_name: str
+    payment_date: date
+    amount: float
+
+
+class StatementPayee(BaseModel):
+    """Payee ranked by UPI spend in the statement month"""
+    payee_name: str
+    payee_upi: str
+    count: int
+    total: float
+
+
+class StatementUPIActivity(BaseModel):
+    """UPI activity in the statement month"""
+    transaction_count: int
+    total_by_status: Dict[str, float]
+    top_payees: List[StatementPayee]
+
+
+class StatementNetWorth(BaseModel):
+    """
+    Net worth as of when the statement was generated
+    
+    Balances have no history, so these are the figures at as_of, not at
+    the end of the statement month; a statement generated late (after a
+    missed month-close run) shows later balances.
+    """
+    as_of: datetime
+    currency: str
+    total_balance: float
+    total_assets: float
+    total_liabilities: float
+    net_worth: float
+
+
+class MonthlyStatement(BaseModel):
+    """Monthly statement"""
+    user_id: str
+    year: int
+    month: int
+    total_spending: float
+    spending_by_category: Dict[str, float]
+    emi_payments: List[StatementEMIPayment]
+    total_emi: float
+    upi: StatementUPIActivity
+    net_worth: StatementNetWorth
+    generated_at: datetime
+
+
+class StatementSummary(BaseModel):
+    """Stored statement listed without its body"""
+    year: int
+    month: int
+    generated_at: datetime
+    size: int  # Compressed size in bytes
@@ -2,9 +2,11 @@
 UPI Transaction model and schemas
 """
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime
 from enum import Enum
+from .expense import ExpenseCategory
+from ..utils.money import Money
 
 
 class TransactionStatus(str, Enum):
@@ -19,8 +21,9 @@ class UPITransactionBase(BaseModel):
     transaction_id: str = Field(..., min_length=5, max_length=100)
     payee_name: str = Field(..., min_length=2, max_length=100)
     payee_upi: str = Field(..., min_length=5, max_length=100)
-    amount: float = Field(..., gt=0)
+    amount: Money = Field(..., gt=0)
     status: TransactionStatus = Field(default=TransactionStatus.SUCCESS)
+    category: Optional[ExpenseCategory] = None  # Auto-categorized when omitted
 
 
 class UPITransactionCreate(UPITransactionBase):
@@ -32,8 +35,41 @@ class UPITransactionResponse(UPITransactionBase):
     """UPI transaction response schema"""
     id: str = Field(..., alias="_id")
     user_id: str
+    linked_expense_id: Optional[str] = None  # Linked expense, set by reconciliation
     timestamp: datetime
     created_at: datetime
     
     class Config:
         populate_by_name = True
+
+
+class UPIBatchResult(BaseModel):
+    """Outcome of a batch ingest"""
+    received: int  # Transactions in the request
+    unique: int  # After collapsing duplicate transaction IDs
+    inserted: int
+    existing: int  # Already stored, left unchanged
+    inserted_ids: List[str] = []
+
+
+class PayeeSort(str, Enum):
+    """Payee leaderboard ordering"""
+    AMOUNT = "amount"
+    COUNT = "count"
+
+
+class PayeeStats(BaseModel):
+    """Successful payments to one payee"""
+    payee_upi: str
+    payee_name: str  # Name on the latest payment
+    total: Money
+    count: int
+    last_paid_at: datetime
+
+
+class TopPayees(BaseModel):
+    """Top payees of a user, all time or over whole months"""
+    sort: PayeeSort
+    start: Optional[date] = None  # First month included
+    end: Optional[date] = None  # First month excluded
+    payees: List[PayeeStats]
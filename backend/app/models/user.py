@@ -11,6 +11,7 @@ class UserBase(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
     email: EmailStr
     phone: str = Field(..., pattern=r'^\+?[1-9]\d{9,14}$')  # International phone format
+    base_currency: str = Field(default="INR", pattern=r'^[A-Z]{3}$')  # Totals are reported in this currency
 
 
 class UserCreate(UserBase):
@@ -18,6 +19,11 @@ class UserCreate(UserBase):
     password: str = Field(..., min_length=6)
 
 
+class UserCurrencyUpdate(BaseModel):
+    """Base currency update schema"""
+    base_currency: str = Field(..., pattern=r'^[A-Z]{3}$')
+
+
 class UserLogin(BaseModel):
     """User login schema"""
     email: EmailStr
@@ -43,5 +49,18 @@ class UserInDB(UserBase):
 class Token(BaseModel):
     """JWT token response"""
     access_token: str
+    refresh_token: str
     token_type: str = "bearer"
     user: UserResponse
+
+
+class RefreshRequest(BaseModel):
+    """Refresh token exchange and logout schema"""
+    refresh_token: str
+
+
+class RefreshedToken(BaseModel):
+    """Tokens issued by a refresh"""
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
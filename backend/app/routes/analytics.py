@@ -1,10 +1,20 @@
 """
 Analytics routes
 """
-from fastapi import APIRouter, Depends
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from datetime import date, datetime
+from typing import Dict, Any, List, Optional
+from ..models.analytics import Granularity, PeriodAnalytics, PeriodGroupBy, SpendingHeatmap
+from ..models.anomaly import CategorySpendingStats, SpendingAnomaly
+from ..models.forecast import CashFlowForecast
 from ..services.analytics_service import AnalyticsService
-from ..utils.security import get_current_user_id
+from ..services.anomaly_service import SpendingAnomalyService
+from ..services.dashboard_stream_service import DashboardStream
+from ..services.forecast_service import ForecastService
+from ..services.heatmap_service import SpendingHeatmapService, heatmap_window
+from ..utils.etag import check_not_modified
+from ..utils.security import get_current_user_id, get_stream_user_id
 
 router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
 
@@ -14,3 +24,81 @@ async def get_dashboard(user_id: str = Depends(get_current_user_id)):
     """Get complete dashboard summary"""
     service = AnalyticsService()
     return await service.get_dashboard_summary(user_id)
+
+
+@router.get("/periods", response_model=PeriodAnalytics)
+async def get_period_analytics(
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    granularity: Granularity = Granularity.MONTH,
+    group_by: Optional[PeriodGroupBy] = None,
+    timezone: str = Query("UTC", max_length=64),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Get spending in [from, to) by day, week, month, quarter or financial year"""
+    service = AnalyticsService()
+    return await service.get_period_analytics(user_id, start, end, granularity, group_by, timezone)
+
+
+@router.get("/heatmap", response_model=SpendingHeatmap)
+async def get_spending_heatmap(
+    request: Request,
+    response: Response,
+    start: Optional[date] = None,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Get daily spending for the 12 months from start (default: ending this month)"""
+    # The default window moves every month without any expense changing
+    start, _ = heatmap_window(start)
+    not_modified = await check_not_modified(request, response, user_id, "expenses", start.isoformat())
+    if not_modified:
+        return not_modified
+    
+    service = SpendingHeatmapService()
+    return await service.get_heatmap(user_id, start)
+
+
+@router.get("/dashboard/stream")
+async def stream_dashboard(request: Request, user_id: str = Depends(get_stream_user_id)):
+    """Stream the dashboard summary followed by live updates (server-sent events)"""
+    stream = DashboardStream(user_id)
+    return StreamingResponse(
+        stream.events(request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/forecast", response_model=CashFlowForecast)
+async def get_cash_flow_forecast(
+    days: int = Query(90, ge=1, le=365),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Get projected daily balances from recurring expenses, EMIs and goals"""
+    service = ForecastService()
+    return await service.get_forecast(user_id, days)
+
+
+@router.post("/forecast/rebuild")
+async def rebuild_forecast_model(user_id: str = Depends(get_current_user_id)):
+    """Rebuild the recurring expense model from full expense history"""
+    service = ForecastService()
+    patterns = await service.rebuild_patterns(user_id)
+    return {"patterns": patterns}
+
+
+@router.get("/anomalies", response_model=List[SpendingAnomaly])
+async def get_spending_anomalies(
+    limit: int = Query(50, ge=1, le=200),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Get recent expenses that were unusually large for their category"""
+    service = SpendingAnomalyService()
+    return await service.get_anomalies(user_id, limit)
+
+
+@router.get("/spending-stats", response_model=List[CategorySpendingStats])
+async def get_spending_stats(user_id: str = Depends(get_current_user_id)):
+    """Get the running per-category statistics expenses are scored against"""
+    service = SpendingAnomalyService()
+    return await service.get_stats(user_id)
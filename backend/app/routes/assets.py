@@ -2,10 +2,12 @@
 Asset routes
 """
 from fastapi import APIRouter, Depends
-from typing import List
+from typing import List, Optional
 from ..models.asset import AssetCreate, AssetUpdate, AssetResponse
 from ..services.asset_service import AssetService
 from ..utils.security import get_current_user_id
+from ..utils.fields import FieldSelection, get_fields
+from ..utils.idempotency import get_idempotency_key, run_idempotent
 
 router = APIRouter(prefix="/api/assets", tags=["Assets"])
 
@@ -13,28 +15,36 @@ router = APIRouter(prefix="/api/assets", tags=["Assets"])
 @router.post("/", response_model=AssetResponse, status_code=201)
 async def create_asset(
     asset_data: AssetCreate,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
 ):
     """Create a new asset"""
     service = AssetService()
-    return await service.create_asset(user_id, asset_data)
+    return await run_idempotent(
+        user_id, idempotency_key, "assets.create", asset_data,
+        lambda: service.create_asset(user_id, asset_data)
+    )
 
 
 @router.get("/", response_model=List[AssetResponse])
-async def get_assets(user_id: str = Depends(get_current_user_id)):
+async def get_assets(
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
+):
     """Get all assets"""
     service = AssetService()
-    return await service.get_assets(user_id)
+    return fields.render(await service.get_assets(user_id, fields))
 
 
 @router.get("/{asset_id}", response_model=AssetResponse)
 async def get_asset(
     asset_id: str,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
 ):
     """Get specific asset"""
     service = AssetService()
-    return await service.get_asset_by_id(user_id, asset_id)
+    return fields.render(await service.get_asset_by_id(user_id, asset_id, fields))
 
 
 @router.put("/{asset_id}", response_model=AssetResponse)
@@ -2,8 +2,11 @@
 Authentication routes
 """
 from fastapi import APIRouter, Depends, HTTPException
-from ..models.user import UserCreate, UserLogin, Token, UserResponse
+from ..models.user import (
+    UserCreate, UserCurrencyUpdate, UserLogin, Token, UserResponse, RefreshRequest, RefreshedToken
+)
 from ..services.auth_service import AuthService
+from ..services.session_service import SessionService
 from ..utils.security import get_current_user_id
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
@@ -23,8 +26,39 @@ async def login(login_data: UserLogin):
     return await auth_service.login_user(login_data)
 
 
+@router.post("/refresh", response_model=RefreshedToken)
+async def refresh(refresh_data: RefreshRequest):
+    """Exchange a refresh token for a new access token (the refresh token is rotated)"""
+    auth_service = AuthService()
+    return await auth_service.refresh(refresh_data.refresh_token)
+
+
+@router.post("/logout")
+async def logout(refresh_data: RefreshRequest):
+    """End the session of a refresh token"""
+    await SessionService().revoke(refresh_data.refresh_token)
+    return {"message": "Logged out successfully"}
+
+
+@router.delete("/sessions")
+async def logout_everywhere(user_id: str = Depends(get_current_user_id)):
+    """End every session of the current user; access tokens lapse within minutes"""
+    revoked = await SessionService().revoke_all(user_id)
+    return {"message": "Logged out of all sessions", "revoked": revoked}
+
+
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(user_id: str = Depends(get_current_user_id)):
     """Get current authenticated user"""
     auth_service = AuthService()
     return await auth_service.get_user_by_id(user_id)
+
+
+@router.put("/me/currency", response_model=UserResponse)
+async def update_base_currency(
+    currency_update: UserCurrencyUpdate,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Change the currency totals are reported in"""
+    auth_service = AuthService()
+    return await auth_service.update_base_currency(user_id, currency_update.base_currency)
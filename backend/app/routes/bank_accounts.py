@@ -2,10 +2,12 @@
 Bank account routes
 """
 from fastapi import APIRouter, Depends
-from typing import List
-from ..models.bank_account import BankAccountCreate, BankAccountUpdate, BankAccountResponse
+from typing import List, Optional
+from ..models.bank_account import BankAccountCreate, BankAccountUpdate, BankAccountResponse, BalanceSummary
 from ..services.bank_account_service import BankAccountService
 from ..utils.security import get_current_user_id
+from ..utils.fields import FieldSelection, get_fields
+from ..utils.idempotency import get_idempotency_key, run_idempotent
 
 router = APIRouter(prefix="/api/bank-accounts", tags=["Bank Accounts"])
 
@@ -13,36 +15,43 @@ router = APIRouter(prefix="/api/bank-accounts", tags=["Bank Accounts"])
 @router.post("/", response_model=BankAccountResponse, status_code=201)
 async def create_account(
     account_data: BankAccountCreate,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
 ):
     """Create a new bank account"""
     service = BankAccountService()
-    return await service.create_account(user_id, account_data)
+    return await run_idempotent(
+        user_id, idempotency_key, "bank_accounts.create", account_data,
+        lambda: service.create_account(user_id, account_data)
+    )
 
 
 @router.get("/", response_model=List[BankAccountResponse])
-async def get_accounts(user_id: str = Depends(get_current_user_id)):
+async def get_accounts(
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
+):
     """Get all bank accounts"""
     service = BankAccountService()
-    return await service.get_accounts(user_id)
+    return fields.render(await service.get_accounts(user_id, fields))
 
 
-@router.get("/total-balance")
+@router.get("/total-balance", response_model=BalanceSummary)
 async def get_total_balance(user_id: str = Depends(get_current_user_id)):
-    """Get total balance across all accounts"""
+    """Get balances per currency and their total in the user's base currency"""
     service = BankAccountService()
-    total = await service.get_total_balance(user_id)
-    return {"total_balance": total}
+    return await service.get_total_balance(user_id)
 
 
 @router.get("/{account_id}", response_model=BankAccountResponse)
 async def get_account(
     account_id: str,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
 ):
     """Get specific bank account"""
     service = BankAccountService()
-    return await service.get_account_by_id(user_id, account_id)
+    return fields.render(await service.get_account_by_id(user_id, account_id, fields))
 
 
 @router.put("/{account_id}", response_model=BankAccountResponse)
@@ -0,0 +1,25 @@
+"""
+Batch request routes
+"""
+from fastapi import APIRouter, Depends, Request
+from ..models.batch import BatchRequest, BatchResponse
+from ..services.batch_service import BatchService
+from ..utils.security import get_current_user_id
+
+router = APIRouter(prefix="/api/batch", tags=["Batch"])
+
+
+@router.post("/", response_model=BatchResponse)
+async def execute_batch(
+    batch: BatchRequest,
+    request: Request,
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Fetch several resources in one round trip
+    
+    Each sub-request is a GET path of an existing endpoint and is answered
+    with the status and body that endpoint would return on its own.
+    """
+    service = BatchService(request.app, request.scope, user_id)
+    return await service.execute(batch.requests)
@@ -0,0 +1,70 @@
+"""
+Budget routes
+"""
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from ..models.budget import BudgetCreate, BudgetUpdate, BudgetResponse, BudgetStatus
+from ..services.budget_service import BudgetService
+from ..utils.security import get_current_user_id
+from ..utils.fields import FieldSelection, get_fields
+from ..utils.idempotency import get_idempotency_key, run_idempotent
+
+router = APIRouter(prefix="/api/budgets", tags=["Budgets"])
+
+
+@router.post("/", response_model=BudgetResponse, status_code=201)
+async def create_budget(
+    budget_data: BudgetCreate,
+    user_id: str = Depends(get_current_user_id),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
+):
+    """Create a monthly budget for a category"""
+    service = BudgetService()
+    return await run_idempotent(
+        user_id, idempotency_key, "budgets.create", budget_data,
+        lambda: service.create_budget(user_id, budget_data)
+    )
+
+
+@router.get("/", response_model=List[BudgetResponse])
+async def get_budgets(
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
+):
+    """Get all budgets"""
+    service = BudgetService()
+    return fields.render(await service.get_budgets(user_id, fields))
+
+
+@router.get("/status", response_model=List[BudgetStatus])
+async def get_budget_status(
+    month: Optional[int] = Query(None, ge=1, le=12),
+    year: Optional[int] = Query(None, ge=2000),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Get spending against every budget, defaulting to the current month"""
+    now = datetime.utcnow()
+    service = BudgetService()
+    return await service.get_budget_status(user_id, month or now.month, year or now.year)
+
+
+@router.put("/{budget_id}", response_model=BudgetResponse)
+async def update_budget(
+    budget_id: str,
+    budget_update: BudgetUpdate,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Update budget"""
+    service = BudgetService()
+    return await service.update_budget(user_id, budget_id, budget_update)
+
+
+@router.delete("/{budget_id}")
+async def delete_budget(
+    budget_id: str,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Delete budget"""
+    service = BudgetService()
+    return await service.delete_budget(user_id, budget_id)
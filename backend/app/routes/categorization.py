@@ -0,0 +1,70 @@
+"""
+Auto-categorization routes
+"""
+from fastapi import APIRouter, Depends
+from typing import List, Optional
+from ..models.category_rule import (
+    CategoryRuleCreate, CategoryRuleResponse, ClassifyRequest, ClassifyResponse, RecategorizeJob
+)
+from ..services.categorization_service import CategorizationService
+from ..utils.money import paise_or_none
+from ..utils.security import get_current_user_id
+from ..utils.idempotency import get_idempotency_key, run_idempotent
+
+router = APIRouter(prefix="/api/categorization", tags=["Categorization"])
+
+
+@router.post("/rules", response_model=CategoryRuleResponse, status_code=201)
+async def create_rule(
+    rule_data: CategoryRuleCreate,
+    user_id: str = Depends(get_current_user_id),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
+):
+    """Create a categorization rule"""
+    service = CategorizationService()
+    return await run_idempotent(
+        user_id, idempotency_key, "categorization_rules.create", rule_data,
+        lambda: service.create_rule(user_id, rule_data)
+    )
+
+
+@router.get("/rules", response_model=List[CategoryRuleResponse])
+async def get_rules(user_id: str = Depends(get_current_user_id)):
+    """Get all categorization rules"""
+    service = CategorizationService()
+    return await service.get_rules(user_id)
+
+
+@router.delete("/rules/{rule_id}")
+async def delete_rule(
+    rule_id: str,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Delete a categorization rule"""
+    service = CategorizationService()
+    return await service.delete_rule(user_id, rule_id)
+
+
+@router.post("/classify", response_model=ClassifyResponse)
+async def classify(
+    request: ClassifyRequest,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Preview the category the rules assign to a payment"""
+    service = CategorizationService()
+    category, matched_rule = await service.classify(
+        user_id, request.description, request.payee_name, request.payee_upi, paise_or_none(request.amount)
+    )
+    return ClassifyResponse(category=category, matched_rule=matched_rule)
+
+
+@router.post("/recategorize", response_model=RecategorizeJob, status_code=202)
+async def recategorize(user_id: str = Depends(get_current_user_id)):
+    """
+    Start re-applying the current rules to all auto-categorized history
+    
+    The counts of changed expenses and transactions are the result of
+    the returned job.
+    """
+    service = CategorizationService()
+    return RecategorizeJob(job_id=await service.enqueue_recategorization(user_id))
@@ -0,0 +1,150 @@
+"""
+Chat and support messaging routes
+"""
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from typing import Optional
+from ..config import settings
+from ..models.chat import (
+    ChatMessageCreate, ChatMessageResponse, ChatHistoryPage, ChatConversationPage, ChatUnreadCount
+)
+from ..services.chat_service import ChatService, SUPPORT_CHANNEL, chat_events
+from ..utils.security import decode_access_token, get_current_user_id, get_support_user_id
+
+router = APIRouter(prefix="/api/chat", tags=["Chat"])
+
+
+@router.post("/messages", response_model=ChatMessageResponse, status_code=201)
+async def send_message(
+    message_data: ChatMessageCreate,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Send a message to support"""
+    service = ChatService()
+    return await service.send_user_message(user_id, message_data.message)
+
+
+@router.get("/messages", response_model=ChatHistoryPage)
+async def get_messages(
+    before: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Get chat history, newest first; pass next_cursor as before for older messages"""
+    service = ChatService()
+    return await service.get_history(user_id, before, limit)
+
+
+@router.get("/unread", response_model=ChatUnreadCount)
+async def get_unread_count(user_id: str = Depends(get_current_user_id)):
+    """Get the number of unread support replies"""
+    service = ChatService()
+    return await service.get_unread_count(user_id)
+
+
+@router.post("/read", response_model=ChatUnreadCount)
+async def mark_read(user_id: str = Depends(get_current_user_id)):
+    """Mark all support replies as read"""
+    service = ChatService()
+    return await service.mark_read_by_user(user_id)
+
+
+@router.get("/support/conversations", response_model=ChatConversationPage)
+async def get_conversations(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    awaiting_only: bool = False,
+    support_id: str = Depends(get_support_user_id)
+):
+    """Get the support inbox, most recently active conversations first"""
+    service = ChatService()
+    return await service.get_conversations(cursor, limit, awaiting_only)
+
+
+@router.get("/support/unread", response_model=ChatUnreadCount)
+async def get_support_unread_count(support_id: str = Depends(get_support_user_id)):
+    """Get the number of user messages support has not read"""
+    service = ChatService()
+    return await service.get_support_unread_count()
+
+
+@router.get("/support/conversations/{user_id}/messages", response_model=ChatHistoryPage)
+async def get_conversation_messages(
+    user_id: str,
+    before: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    support_id: str = Depends(get_support_user_id)
+):
+    """Get the chat history of a user"""
+    service = ChatService()
+    return await service.get_history(user_id, before, limit)
+
+
+@router.post("/support/conversations/{user_id}/messages", response_model=ChatMessageResponse, status_code=201)
+async def send_support_message(
+    user_id: str,
+    message_data: ChatMessageCreate,
+    support_id: str = Depends(get_support_user_id)
+):
+    """Reply to a user"""
+    service = ChatService()
+    return await service.send_support_message(user_id, message_data.message)
+
+
+@router.post("/support/conversations/{user_id}/read", response_model=ChatUnreadCount)
+async def mark_conversation_read(user_id: str, support_id: str = Depends(get_support_user_id)):
+    """Mark a user's messages as read; returns the remaining inbox unread count"""
+    service = ChatService()
+    return await service.mark_read_by_support(user_id)
+
+
+async def _push(websocket: WebSocket, channel: str):
+    """Forward chat events of a channel to a WebSocket until it closes"""
+    await websocket.accept()
+    async with chat_events.subscribe(channel) as queue:
+        # Incoming frames are only read to notice the client disconnecting
+        receiver = asyncio.create_task(websocket.receive_text())
+        # Kept until it yields an event, so none is lost to a client frame
+        getter = asyncio.create_task(queue.get())
+        try:
+            while True:
+                done, _ = await asyncio.wait({receiver, getter}, return_when=asyncio.FIRST_COMPLETED)
+                if receiver in done:
+                    receiver.result()
+                    receiver = asyncio.create_task(websocket.receive_text())
+                if getter in done:
+                    await websocket.send_json(getter.result())
+                    getter = asyncio.create_task(queue.get())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            receiver.cancel()
+            getter.cancel()
+
+
+def _websocket_user_id(token: str) -> Optional[str]:
+    """User ID from a token passed on the WebSocket URL, None when invalid"""
+    try:
+        return decode_access_token(token).get("sub")
+    except HTTPException:
+        return None
+
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket, token: str = Query(...)):
+    """Push new support replies and read receipts to the user"""
+    user_id = _websocket_user_id(token)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await _push(websocket, user_id)
+
+
+@router.websocket("/support/ws")
+async def support_socket(websocket: WebSocket, token: str = Query(...)):
+    """Push new messages from all users to the support inbox"""
+    user_id = _websocket_user_id(token)
+    if user_id is None or user_id not in settings.SUPPORT_USER_IDS:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await _push(websocket, SUPPORT_CHANNEL)
@@ -1,11 +1,14 @@
 """
 EMI routes
 """
-from fastapi import APIRouter, Depends, Query
-from typing import List
+from fastapi import APIRouter, Depends, Query, Request, Response
+from typing import List, Optional
 from ..models.emi import EMICreate, EMIUpdate, EMIResponse, EMIPaymentSchedule
 from ..services.emi_service import EMIService
 from ..utils.security import get_current_user_id
+from ..utils.fields import FieldSelection, get_fields
+from ..utils.idempotency import get_idempotency_key, run_idempotent
+from ..utils.etag import check_not_modified
 
 router = APIRouter(prefix="/api/emis", tags=["EMIs"])
 
@@ -13,46 +16,68 @@ router = APIRouter(prefix="/api/emis", tags=["EMIs"])
 @router.post("/", response_model=EMIResponse, status_code=201)
 async def create_emi(
     emi_data: EMICreate,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
 ):
     """Create a new EMI"""
     service = EMIService()
-    return await service.create_emi(user_id, emi_data)
+    return await run_idempotent(
+        user_id, idempotency_key, "emis.create", emi_data,
+        lambda: service.create_emi(user_id, emi_data)
+    )
 
 
 @router.get("/", response_model=List[EMIResponse])
-async def get_emis(user_id: str = Depends(get_current_user_id)):
+async def get_emis(
+    request: Request,
+    response: Response,
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
+):
     """Get all EMIs"""
+    not_modified = await check_not_modified(request, response, user_id, "emis")
+    if not_modified:
+        return not_modified
+    
     service = EMIService()
-    return await service.get_emis(user_id)
+    return fields.render(await service.get_emis(user_id, fields))
 
 
 @router.get("/upcoming", response_model=List[EMIResponse])
 async def get_upcoming_payments(
     days: int = Query(7, ge=1, le=30),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
 ):
     """Get EMIs with payments due in next N days"""
     service = EMIService()
-    return await service.get_upcoming_payments(user_id, days)
+    return fields.render(await service.get_upcoming_payments(user_id, days, fields))
 
 
 @router.get("/{emi_id}", response_model=EMIResponse)
 async def get_emi(
     emi_id: str,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
 ):
     """Get specific EMI"""
     service = EMIService()
-    return await service.get_emi_by_id(user_id, emi_id)
+    return fields.render(await service.get_emi_by_id(user_id, emi_id, fields))
 
 
 @router.get("/{emi_id}/schedule", response_model=List[EMIPaymentSchedule])
 async def get_payment_schedule(
     emi_id: str,
+    request: Request,
+    response: Response,
     user_id: str = Depends(get_current_user_id)
 ):
     """Get payment schedule for an EMI"""
+    # The schedule is derived from the EMI alone
+    not_modified = await check_not_modified(request, response, user_id, "emis")
+    if not_modified:
+        return not_modified
+    
     service = EMIService()
     return await service.get_payment_schedule(user_id, emi_id)
 
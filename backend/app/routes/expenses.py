@@ -1,47 +1,63 @@
 """
 Expense routes
 """
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from typing import List, Optional
 from ..models.expense import ExpenseCreate, ExpenseUpdate, ExpenseResponse
+from ..models.budget import ExpenseBudgetResponse
 from ..services.expense_service import ExpenseService
 from ..utils.security import get_current_user_id
+from ..utils.fields import FieldSelection, get_fields
+from ..utils.idempotency import get_idempotency_key, run_idempotent
+from ..utils.etag import check_not_modified
 
 router = APIRouter(prefix="/api/expenses", tags=["Expenses"])
 
 
-@router.post("/", response_model=ExpenseResponse, status_code=201)
+@router.post("/", response_model=ExpenseBudgetResponse, status_code=201)
 async def create_expense(
     expense_data: ExpenseCreate,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
 ):
     """Create a new expense"""
     service = ExpenseService()
-    return await service.create_expense(user_id, expense_data)
+    return await run_idempotent(
+        user_id, idempotency_key, "expenses.create", expense_data,
+        lambda: service.create_expense(user_id, expense_data)
+    )
 
 
 @router.get("/", response_model=List[ExpenseResponse])
 async def get_expenses(
+    request: Request,
+    response: Response,
     month: Optional[int] = Query(None, ge=1, le=12),
     year: Optional[int] = Query(None, ge=2000),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
 ):
     """Get all expenses, optionally filtered by month/year"""
+    not_modified = await check_not_modified(request, response, user_id, "expenses")
+    if not_modified:
+        return not_modified
+    
     service = ExpenseService()
-    return await service.get_expenses(user_id, month, year)
+    return fields.render(await service.get_expenses(user_id, month, year, fields))
 
 
 @router.get("/{expense_id}", response_model=ExpenseResponse)
 async def get_expense(
     expense_id: str,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
 ):
     """Get specific expense"""
     service = ExpenseService()
-    return await service.get_expense_by_id(user_id, expense_id)
+    return fields.render(await service.get_expense_by_id(user_id, expense_id, fields))
 
 
-@router.put("/{expense_id}", response_model=ExpenseResponse)
+@router.put("/{expense_id}", response_model=ExpenseBudgetResponse)
 async def update_expense(
     expense_id: str,
     expense_update: ExpenseUpdate,
@@ -2,10 +2,14 @@
 Financial goal routes
 """
 from fastapi import APIRouter, Depends
-from typing import List
-from ..models.financial_goal import FinancialGoalCreate, FinancialGoalUpdate, FinancialGoalResponse
+from typing import List, Optional
+from ..models.financial_goal import (
+    FinancialGoalCreate, FinancialGoalUpdate, FinancialGoalResponse, GoalProjection
+)
 from ..services.goal_service import FinancialGoalService
 from ..utils.security import get_current_user_id
+from ..utils.fields import FieldSelection, get_fields
+from ..utils.idempotency import get_idempotency_key, run_idempotent
 
 router = APIRouter(prefix="/api/goals", tags=["Financial Goals"])
 
@@ -13,28 +17,43 @@ router = APIRouter(prefix="/api/goals", tags=["Financial Goals"])
 @router.post("/", response_model=FinancialGoalResponse, status_code=201)
 async def create_goal(
     goal_data: FinancialGoalCreate,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
 ):
     """Create a new financial goal"""
     service = FinancialGoalService()
-    return await service.create_goal(user_id, goal_data)
+    return await run_idempotent(
+        user_id, idempotency_key, "goals.create", goal_data,
+        lambda: service.create_goal(user_id, goal_data)
+    )
 
 
 @router.get("/", response_model=List[FinancialGoalResponse])
-async def get_goals(user_id: str = Depends(get_current_user_id)):
+async def get_goals(
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
+):
     """Get all financial goals"""
     service = FinancialGoalService()
-    return await service.get_goals(user_id)
+    return fields.render(await service.get_goals(user_id, fields))
+
+
+@router.get("/projections", response_model=List[GoalProjection])
+async def get_goal_projections(user_id: str = Depends(get_current_user_id)):
+    """Get projected completion dates and required monthly savings for all goals"""
+    service = FinancialGoalService()
+    return await service.get_projections(user_id)
 
 
 @router.get("/{goal_id}", response_model=FinancialGoalResponse)
 async def get_goal(
     goal_id: str,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
 ):
     """Get specific financial goal"""
     service = FinancialGoalService()
-    return await service.get_goal_by_id(user_id, goal_id)
+    return fields.render(await service.get_goal_by_id(user_id, goal_id, fields))
 
 
 @router.put("/{goal_id}", response_model=FinancialGoalResponse)
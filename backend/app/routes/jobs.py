@@ -0,0 +1,23 @@
+"""
+Background job routes
+"""
+from fastapi import APIRouter, Depends
+from ..models.job import JobResponse, JobQueueStats
+from ..services.job_service import JobQueue
+from ..utils.security import get_current_user_id, get_support_user_id
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+
+
+@router.get("/stats", response_model=JobQueueStats)
+async def get_queue_stats(support_id: str = Depends(get_support_user_id)):
+    """Get per-queue depth, throughput and lag for monitoring"""
+    job_queue = JobQueue()
+    return await job_queue.get_stats()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, user_id: str = Depends(get_current_user_id)):
+    """Get the status of a job started by the current user"""
+    job_queue = JobQueue()
+    return await job_queue.get_job(job_id, user_id)
@@ -2,10 +2,12 @@
 Liability routes
 """
 from fastapi import APIRouter, Depends
-from typing import List
+from typing import List, Optional
 from ..models.liability import LiabilityCreate, LiabilityUpdate, LiabilityResponse
 from ..services.liability_service import LiabilityService
 from ..utils.security import get_current_user_id
+from ..utils.fields import FieldSelection, get_fields
+from ..utils.idempotency import get_idempotency_key, run_idempotent
 
 router = APIRouter(prefix="/api/liabilities", tags=["Liabilities"])
 
@@ -13,28 +15,36 @@ router = APIRouter(prefix="/api/liabilities", tags=["Liabilities"])
 @router.post("/", response_model=LiabilityResponse, status_code=201)
 async def create_liability(
     liability_data: LiabilityCreate,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
 ):
     """Create a new liability"""
     service = LiabilityService()
-    return await service.create_liability(user_id, liability_data)
+    return await run_idempotent(
+        user_id, idempotency_key, "liabilities.create", liability_data,
+        lambda: service.create_liability(user_id, liability_data)
+    )
 
 
 @router.get("/", response_model=List[LiabilityResponse])
-async def get_liabilities(user_id: str = Depends(get_current_user_id)):
+async def get_liabilities(
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
+):
     """Get all liabilities"""
     service = LiabilityService()
-    return await service.get_liabilities(user_id)
+    return fields.render(await service.get_liabilities(user_id, fields))
 
 
 @router.get("/{liability_id}", response_model=LiabilityResponse)
 async def get_liability(
     liability_id: str,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
 ):
     """Get specific liability"""
     service = LiabilityService()
-    return await service.get_liability_by_id(user_id, liability_id)
+    return fields.render(await service.get_liability_by_id(user_id, liability_id, fields))
 
 
 @router.put("/{liability_id}", response_model=LiabilityResponse)
@@ -0,0 +1,43 @@
+"""
+UPI reconciliation routes
+"""
+from fastapi import APIRouter, Depends
+from ..models.reconciliation import ReconciliationResult, UnmatchedItems, LinkRequest
+from ..services.reconciliation_service import ReconciliationService
+from ..utils.security import get_current_user_id
+
+router = APIRouter(prefix="/api/reconciliation", tags=["Reconciliation"])
+
+
+@router.post("/run", response_model=ReconciliationResult)
+async def run_reconciliation(user_id: str = Depends(get_current_user_id)):
+    """Match all unlinked UPI transactions against UPI expenses"""
+    service = ReconciliationService()
+    return await service.reconcile_user(user_id)
+
+
+@router.get("/unmatched", response_model=UnmatchedItems)
+async def get_unmatched(user_id: str = Depends(get_current_user_id)):
+    """Get UPI transactions and UPI expenses without a counterpart"""
+    service = ReconciliationService()
+    return await service.get_unmatched(user_id)
+
+
+@router.post("/link")
+async def link_transaction(
+    link_request: LinkRequest,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Manually link a UPI transaction to an expense"""
+    service = ReconciliationService()
+    return await service.link(user_id, link_request.transaction_id, link_request.expense_id)
+
+
+@router.delete("/link/{transaction_id}")
+async def unlink_transaction(
+    transaction_id: str,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Remove the link of a UPI transaction"""
+    service = ReconciliationService()
+    return await service.unlink_transaction(user_id, transaction_id)
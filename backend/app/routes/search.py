@@ -0,0 +1,61 @@
+"""
+Search routes
+"""
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from ..models.expense import ExpenseCategory, PaymentMethod
+from ..models.upi_transaction import TransactionStatus
+from ..models.search import SearchSort, ExpenseSearchResult, UPISearchResult
+from ..services.search_service import SearchService
+from ..utils.security import get_current_user_id
+
+router = APIRouter(prefix="/api/search", tags=["Search"])
+
+
+@router.get("/expenses", response_model=ExpenseSearchResult)
+async def search_expenses(
+    q: Optional[str] = Query(None, min_length=1, max_length=200),
+    category: Optional[List[ExpenseCategory]] = Query(None),
+    payment_method: Optional[List[PaymentMethod]] = Query(None),
+    min_amount: Optional[float] = Query(None, ge=0),
+    max_amount: Optional[float] = Query(None, ge=0),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    sort: SearchSort = SearchSort.DATE,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Search expenses with category and payment method facets"""
+    service = SearchService()
+    return await service.search_expenses(
+        user_id, q, category, payment_method, min_amount, max_amount,
+        start_date, end_date, sort, page, page_size
+    )
+
+
+@router.get("/upi", response_model=UPISearchResult)
+async def search_upi_transactions(
+    q: Optional[str] = Query(
+        None, min_length=1, max_length=200,
+        description="Words to find in the payee name, UPI ID or transaction ID. With "
+                    "UPI_STORAGE=buckets, q is matched as one case-insensitive substring "
+                    "and relevance sort falls back to date"
+    ),
+    status: Optional[List[TransactionStatus]] = Query(None),
+    min_amount: Optional[float] = Query(None, ge=0),
+    max_amount: Optional[float] = Query(None, ge=0),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    sort: SearchSort = SearchSort.DATE,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Search UPI transactions with status facets"""
+    service = SearchService()
+    return await service.search_upi_transactions(
+        user_id, q, status, min_amount, max_amount,
+        start_date, end_date, sort, page, page_size
+    )
@@ -0,0 +1,43 @@
+"""
+Monthly statement routes
+"""
+import gzip
+from fastapi import APIRouter, Depends, Path, Request, Response
+from typing import List
+from ..models.statement import StatementSummary
+from ..services.statement_service import StatementService
+from ..utils.security import get_current_user_id
+
+router = APIRouter(prefix="/api/statements", tags=["Statements"])
+
+
+@router.get("/", response_model=List[StatementSummary])
+async def get_statements(user_id: str = Depends(get_current_user_id)):
+    """List generated monthly statements"""
+    service = StatementService()
+    return await service.get_statements(user_id)
+
+
+@router.get("/{year}/{month}")
+async def get_statement(
+    request: Request,
+    year: int = Path(..., ge=2000),
+    month: int = Path(..., ge=1, le=12),
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Get the statement of a month
+    
+    Stored statements are sent as-is with gzip content encoding when the
+    client accepts it.
+    """
+    service = StatementService()
+    body, _ = await service.get_statement(user_id, year, month)
+    
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+        )
+    return Response(content=gzip.decompress(body), media_type="application/json")
@@ -1,11 +1,18 @@
 """
 UPI transaction routes
 """
-from fastapi import APIRouter, Depends
-from typing import List
-from ..models.upi_transaction import UPITransactionCreate, UPITransactionResponse
+from fastapi import APIRouter, Body, Depends, Query, Request, Response
+from typing import List, Optional
+from datetime import date
+from ..models.upi_transaction import (
+    PayeeSort, TopPayees, UPITransactionCreate, UPITransactionResponse, UPIBatchResult
+)
+from ..services.payee_service import PayeeStatsService
 from ..services.upi_service import UPITransactionService
 from ..utils.security import get_current_user_id
+from ..utils.fields import FieldSelection, get_fields
+from ..utils.idempotency import get_idempotency_key, run_idempotent
+from ..utils.etag import check_not_modified
 
 router = APIRouter(prefix="/api/upi", tags=["UPI Transactions"])
 
@@ -13,28 +20,77 @@ router = APIRouter(prefix="/api/upi", tags=["UPI Transactions"])
 @router.post("/", response_model=UPITransactionResponse, status_code=201)
 async def create_transaction(
     transaction_data: UPITransactionCreate,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
 ):
     """Create a new UPI transaction"""
     service = UPITransactionService()
-    return await service.create_transaction(user_id, transaction_data)
+    return await run_idempotent(
+        user_id, idempotency_key, "upi.create", transaction_data,
+        lambda: service.create_transaction(user_id, transaction_data)
+    )
+
+
+@router.post("/batch", response_model=UPIBatchResult)
+async def create_transactions(
+    transactions: List[UPITransactionCreate] = Body(..., min_length=1, max_length=500),
+    user_id: str = Depends(get_current_user_id),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
+):
+    """Ingest a batch of UPI transactions, skipping ones already recorded"""
+    service = UPITransactionService()
+    return await run_idempotent(
+        user_id, idempotency_key, "upi.batch", transactions,
+        lambda: service.create_transactions(user_id, transactions)
+    )
 
 
 @router.get("/", response_model=List[UPITransactionResponse])
-async def get_transactions(user_id: str = Depends(get_current_user_id)):
-    """Get all UPI transactions"""
+async def get_transactions(
+    request: Request,
+    response: Response,
+    month: Optional[int] = Query(None, ge=1, le=12),
+    year: Optional[int] = Query(None, ge=2000),
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
+):
+    """Get all UPI transactions, optionally filtered by month/year"""
+    not_modified = await check_not_modified(request, response, user_id, "upi_transactions")
+    if not_modified:
+        return not_modified
+    
     service = UPITransactionService()
-    return await service.get_transactions(user_id)
+    return fields.render(await service.get_transactions(user_id, month, year, fields))
+
+
+@router.get("/payees/top", response_model=TopPayees)
+async def get_top_payees(
+    request: Request,
+    response: Response,
+    sort: PayeeSort = PayeeSort.AMOUNT,
+    limit: int = Query(10, ge=1, le=50),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Get the payees paid the most, by amount or number of payments, all time or over whole months"""
+    not_modified = await check_not_modified(request, response, user_id, "upi_transactions")
+    if not_modified:
+        return not_modified
+    
+    service = PayeeStatsService()
+    return await service.get_top_payees(user_id, sort, limit, start, end)
 
 
 @router.get("/{transaction_id}", response_model=UPITransactionResponse)
 async def get_transaction(
     transaction_id: str,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    fields: FieldSelection = Depends(get_fields)
 ):
     """Get specific UPI transaction"""
     service = UPITransactionService()
-    return await service.get_transaction_by_id(user_id, transaction_id)
+    return fields.render(await service.get_transaction_by_id(user_id, transaction_id, fields))
 
 
 @router.delete("/{transaction_id}")
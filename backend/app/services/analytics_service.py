@@ -1,10 +1,59 @@
 """
 Analytics service for financial insights
 """
-from datetime import datetime, date, timedelta
-from typing import Dict, List, Any
+from datetime import datetime, date, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from bson import ObjectId
+from fastapi import HTTPException, status
+from typing import Dict, List, Any, Optional, Tuple
 from ..database import get_database
+from ..models.analytics import Granularity, PeriodAnalytics, PeriodBucket, PeriodGroupBy
+from ..models.bank_account import BalanceSummary, CurrencyBalance
 from ..models.expense import ExpenseCategory
+from ..utils.fx import get_fx_table
+from ..utils.money import to_rupees
+from .rollup_service import SpendingRollupService
+
+# Spending rollups are bucketed by UTC calendar month
+ROLLUP_TIMEZONES = {"UTC", "Etc/UTC"}
+ROLLUP_GRANULARITIES = {Granularity.MONTH, Granularity.QUARTER, Granularity.FISCAL_YEAR}
+
+# The Indian financial year starts in April
+FISCAL_YEAR_START_MONTH = 4
+
+
+def _to_utc(value: datetime, zone: ZoneInfo) -> datetime:
+    """Naive UTC datetime, as stored, of a bound given in a timezone"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=zone)
+    return value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+
+
+def _month_period(year: int, month: int, granularity: Granularity) -> date:
+    """Start of the period a whole month belongs to"""
+    if granularity == Granularity.QUARTER:
+        return date(year, (month - 1) // 3 * 3 + 1, 1)
+    if granularity == Granularity.FISCAL_YEAR:
+        return date(year if month >= FISCAL_YEAR_START_MONTH else year - 1, FISCAL_YEAR_START_MONTH, 1)
+    return date(year, month, 1)
+
+
+def _period_expression(granularity: Granularity, timezone: str) -> Dict[str, Any]:
+    """Expression truncating an expense date to the start of its period"""
+    if granularity == Granularity.WEEK:
+        return {"$dateTrunc": {"date": "$date", "unit": "week", "timezone": timezone, "startOfWeek": "monday"}}
+    if granularity != Granularity.FISCAL_YEAR:
+        return {"$dateTrunc": {"date": "$date", "unit": granularity.value, "timezone": timezone}}
+    
+    # Shift April to January, truncate to the year and shift back
+    shift = FISCAL_YEAR_START_MONTH - 1
+    shifted = {"$dateSubtract": {"startDate": "$date", "unit": "month", "amount": shift, "timezone": timezone}}
+    return {"$dateAdd": {
+        "startDate": {"$dateTrunc": {"date": shifted, "unit": "year", "timezone": timezone}},
+        "unit": "month",
+        "amount": shift,
+        "timezone": timezone
+    }}
 
 
 class AnalyticsService:
@@ -37,7 +86,7 @@ class AnalyticsService:
         ]
         
         result = await self.db.expenses.aggregate(pipeline).to_list(length=1)
-        return result[0]["total"] if result else 0
+        return to_rupees(result[0]["total"] if result else 0)
     
     async def get_category_breakdown(self, user_id: str, month: int, year: int) -> Dict[str, float]:
         """Get spending by category for a month"""
@@ -63,7 +112,7 @@ class AnalyticsService:
         ]
         
         result = await self.db.expenses.aggregate(pipeline).to_list(length=None)
-        return {item["_id"]: item["total"] for item in result}
+        return {item["_id"]: to_rupees(item["total"]) for item in result}
     
     async def get_spending_trend(self, user_id: str, months: int = 6) -> List[Dict[str, Any]]:
         """Get spending trend for last N months"""
@@ -86,22 +135,62 @@ class AnalyticsService:
         
         return list(reversed(trends))
     
-    async def get_total_balances(self, user_id: str) -> float:
-        """Get total balance across all bank accounts"""
+    async def get_base_currency(self, user_id: str) -> str:
+        """Get the currency a user's totals are reported in"""
+        user = await self.db.users.find_one({"_id": ObjectId(user_id)}, {"base_currency": 1})
+        return (user or {}).get("base_currency", "INR")
+    
+    async def get_balances_by_currency(self, user_id: str) -> Dict[str, float]:
+        """Get total bank balance held in each currency"""
         pipeline = [
             {
                 "$match": {"user_id": user_id}
             },
             {
                 "$group": {
-                    "_id": None,
+                    "_id": {"$ifNull": ["$currency", "INR"]},
                     "total": {"$sum": "$balance"}
                 }
             }
         ]
         
-        result = await self.db.bank_accounts.aggregate(pipeline).to_list(length=1)
-        return result[0]["total"] if result else 0
+        result = await self.db.bank_accounts.aggregate(pipeline).to_list(length=None)
+        return {item["_id"]: to_rupees(item["total"]) for item in result}
+    
+    async def get_balance_summary(self, user_id: str, base_currency: Optional[str] = None) -> BalanceSummary:
+        """
+        Get balances per currency and their total in the base currency
+        
+        Balances are grouped by currency in the database and each group is
+        converted once afterwards.
+        """
+        base_currency = base_currency or await self.get_base_currency(user_id)
+        fx = get_fx_table()
+        totals = await self.get_balances_by_currency(user_id)
+        total, missing = fx.convert_totals(totals, base_currency)
+        
+        by_currency = []
+        for currency, balance in sorted(totals.items()):
+            rate = fx.rate(currency, base_currency)
+            by_currency.append(CurrencyBalance(
+                currency=currency,
+                balance=balance,
+                rate=rate,
+                converted=round(balance * rate, 2) if rate is not None else None
+            ))
+        
+        return BalanceSummary(
+            base_currency=base_currency,
+            total_balance=total,
+            by_currency=by_currency,
+            unconverted_currencies=missing,
+            fx_version=fx.version
+        )
+    
+    async def get_total_balances(self, user_id: str, base_currency: Optional[str] = None) -> float:
+        """Get total balance across all bank accounts in the base currency"""
+        summary = await self.get_balance_summary(user_id, base_currency)
+        return summary.total_balance
     
     async def get_total_assets(self, user_id: str) -> float:
         """Get total value of all assets"""
@@ -118,7 +207,7 @@ class AnalyticsService:
         ]
         
         result = await self.db.assets.aggregate(pipeline).to_list(length=1)
-        return result[0]["total"] if result else 0
+        return to_rupees(result[0]["total"] if result else 0)
     
     async def get_total_liabilities(self, user_id: str) -> float:
         """Get total liabilities"""
@@ -138,11 +227,10 @@ class AnalyticsService:
         ]
         
         result = await self.db.liabilities.aggregate(pipeline).to_list(length=1)
-        return result[0]["total"] if result else 0
+        return to_rupees(result[0]["total"] if result else 0)
     
-    async def get_emi_burden_percentage(self, user_id: str) -> float:
-        """Calculate EMI burden as percentage of monthly spending"""
-        # Get total EMI amount
+    async def get_total_emi(self, user_id: str) -> float:
+        """Get total monthly amount of active EMIs"""
         pipeline = [
             {
                 "$match": {
@@ -159,7 +247,11 @@ class AnalyticsService:
         ]
         
         result = await self.db.emis.aggregate(pipeline).to_list(length=1)
-        total_emi = result[0]["total"] if result else 0
+        return to_rupees(result[0]["total"] if result else 0)
+    
+    async def get_emi_burden_percentage(self, user_id: str) -> float:
+        """Calculate EMI burden as percentage of monthly spending"""
+        total_emi = await self.get_total_emi(user_id)
         
         # Get current month spending
         now = datetime.now()
@@ -184,8 +276,12 @@ class AnalyticsService:
         """Get complete dashboard summary"""
         now = datetime.now()
         
+        balances = await self.get_balance_summary(user_id)
+        
         return {
-            "total_balance": await self.get_total_balances(user_id),
+            "base_currency": balances.base_currency,
+            "total_balance": balances.total_balance,
+            "balances_by_currency": {item.currency: item.balance for item in balances.by_currency},
             "total_assets": await self.get_total_assets(user_id),
             "total_liabilities": await self.get_total_liabilities(user_id),
             "monthly_spending": await self.get_monthly_spending(user_id, now.month, now.year),
@@ -194,3 +290,104 @@ class AnalyticsService:
             "emi_burden_percentage": await self.get_emi_burden_percentage(user_id),
             "asset_liability_ratio": await self.get_asset_liability_ratio(user_id)
         }
+    
+    async def get_period_analytics(self, user_id: str, start: datetime, end: datetime,
+                                   granularity: Granularity, group_by: Optional[PeriodGroupBy] = None,
+                                   timezone: str = "UTC") -> PeriodAnalytics:
+        """
+        Get spending in [start, end) bucketed by period
+        
+        Naive bounds are read in the given timezone, which also decides
+        where periods start. Whole UTC months are answered from the spending
+        rollups when the buckets are unions of months and the grouping is
+        one the rollups keep; expenses are then only read for the partial
+        months at either edge. Everything else is one $dateTrunc pipeline.
+        """
+        try:
+            zone = ZoneInfo(timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown timezone: {timezone}"
+            )
+        
+        start_utc, end_utc = _to_utc(start, zone), _to_utc(end, zone)
+        if end_utc <= start_utc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Range end must be after its start"
+            )
+        
+        # (period start, group) -> [total paise, count]
+        buckets: Dict[Tuple[date, Optional[str]], List[int]] = {}
+        raw_ranges = [(start_utc, end_utc)]
+        rollup_months = 0
+        
+        use_rollups = (
+            timezone in ROLLUP_TIMEZONES
+            and granularity in ROLLUP_GRANULARITIES
+            and group_by in (None, PeriodGroupBy.CATEGORY)
+        )
+        if use_rollups:
+            first = datetime(start_utc.year, start_utc.month, 1)
+            if first < start_utc:
+                first = datetime(first.year + first.month // 12, first.month % 12 + 1, 1)
+            last = datetime(end_utc.year, end_utc.month, 1)
+            
+            if first < last:
+                raw_ranges = [(start_utc, first), (last, end_utc)]
+                rollup_months = (last.year - first.year) * 12 + last.month - first.month
+                rollups = await SpendingRollupService().get_months(
+                    user_id, (first.year, first.month), (last.year, last.month)
+                )
+                for rollup in rollups:
+                    key = (
+                        _month_period(rollup["year"], rollup["month"], granularity),
+                        rollup["category"] if group_by else None
+                    )
+                    bucket = buckets.setdefault(key, [0, 0])
+                    bucket[0] += rollup["total"]
+                    bucket[1] += rollup.get("count", 0)
+        
+        raw_ranges = [(low, high) for low, high in raw_ranges if low < high]
+        if raw_ranges:
+            pipeline = [
+                {
+                    "$match": {
+                        "user_id": user_id,
+                        "$or": [{"date": {"$gte": low, "$lt": high}} for low, high in raw_ranges]
+                    }
+                },
+                {
+                    "$group": {
+                        "_id": {
+                            "period": _period_expression(granularity, zone.key),
+                            "group": f"${group_by.value}" if group_by else None
+                        },
+                        "total": {"$sum": "$amount"},
+                        "count": {"$sum": 1}
+                    }
+                }
+            ]
+            async for item in self.db.expenses.aggregate(pipeline):
+                period = item["_id"]["period"].replace(tzinfo=dt_timezone.utc).astimezone(zone).date()
+                bucket = buckets.setdefault((period, item["_id"]["group"]), [0, 0])
+                bucket[0] += item["total"]
+                bucket[1] += item["count"]
+        
+        return PeriodAnalytics(
+            start=start,
+            end=end,
+            granularity=granularity,
+            group_by=group_by,
+            timezone=zone.key,
+            total=to_rupees(sum(total for total, _ in buckets.values())),
+            buckets=[
+                PeriodBucket(period_start=period, group=group, total=to_rupees(total), count=count)
+                for (period, group), (total, count) in sorted(
+                    buckets.items(), key=lambda item: (item[0][0], item[0][1] or "")
+                )
+                if count
+            ],
+            rollup_months=rollup_months
+        )
@@ -0,0 +1,241 @@
+"""
+Spending anomaly detection from running per-category statistics
+
+Count, mean and the sum of squared deviations (M2) of each user's expense
+amounts per category are kept with Welford's algorithm, updated by every
+expense write. A new expense is scored against the statistics from before
+it was added, in the same round trip that adds it, so detection never
+reads expense history. Amounts are paise; mean and M2 are floats.
+"""
+import math
+from datetime import datetime
+from bson import ObjectId
+from typing import Any, Dict, List, Optional
+from pymongo import DESCENDING, ReturnDocument
+from ..config import settings
+from ..database import get_database
+from ..models.anomaly import CategorySpendingStats, SpendingAnomaly
+from ..utils.money import from_storage, to_rupees
+from ..utils.rebuild import replace_rebuilt
+from ..utils.whatsapp import whatsapp_service
+
+
+def _category(expense: Dict[str, Any]) -> str:
+    return getattr(expense["category"], "value", expense["category"])
+
+
+def _add_amount(amount: int, now: datetime) -> List[Dict[str, Any]]:
+    """Pipeline update adding an amount to the statistics"""
+    count, mean = {"$ifNull": ["$count", 0]}, {"$ifNull": ["$mean", 0.0]}
+    new_count = {"$add": [count, 1]}
+    new_mean = {"$add": [mean, {"$divide": [{"$subtract": [amount, mean]}, new_count]}]}
+    # Expressions in one $set stage all see the document before the update
+    return [{"$set": {
+        "count": new_count,
+        "mean": new_mean,
+        "m2": {"$add": [
+            {"$ifNull": ["$m2", 0.0]},
+            {"$multiply": [{"$subtract": [amount, mean]}, {"$subtract": [amount, new_mean]}]}
+        ]},
+        "updated_at": now
+    }}]
+
+
+def _remove_amount(amount: int, now: datetime) -> List[Dict[str, Any]]:
+    """Pipeline update taking an amount back out of the statistics"""
+    new_count = {"$subtract": ["$count", 1]}
+    new_mean = {"$divide": [{"$subtract": [{"$multiply": ["$count", "$mean"]}, amount]}, new_count]}
+    return [{"$set": {
+        "count": new_count,
+        "mean": {"$cond": [{"$gt": [new_count, 0]}, new_mean, 0.0]},
+        # Clamped: float drift must not leave a negative variance
+        "m2": {"$cond": [
+            {"$gt": [new_count, 0]},
+            {"$max": [
+                {"$subtract": [
+                    "$m2",
+                    {"$multiply": [{"$subtract": [amount, new_mean]}, {"$subtract": [amount, "$mean"]}]}
+                ]},
+                0.0
+            ]},
+            0.0
+        ]},
+        "updated_at": now
+    }}]
+
+
+def _std_dev(stats: Dict[str, Any]) -> float:
+    """Sample standard deviation in paise"""
+    return math.sqrt(stats["m2"] / (stats["count"] - 1)) if stats["count"] > 1 else 0.0
+
+
+class SpendingAnomalyService:
+    """Per user, per category spending statistics and anomaly scoring"""
+    
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.spending_stats
+        self.state = self.db.spending_stats_state
+        self.anomalies = self.db.spending_anomalies
+    
+    def score(self, stats: Optional[Dict[str, Any]], amount: int) -> Optional[float]:
+        """
+        Z-score of an amount against category statistics
+        
+        None until the category has ANOMALY_MIN_SAMPLES expenses with some
+        spread, since a few identical amounts say nothing about variance.
+        """
+        if not stats or stats["count"] < settings.ANOMALY_MIN_SAMPLES:
+            return None
+        std_dev = _std_dev(stats)
+        if std_dev == 0:
+            return None
+        return (amount - stats["mean"]) / std_dev
+    
+    async def apply_expense_change(self, user_id: str, previous: Optional[Dict[str, Any]],
+                                   current: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Apply an expense insert, update or delete to the statistics
+        
+        Args:
+            previous: Expense before the write (None for inserts)
+            current: Expense after the write (None for deletes)
+        
+        Returns:
+            The anomaly recorded for the expense after the write, if any
+        """
+        if previous and current and (
+            (_category(previous), previous["amount"]) == (_category(current), current["amount"])
+        ):
+            return None
+        
+        if previous:
+            await self.anomalies.delete_one({"user_id": user_id, "expense_id": str(previous["_id"])})
+        
+        if not await self.state.find_one({"user_id": user_id}, {"_id": 1}):
+            # First write since statistics were introduced: the rebuild
+            # already includes this write, which is left unscored
+            await self.rebuild(user_id)
+            return None
+        
+        now = datetime.utcnow()
+        if previous:
+            await self.collection.update_one(
+                {"user_id": user_id, "category": _category(previous), "count": {"$gt": 0}},
+                _remove_amount(previous["amount"], now)
+            )
+        if not current:
+            return None
+        
+        # The document before the update holds the statistics to score against
+        stats = await self.collection.find_one_and_update(
+            {"user_id": user_id, "category": _category(current)},
+            _add_amount(current["amount"], now),
+            projection={"count": 1, "mean": 1, "m2": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        
+        z_score = self.score(stats, current["amount"])
+        if z_score is None or z_score < settings.ANOMALY_Z_SCORE:
+            return None
+        
+        anomaly = {
+            "user_id": user_id,
+            "expense_id": str(current["_id"]),
+            "category": _category(current),
+            "description": current["description"],
+            "amount": current["amount"],
+            "date": current["date"],
+            "mean": stats["mean"],
+            "std_dev": _std_dev(stats),
+            "z_score": round(z_score, 2),
+            "detected_at": now
+        }
+        result = await self.anomalies.insert_one(anomaly)
+        anomaly["_id"] = str(result.inserted_id)
+        
+        if settings.ANOMALY_ALERTS:
+            await self._queue_alert(user_id, anomaly)
+        
+        return anomaly
+    
+    async def get_anomalies(self, user_id: str, limit: int = 50) -> List[SpendingAnomaly]:
+        """Get the most recently detected anomalies"""
+        cursor = self.anomalies.find({"user_id": user_id}).sort("detected_at", DESCENDING).limit(limit)
+        
+        anomalies = []
+        async for anomaly in cursor:
+            anomaly["_id"] = str(anomaly["_id"])
+            anomalies.append(SpendingAnomaly(**from_storage(anomaly, SpendingAnomaly)))
+        
+        return anomalies
+    
+    async def get_stats(self, user_id: str) -> List[CategorySpendingStats]:
+        """Get the running statistics of every category with expenses"""
+        if not await self.state.find_one({"user_id": user_id}, {"_id": 1}):
+            await self.rebuild(user_id)
+        
+        cursor = self.collection.find({"user_id": user_id, "count": {"$gt": 0}}).sort("category", 1)
+        return [
+            CategorySpendingStats(
+                category=stats["category"],
+                count=stats["count"],
+                mean=to_rupees(stats["mean"]),
+                std_dev=to_rupees(_std_dev(stats))
+            )
+            async for stats in cursor
+        ]
+    
+    async def rebuild(self, user_id: str) -> int:
+        """Rebuild a user's statistics from expense history"""
+        pipeline = [
+            {"$match": {"user_id": user_id}},
+            {
+                "$group": {
+                    "_id": "$category",
+                    "count": {"$sum": 1},
+                    "total": {"$sum": "$amount"},
+                    "squares": {"$sum": {"$multiply": ["$amount", "$amount"]}}
+                }
+            }
+        ]
+        
+        # Integer sums keep M2 = sum(x²) - sum(x)²/n exact until the division
+        now = datetime.utcnow()
+        stats = [
+            {
+                "user_id": user_id,
+                "category": item["_id"],
+                "count": item["count"],
+                "mean": item["total"] / item["count"],
+                "m2": max(item["squares"] - item["total"] ** 2 / item["count"], 0.0),
+                "updated_at": now
+            }
+            async for item in self.db.expenses.aggregate(pipeline)
+        ]
+        
+        await replace_rebuilt(self.collection, user_id, stats, ("category",))
+        
+        await self.state.update_one(
+            {"user_id": user_id},
+            {"$set": {"built_at": now}},
+            upsert=True
+        )
+        return len(stats)
+    
+    async def _queue_alert(self, user_id: str, anomaly: Dict[str, Any]) -> None:
+        """Send an anomaly alert in the background without delaying the response"""
+        user = await self.db.users.find_one({"_id": ObjectId(user_id)}, {"name": 1, "phone": 1})
+        if not user:
+            return
+        
+        whatsapp_service.send_in_background(
+            whatsapp_service.send_spending_alert,
+            user["name"],
+            user["phone"],
+            anomaly["category"],
+            anomaly["description"],
+            to_rupees(anomaly["amount"]),
+            to_rupees(anomaly["mean"])
+        )
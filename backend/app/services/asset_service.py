@@ -3,10 +3,14 @@ Asset service
 """
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 from fastapi import HTTPException, status
 from typing import List
 from ..models.asset import AssetCreate, AssetUpdate, AssetResponse
 from ..database import get_database
+from ..utils.fields import ALL_FIELDS, FieldSelection
+from ..utils.money import from_storage, to_storage
+from .dashboard_stream_service import publish_change
 
 
 class AssetService:
@@ -18,33 +22,36 @@ class AssetService:
     
     async def create_asset(self, user_id: str, asset_data: AssetCreate) -> AssetResponse:
         """Create a new asset"""
-        asset_dict = asset_data.dict()
+        asset_dict = to_storage(asset_data.dict(), AssetCreate)
         asset_dict["user_id"] = user_id
         asset_dict["created_at"] = datetime.utcnow()
         asset_dict["updated_at"] = datetime.utcnow()
         
         result = await self.collection.insert_one(asset_dict)
         asset_dict["_id"] = str(result.inserted_id)
+        publish_change(user_id, "assets", None, asset_dict)
         
-        return AssetResponse(**asset_dict, id=str(result.inserted_id))
+        return AssetResponse(**from_storage(asset_dict, AssetResponse), id=str(result.inserted_id))
     
-    async def get_assets(self, user_id: str) -> List[AssetResponse]:
+    async def get_assets(self, user_id: str, fields: FieldSelection = ALL_FIELDS) -> List[AssetResponse]:
         """Get all assets for a user"""
         assets = []
-        cursor = self.collection.find({"user_id": user_id})
+        model = fields.model(AssetResponse)
+        cursor = self.collection.find({"user_id": user_id}, fields.projection(AssetResponse))
         
         async for asset in cursor:
             asset["_id"] = str(asset["_id"])
-            assets.append(AssetResponse(**asset, id=asset["_id"]))
+            assets.append(model(**from_storage(asset, AssetResponse), id=asset["_id"]))
         
         return assets
     
-    async def get_asset_by_id(self, user_id: str, asset_id: str) -> AssetResponse:
+    async def get_asset_by_id(self, user_id: str, asset_id: str,
+                              fields: FieldSelection = ALL_FIELDS) -> AssetResponse:
         """Get specific asset"""
         asset = await self.collection.find_one({
             "_id": ObjectId(asset_id),
             "user_id": user_id
-        })
+        }, fields.projection(AssetResponse))
         
         if not asset:
             raise HTTPException(
@@ -52,39 +59,47 @@ class AssetService:
                 detail="Asset not found"
             )
         
-        return AssetResponse(**asset, id=str(asset["_id"]))
+        asset["_id"] = str(asset["_id"])
+        
+        return fields.model(AssetResponse)(**from_storage(asset, AssetResponse), id=asset["_id"])
     
     async def update_asset(self, user_id: str, asset_id: str, 
                          asset_update: AssetUpdate) -> AssetResponse:
         """Update asset"""
-        update_data = {k: v for k, v in asset_update.dict().items() if v is not None}
+        update_data = to_storage(
+            {k: v for k, v in asset_update.dict().items() if v is not None}, AssetUpdate
+        )
         update_data["updated_at"] = datetime.utcnow()
         
-        result = await self.collection.find_one_and_update(
+        previous = await self.collection.find_one_and_update(
             {"_id": ObjectId(asset_id), "user_id": user_id},
             {"$set": update_data},
-            return_document=True
+            return_document=ReturnDocument.BEFORE
         )
         
-        if not result:
+        if not previous:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Asset not found"
             )
         
-        return AssetResponse(**result, id=str(result["_id"]))
+        result = {**previous, **update_data}
+        publish_change(user_id, "assets", previous, result)
+        
+        return AssetResponse(**from_storage(result, AssetResponse), id=str(result["_id"]))
     
     async def delete_asset(self, user_id: str, asset_id: str) -> dict:
         """Delete asset"""
-        result = await self.collection.delete_one({
+        deleted = await self.collection.find_one_and_delete({
             "_id": ObjectId(asset_id),
             "user_id": user_id
         })
         
-        if result.deleted_count == 0:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Asset not found"
             )
         
+        publish_change(user_id, "assets", deleted, None)
         return {"message": "Asset deleted successfully"}
@@ -4,9 +4,11 @@ Authentication service
 from datetime import datetime, timedelta
 from bson import ObjectId
 from fastapi import HTTPException, status
-from ..models.user import UserCreate, UserInDB, UserLogin, Token, UserResponse
+from ..models.user import UserCreate, UserInDB, UserLogin, Token, UserResponse, RefreshedToken
 from ..utils.security import hash_password, verify_password, create_access_token
+from ..utils.fx import get_fx_table
 from ..database import get_database
+from .session_service import SessionService
 
 
 class AuthService:
@@ -26,6 +28,12 @@ class AuthService:
                 detail="Email already registered"
             )
         
+        if not get_fx_table().supports(user_data.base_currency):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported currency: {user_data.base_currency}"
+            )
+        
         # Create user document
         user_dict = user_data.dict()
         user_dict["hashed_password"] = hash_password(user_dict.pop("password"))
@@ -36,8 +44,9 @@ class AuthService:
         result = await self.collection.insert_one(user_dict)
         user_dict["_id"] = str(result.inserted_id)
         
-        # Create access token
+        # Create access token and session
         access_token = create_access_token({"sub": str(result.inserted_id)})
+        refresh_token = await SessionService().create_session(str(result.inserted_id))
         
         # Create user response
         user_response = UserResponse(
@@ -45,10 +54,11 @@ class AuthService:
             name=user_data.name,
             email=user_data.email,
             phone=user_data.phone,
+            base_currency=user_data.base_currency,
             created_at=user_dict["created_at"]
         )
         
-        return Token(access_token=access_token, user=user_response)
+        return Token(access_token=access_token, refresh_token=refresh_token, user=user_response)
     
     async def login_user(self, login_data: UserLogin) -> Token:
         """Login user"""
@@ -67,8 +77,9 @@ class AuthService:
                 detail="Invalid email or password"
             )
         
-        # Create access token
+        # Create access token and session
         access_token = create_access_token({"sub": str(user["_id"])})
+        refresh_token = await SessionService().create_session(str(user["_id"]))
         
         # Create user response
         user_response = UserResponse(
@@ -76,10 +87,25 @@ class AuthService:
             name=user["name"],
             email=user["email"],
             phone=user["phone"],
+            base_currency=user.get("base_currency", "INR"),
             created_at=user["created_at"]
         )
         
-        return Token(access_token=access_token, user=user_response)
+        return Token(access_token=access_token, refresh_token=refresh_token, user=user_response)
+    
+    async def refresh(self, refresh_token: str) -> RefreshedToken:
+        """
+        Issue a new access token from a refresh token
+        
+        Only the session is checked, so staying signed in costs one indexed
+        update instead of a bcrypt password check.
+        """
+        user_id, new_refresh_token = await SessionService().rotate(refresh_token)
+        
+        return RefreshedToken(
+            access_token=create_access_token({"sub": user_id}),
+            refresh_token=new_refresh_token
+        )
     
     async def get_user_by_id(self, user_id: str) -> UserResponse:
         """Get user by ID"""
@@ -95,5 +121,26 @@ class AuthService:
             name=user["name"],
             email=user["email"],
             phone=user["phone"],
+            base_currency=user.get("base_currency", "INR"),
             created_at=user["created_at"]
         )
+    
+    async def update_base_currency(self, user_id: str, base_currency: str) -> UserResponse:
+        """Change the currency totals are reported in"""
+        if not get_fx_table().supports(base_currency):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported currency: {base_currency}"
+            )
+        
+        result = await self.collection.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"base_currency": base_currency, "updated_at": datetime.utcnow()}}
+        )
+        if result.matched_count == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        return await self.get_user_by_id(user_id)
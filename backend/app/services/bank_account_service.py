@@ -3,10 +3,16 @@ Bank account service
 """
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 from fastapi import HTTPException, status
 from typing import List
-from ..models.bank_account import BankAccountCreate, BankAccountUpdate, BankAccountResponse
+from ..models.bank_account import BankAccountCreate, BankAccountUpdate, BankAccountResponse, BalanceSummary
 from ..database import get_database
+from ..utils.fields import ALL_FIELDS, FieldSelection
+from ..utils.money import from_storage, to_storage
+from ..utils.fx import get_fx_table
+from .analytics_service import AnalyticsService
+from .dashboard_stream_service import publish_change
 
 
 class BankAccountService:
@@ -18,33 +24,45 @@ class BankAccountService:
     
     async def create_account(self, user_id: str, account_data: BankAccountCreate) -> BankAccountResponse:
         """Create a new bank account"""
-        account_dict = account_data.dict()
+        if not get_fx_table().supports(account_data.currency):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported currency: {account_data.currency}"
+            )
+        
+        account_dict = to_storage(account_data.dict(), BankAccountCreate)
         account_dict["user_id"] = user_id
         account_dict["created_at"] = datetime.utcnow()
         account_dict["updated_at"] = datetime.utcnow()
         
         result = await self.collection.insert_one(account_dict)
         account_dict["_id"] = str(result.inserted_id)
+        publish_change(user_id, "bank_accounts", None, account_dict)
         
-        return BankAccountResponse(**account_dict, id=str(result.inserted_id))
+        return BankAccountResponse(
+            **from_storage(account_dict, BankAccountResponse), id=str(result.inserted_id)
+        )
     
-    async def get_accounts(self, user_id: str) -> List[BankAccountResponse]:
+    async def get_accounts(self, user_id: str,
+                           fields: FieldSelection = ALL_FIELDS) -> List[BankAccountResponse]:
         """Get all bank accounts for a user"""
         accounts = []
-        cursor = self.collection.find({"user_id": user_id})
+        model = fields.model(BankAccountResponse)
+        cursor = self.collection.find({"user_id": user_id}, fields.projection(BankAccountResponse))
         
         async for account in cursor:
             account["_id"] = str(account["_id"])
-            accounts.append(BankAccountResponse(**account, id=account["_id"]))
+            accounts.append(model(**from_storage(account, BankAccountResponse), id=account["_id"]))
         
         return accounts
     
-    async def get_account_by_id(self, user_id: str, account_id: str) -> BankAccountResponse:
+    async def get_account_by_id(self, user_id: str, account_id: str,
+                                fields: FieldSelection = ALL_FIELDS) -> BankAccountResponse:
         """Get specific bank account"""
         account = await self.collection.find_one({
             "_id": ObjectId(account_id),
             "user_id": user_id
-        })
+        }, fields.projection(BankAccountResponse))
         
         if not account:
             raise HTTPException(
@@ -52,49 +70,53 @@ class BankAccountService:
                 detail="Bank account not found"
             )
         
-        return BankAccountResponse(**account, id=str(account["_id"]))
+        account["_id"] = str(account["_id"])
+        
+        return fields.model(BankAccountResponse)(
+            **from_storage(account, BankAccountResponse), id=account["_id"]
+        )
     
     async def update_account(self, user_id: str, account_id: str, 
                            account_update: BankAccountUpdate) -> BankAccountResponse:
         """Update bank account"""
-        update_data = {k: v for k, v in account_update.dict().items() if v is not None}
+        update_data = to_storage(
+            {k: v for k, v in account_update.dict().items() if v is not None}, BankAccountUpdate
+        )
         update_data["updated_at"] = datetime.utcnow()
         
-        result = await self.collection.find_one_and_update(
+        previous = await self.collection.find_one_and_update(
             {"_id": ObjectId(account_id), "user_id": user_id},
             {"$set": update_data},
-            return_document=True
+            return_document=ReturnDocument.BEFORE
         )
         
-        if not result:
+        if not previous:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Bank account not found"
             )
         
-        return BankAccountResponse(**result, id=str(result["_id"]))
+        result = {**previous, **update_data}
+        publish_change(user_id, "bank_accounts", previous, result)
+        
+        return BankAccountResponse(**from_storage(result, BankAccountResponse), id=str(result["_id"]))
     
     async def delete_account(self, user_id: str, account_id: str) -> dict:
         """Delete bank account"""
-        result = await self.collection.delete_one({
+        deleted = await self.collection.find_one_and_delete({
             "_id": ObjectId(account_id),
             "user_id": user_id
         })
         
-        if result.deleted_count == 0:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Bank account not found"
             )
         
+        publish_change(user_id, "bank_accounts", deleted, None)
         return {"message": "Bank account deleted successfully"}
     
-    async def get_total_balance(self, user_id: str) -> float:
-        """Get total balance across all accounts"""
-        pipeline = [
-            {"$match": {"user_id": user_id}},
-            {"$group": {"_id": None, "total": {"$sum": "$balance"}}}
-        ]
-        
-        result = await self.collection.aggregate(pipeline).to_list(length=1)
-        return result[0]["total"] if result else 0.0
+    async def get_total_balance(self, user_id: str) -> BalanceSummary:
+        """Get balances per currency and their total in the user's base currency"""
+        return await AnalyticsService().get_balance_summary(user_id)
@@ -0,0 +1,127 @@
+"""
+Batch execution of read requests within one HTTP request
+"""
+import asyncio
+import json
+from typing import Any, Dict, List
+from urllib.parse import urlsplit
+from fastapi import status
+from ..models.batch import BatchSubRequest, BatchSubResponse, BatchResponse
+from ..utils.security import BATCH_USER_ID
+
+# Sub-requests still running after this are answered with 504
+SUBREQUEST_TIMEOUT_SECONDS = 15
+
+# Endpoints that never complete (event streams) or would recurse
+_EXCLUDED_SUFFIXES = ("/stream", "/api/batch")
+
+# Response headers passed back to the client
+_FORWARDED_HEADERS = ("etag",)
+
+
+class BatchService:
+    """
+    Run GET sub-requests through the application concurrently
+    
+    Each sub-request goes through the full middleware stack and route, so
+    validation, response models, rate limits and error handling are those
+    of the endpoint itself. The batch authenticates once: sub-requests
+    carry the user ID in their scope instead of decoding the token again.
+    """
+    
+    def __init__(self, app, scope: Dict[str, Any], user_id: str):
+        self.app = app
+        self.scope = scope
+        self.user_id = user_id
+    
+    def _sub_scope(self, path: str, query: str) -> Dict[str, Any]:
+        """ASGI scope of a sub-request, inheriting connection details"""
+        headers = [(name, value) for name, value in self.scope["headers"] if name == b"authorization"]
+        scope = {
+            "type": "http",
+            "asgi": self.scope.get("asgi", {"version": "3.0"}),
+            "http_version": self.scope.get("http_version", "1.1"),
+            "method": "GET",
+            "scheme": self.scope.get("scheme", "http"),
+            "server": self.scope.get("server"),
+            "client": self.scope.get("client"),
+            "root_path": self.scope.get("root_path", ""),
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "headers": headers,
+            BATCH_USER_ID: self.user_id
+        }
+        if "state" in self.scope:
+            scope["state"] = dict(self.scope["state"])
+        return scope
+    
+    async def _execute(self, request: BatchSubRequest) -> BatchSubResponse:
+        """Run one sub-request and capture its response"""
+        parts = urlsplit(request.path)
+        if parts.path.rstrip("/").endswith(_EXCLUDED_SUFFIXES):
+            return BatchSubResponse(
+                id=request.id,
+                status=status.HTTP_400_BAD_REQUEST,
+                body={"detail": "Endpoint cannot be batched"}
+            )
+        
+        response: Dict[str, Any] = {"status": status.HTTP_500_INTERNAL_SERVER_ERROR, "headers": [], "body": []}
+        disconnected = asyncio.Event()
+        received = False
+        
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+        
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+        
+        try:
+            await asyncio.wait_for(
+                self.app(self._sub_scope(parts.path, parts.query), receive, send),
+                SUBREQUEST_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            return BatchSubResponse(
+                id=request.id,
+                status=status.HTTP_504_GATEWAY_TIMEOUT,
+                body={"detail": "Sub-request timed out"}
+            )
+        except Exception as e:
+            # Starlette re-raises after sending the 500 response captured above
+            print(f"⚠️ Batch sub-request {request.path} failed: {e}")
+        finally:
+            disconnected.set()
+        
+        headers = {}
+        content_type = ""
+        for name, value in response["headers"]:
+            name = name.decode("latin-1").lower()
+            if name in _FORWARDED_HEADERS:
+                headers[name] = value.decode("latin-1")
+            elif name == "content-type":
+                content_type = value.decode("latin-1")
+        
+        body = b"".join(response["body"])
+        if not body:
+            payload = None
+        elif content_type.startswith("application/json"):
+            payload = json.loads(body)
+        else:
+            payload = body.decode("utf-8", errors="replace")
+        
+        return BatchSubResponse(id=request.id, status=response["status"], headers=headers, body=payload)
+    
+    async def execute(self, requests: List[BatchSubRequest]) -> BatchResponse:
+        """Run all sub-requests concurrently, keeping their order in the result"""
+        responses = await asyncio.gather(*(self._execute(request) for request in requests))
+        return BatchResponse(responses=list(responses))
@@ -0,0 +1,167 @@
+"""
+Budget service
+"""
+from datetime import datetime
+from bson import ObjectId
+from fastapi import HTTPException, status
+from typing import Any, Dict, List, Optional
+from pymongo.errors import DuplicateKeyError
+from ..models.budget import BudgetCreate, BudgetUpdate, BudgetResponse, BudgetStatus
+from ..database import get_database
+from ..utils.fields import ALL_FIELDS, FieldSelection
+from ..utils.money import from_storage, to_rupees, to_storage
+from ..utils.whatsapp import whatsapp_service
+from .rollup_service import SpendingRollupService, expense_bucket
+
+
+class BudgetService:
+    """Monthly category budget service"""
+    
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.budgets
+        self.rollups = SpendingRollupService()
+    
+    async def create_budget(self, user_id: str, budget_data: BudgetCreate) -> BudgetResponse:
+        """Create a budget for a category"""
+        budget_dict = to_storage(budget_data.dict(), BudgetCreate)
+        budget_dict["user_id"] = user_id
+        budget_dict["created_at"] = datetime.utcnow()
+        budget_dict["updated_at"] = datetime.utcnow()
+        
+        try:
+            result = await self.collection.insert_one(budget_dict)
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Budget already exists for this category"
+            )
+        budget_dict["_id"] = str(result.inserted_id)
+        
+        return BudgetResponse(**from_storage(budget_dict, BudgetResponse))
+    
+    async def get_budgets(self, user_id: str, fields: FieldSelection = ALL_FIELDS) -> List[BudgetResponse]:
+        """Get all budgets for a user"""
+        budgets = []
+        model = fields.model(BudgetResponse)
+        cursor = self.collection.find({"user_id": user_id}, fields.projection(BudgetResponse))
+        
+        async for budget in cursor:
+            budget["_id"] = str(budget["_id"])
+            budgets.append(model(**from_storage(budget, BudgetResponse)))
+        
+        return budgets
+    
+    async def update_budget(self, user_id: str, budget_id: str,
+                            budget_update: BudgetUpdate) -> BudgetResponse:
+        """Update budget"""
+        update_data = to_storage(
+            {k: v for k, v in budget_update.dict().items() if v is not None}, BudgetUpdate
+        )
+        update_data["updated_at"] = datetime.utcnow()
+        
+        result = await self.collection.find_one_and_update(
+            {"_id": ObjectId(budget_id), "user_id": user_id},
+            {"$set": update_data},
+            return_document=True
+        )
+        
+        if not result:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Budget not found"
+            )
+        
+        result["_id"] = str(result["_id"])
+        return BudgetResponse(**from_storage(result, BudgetResponse))
+    
+    async def delete_budget(self, user_id: str, budget_id: str) -> dict:
+        """Delete budget"""
+        result = await self.collection.delete_one({
+            "_id": ObjectId(budget_id),
+            "user_id": user_id
+        })
+        
+        if result.deleted_count == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Budget not found"
+            )
+        
+        return {"message": "Budget deleted successfully"}
+    
+    def _build_status(self, category: str, year: int, month: int, spent: int,
+                      budget: Optional[Dict[str, Any]]) -> BudgetStatus:
+        """Build the status of a category for a month from paise amounts"""
+        if not budget:
+            return BudgetStatus(category=category, month=month, year=year, spent=to_rupees(spent))
+        
+        limit = budget["monthly_limit"]
+        percentage = round(spent / limit * 100, 2)
+        return BudgetStatus(
+            category=category,
+            month=month,
+            year=year,
+            spent=to_rupees(spent),
+            monthly_limit=to_rupees(limit),
+            remaining=to_rupees(limit - spent),
+            percentage_used=percentage,
+            threshold_reached=percentage >= budget["alert_threshold"],
+            exceeded=spent > limit
+        )
+    
+    async def get_budget_status(self, user_id: str, month: int, year: int) -> List[BudgetStatus]:
+        """Get status of every budget for a month from the spending rollups"""
+        spent = await self.rollups.get_month(user_id, year, month)
+        
+        statuses = []
+        async for budget in self.collection.find({"user_id": user_id}):
+            statuses.append(self._build_status(
+                budget["category"], year, month, spent.get(budget["category"], 0), budget
+            ))
+        
+        return statuses
+    
+    async def apply_expense_change(self, user_id: str, previous: Optional[Dict[str, Any]],
+                                   current: Optional[Dict[str, Any]]) -> BudgetStatus:
+        """
+        Update running counters for an expense write and report budget status
+        
+        The status describes the bucket of the expense after the write (or
+        of the deleted expense). Crossing the alert threshold or the limit
+        queues a WhatsApp alert.
+        """
+        touched = await self.rollups.apply_change(user_id, previous, current)
+        
+        year, month, category = expense_bucket(current or previous)
+        spent, delta = touched[(year, month, category)]
+        budget = await self.collection.find_one({"user_id": user_id, "category": category})
+        budget_status = self._build_status(category, year, month, spent, budget)
+        
+        if budget and delta > 0:
+            limit = budget["monthly_limit"]
+            threshold = limit * budget["alert_threshold"] / 100
+            spent_before = spent - delta
+            crossed_limit = spent_before <= limit < spent
+            crossed_threshold = spent_before < threshold <= spent
+            if crossed_limit or crossed_threshold:
+                await self._queue_alert(user_id, budget_status)
+        
+        return budget_status
+    
+    async def _queue_alert(self, user_id: str, budget_status: BudgetStatus) -> None:
+        """Send a budget alert in the background without delaying the response"""
+        user = await self.db.users.find_one({"_id": ObjectId(user_id)}, {"name": 1, "phone": 1})
+        if not user:
+            return
+        
+        whatsapp_service.send_in_background(
+            whatsapp_service.send_budget_alert,
+            user["name"],
+            user["phone"],
+            budget_status.category.value,
+            datetime(budget_status.year, budget_status.month, 1).strftime("%B %Y"),
+            budget_status.spent,
+            budget_status.monthly_limit,
+            budget_status.exceeded
+        )
@@ -0,0 +1,193 @@
+"""
+Rule-based auto-categorization service
+"""
+import time
+from collections import OrderedDict
+from datetime import datetime
+from bson import ObjectId
+from fastapi import HTTPException, status
+from typing import Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from ..models.category_rule import CategoryRuleCreate, CategoryRuleResponse, RecategorizeResult
+from ..models.expense import ExpenseCategory
+from ..database import get_database
+from ..utils.categorizer import CompiledRules, DEFAULT_RULES
+from ..utils.etag import bump_version
+from ..utils.money import from_storage, to_storage
+from .dashboard_stream_service import publish_resync
+from .forecast_service import ForecastService, recurring_key
+from .job_service import JobQueue
+from .anomaly_service import SpendingAnomalyService
+from .rollup_service import SpendingRollupService
+from .upi_store import get_upi_store
+
+# Compiled user rules are reloaded after this long so edits made through
+# another worker process are picked up
+RULE_CACHE_TTL_SECONDS = 300
+
+# Users whose compiled rules are cached; the least recently used are dropped
+RULE_CACHE_MAX_USERS = 10_000
+
+_global_rules = CompiledRules(DEFAULT_RULES)
+_user_rules: "OrderedDict[str, Tuple[float, CompiledRules]]" = OrderedDict()
+
+
+class CategorizationService:
+    """Categorization rule management and classification"""
+    
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.category_rules
+    
+    async def _get_user_rules(self, user_id: str) -> CompiledRules:
+        """Get the compiled rules of a user, compiling them on a cache miss"""
+        cached = _user_rules.get(user_id)
+        if cached and time.monotonic() - cached[0] < RULE_CACHE_TTL_SECONDS:
+            _user_rules.move_to_end(user_id)
+            return cached[1]
+        
+        rules = await self.collection.find(
+            {"user_id": user_id},
+            {"rule_type": 1, "pattern": 1, "min_amount": 1, "max_amount": 1, "category": 1, "priority": 1}
+        ).to_list(length=None)
+        compiled = CompiledRules(rules)
+        _user_rules[user_id] = (time.monotonic(), compiled)
+        _user_rules.move_to_end(user_id)
+        if len(_user_rules) > RULE_CACHE_MAX_USERS:
+            _user_rules.popitem(last=False)
+        return compiled
+    
+    def _invalidate(self, user_id: str) -> None:
+        """Drop the compiled rules of a single user"""
+        _user_rules.pop(user_id, None)
+    
+    def _match(self, user_rules: CompiledRules, description: Optional[str], payee_name: Optional[str],
+               payee_upi: Optional[str], amount: Optional[int]) -> Tuple[ExpenseCategory, Optional[str]]:
+        """Match user rules first, then global rules, falling back to Others"""
+        text = " ".join(part for part in (description, payee_name) if part)
+        
+        rule = user_rules.match(text, payee_upi, amount)
+        if rule:
+            return ExpenseCategory(rule["category"]), "user"
+        
+        rule = _global_rules.match(text, payee_upi, amount)
+        if rule:
+            return ExpenseCategory(rule["category"]), "global"
+        
+        return ExpenseCategory.OTHERS, None
+    
+    async def classify(self, user_id: str, description: Optional[str] = None,
+                       payee_name: Optional[str] = None, payee_upi: Optional[str] = None,
+                       amount: Optional[int] = None) -> Tuple[ExpenseCategory, Optional[str]]:
+        """
+        Classify a payment
+        
+        Args:
+            amount: Payment amount in paise
+        
+        Returns:
+            Tuple of category and the rule set that matched ("user",
+            "global" or None when falling back to Others)
+        """
+        user_rules = await self._get_user_rules(user_id)
+        return self._match(user_rules, description, payee_name, payee_upi, amount)
+    
+    async def create_rule(self, user_id: str, rule_data: CategoryRuleCreate) -> CategoryRuleResponse:
+        """Create a categorization rule"""
+        rule_dict = to_storage(rule_data.dict(), CategoryRuleCreate)
+        rule_dict["user_id"] = user_id
+        rule_dict["created_at"] = datetime.utcnow()
+        
+        result = await self.collection.insert_one(rule_dict)
+        rule_dict["_id"] = str(result.inserted_id)
+        self._invalidate(user_id)
+        
+        return CategoryRuleResponse(**from_storage(rule_dict, CategoryRuleResponse))
+    
+    async def get_rules(self, user_id: str) -> List[CategoryRuleResponse]:
+        """Get all categorization rules of a user"""
+        rules = []
+        cursor = self.collection.find({"user_id": user_id}).sort("priority", -1)
+        
+        async for rule in cursor:
+            rule["_id"] = str(rule["_id"])
+            rules.append(CategoryRuleResponse(**from_storage(rule, CategoryRuleResponse)))
+        
+        return rules
+    
+    async def delete_rule(self, user_id: str, rule_id: str) -> dict:
+        """Delete a categorization rule"""
+        result = await self.collection.delete_one({
+            "_id": ObjectId(rule_id),
+            "user_id": user_id
+        })
+        
+        if result.deleted_count == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Rule not found"
+            )
+        
+        self._invalidate(user_id)
+        return {"message": "Rule deleted successfully"}
+    
+    async def enqueue_recategorization(self, user_id: str) -> str:
+        """Queue recategorize_history for a user, returning the job ID"""
+        return await JobQueue().enqueue("categorization.recategorize", {"user_id": user_id}, user_id=user_id)
+    
+    async def recategorize_history(self, user_id: str) -> RecategorizeResult:
+        """
+        Re-apply the current rules to a user's history
+        
+        Only auto-categorized expenses are touched; categories chosen by the
+        user are kept. Rollups, spending statistics and recurring patterns
+        are rebuilt when any expense changes category.
+        """
+        self._invalidate(user_id)
+        user_rules = await self._get_user_rules(user_id)
+        
+        expense_updates = []
+        cursor = self.db.expenses.find(
+            {"user_id": user_id, "category_source": "auto"},
+            {"description": 1, "amount": 1, "category": 1}
+        )
+        async for expense in cursor:
+            category, _ = self._match(user_rules, expense["description"], None, None, expense["amount"])
+            if category.value != expense["category"]:
+                expense_updates.append(UpdateOne(
+                    {"_id": expense["_id"], "user_id": user_id},
+                    {"$set": {
+                        "category": category.value,
+                        "recurring_key": recurring_key(category, expense["description"])
+                    }}
+                ))
+        
+        transaction_updates = []
+        cursor = get_upi_store().find(
+            {"user_id": user_id, "category_source": {"$ne": "manual"}},
+            {"payee_name": 1, "payee_upi": 1, "amount": 1, "category": 1}
+        )
+        async for transaction in cursor:
+            category, _ = self._match(
+                user_rules, None, transaction["payee_name"], transaction["payee_upi"], transaction["amount"]
+            )
+            if category.value != transaction.get("category"):
+                transaction_updates.append(
+                    (transaction["_id"], {"category": category.value, "category_source": "auto"})
+                )
+        
+        if expense_updates:
+            await self.db.expenses.bulk_write(expense_updates, ordered=False)
+            await bump_version(user_id, "expenses")
+            await SpendingRollupService().rebuild(user_id)
+            await SpendingAnomalyService().rebuild(user_id)
+            await ForecastService().rebuild_patterns(user_id)
+            publish_resync(user_id)
+        if transaction_updates:
+            await get_upi_store().bulk_update(user_id, transaction_updates)
+            await bump_version(user_id, "upi_transactions")
+        
+        return RecategorizeResult(
+            expenses_updated=len(expense_updates),
+            transactions_updated=len(transaction_updates)
+        )
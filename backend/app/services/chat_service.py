@@ -0,0 +1,230 @@
+"""
+Chat and support messaging service
+"""
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+from pymongo import ReturnDocument
+from ..models.chat import (
+    MessageSender, ChatMessageResponse, ChatHistoryPage,
+    ChatConversation, ChatConversationPage, ChatUnreadCount
+)
+from ..database import get_database
+from ..utils.events import EventBus
+
+# Channel of the support inbox on the chat event bus
+SUPPORT_CHANNEL = "support"
+
+# Pushes new messages and read receipts to open WebSockets
+chat_events = EventBus()
+
+
+def _cursor(moment: datetime, tiebreak: str) -> str:
+    """Opaque keyset cursor from a sort value and a unique tiebreaker"""
+    return f"{moment.isoformat()}_{tiebreak}"
+
+
+Tiebreak = TypeVar("Tiebreak")
+
+
+def _parse_cursor(cursor: str, tiebreak_type: Callable[[str], Tiebreak] = str) -> Tuple[datetime, Tiebreak]:
+    """Split a keyset cursor back into its parts, parsing the tiebreaker with tiebreak_type"""
+    try:
+        moment, tiebreak = cursor.split("_", 1)
+        return datetime.fromisoformat(moment), tiebreak_type(tiebreak)
+    except (ValueError, InvalidId):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+class ChatService:
+    """
+    Chat between users and support staff
+    
+    Messages are append-only. Each user has one conversation document
+    holding the last message, unread counters for both sides and read
+    watermarks; a message is read when it is older than the other side's
+    watermark, so marking a conversation read is a single update.
+    """
+    
+    def __init__(self):
+        self.db = get_database()
+        self.messages = self.db.chat_messages
+        self.conversations = self.db.chat_conversations
+        self.support_stats = self.db.chat_support_stats
+    
+    def _to_response(self, message: Dict[str, Any], conversation: Optional[Dict[str, Any]]) -> ChatMessageResponse:
+        """Build a message response, deriving read from the watermarks"""
+        conversation = conversation or {}
+        watermark = conversation.get(
+            "support_read_at" if message["sender"] == MessageSender.USER else "user_read_at"
+        )
+        message["_id"] = str(message["_id"])
+        message["read"] = watermark is not None and message["timestamp"] <= watermark
+        return ChatMessageResponse(**message)
+    
+    async def _append(self, user_id: str, sender: MessageSender, text: str) -> ChatMessageResponse:
+        """Store a message and bump the conversation counters"""
+        now = datetime.utcnow()
+        message = {
+            "user_id": user_id,
+            "sender": sender,
+            "message": text,
+            "timestamp": now,
+            "read": False,
+            "created_at": now
+        }
+        result = await self.messages.insert_one(message)
+        message["_id"] = result.inserted_id
+        
+        from_user = sender == MessageSender.USER
+        update = {
+            "$set": {
+                "last_message": text[:200],
+                "last_sender": sender,
+                "last_message_at": now,
+                "awaiting_support": from_user
+            },
+            "$inc": {"unread_support" if from_user else "unread_user": 1},
+            "$setOnInsert": {"unread_user" if from_user else "unread_support": 0}
+        }
+        conversation = await self.conversations.find_one_and_update(
+            {"user_id": user_id}, update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        if from_user:
+            await self.support_stats.update_one({"_id": SUPPORT_CHANNEL}, {"$inc": {"unread": 1}}, upsert=True)
+        
+        response = self._to_response(message, conversation)
+        event = {"type": "message", "message": response.model_dump(mode="json", by_alias=True)}
+        chat_events.publish(user_id, event)
+        chat_events.publish(SUPPORT_CHANNEL, event)
+        return response
+    
+    async def send_user_message(self, user_id: str, text: str) -> ChatMessageResponse:
+        """Send a message from a user to support"""
+        return await self._append(user_id, MessageSender.USER, text)
+    
+    async def send_support_message(self, user_id: str, text: str) -> ChatMessageResponse:
+        """Reply to a user from the support inbox"""
+        if not await self.conversations.find_one({"user_id": user_id}, {"_id": 1}):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found"
+            )
+        return await self._append(user_id, MessageSender.SUPPORT, text)
+    
+    async def get_history(self, user_id: str, before: Optional[str] = None, limit: int = 50) -> ChatHistoryPage:
+        """
+        Get a page of a user's messages, newest first
+        
+        Paging is keyset based on (timestamp, _id), so every page is a
+        bounded index range scan regardless of how deep the client scrolls.
+        """
+        query: Dict[str, Any] = {"user_id": user_id}
+        if before:
+            moment, message_id = _parse_cursor(before, ObjectId)
+            query["$or"] = [
+                {"timestamp": {"$lt": moment}},
+                {"timestamp": moment, "_id": {"$lt": message_id}}
+            ]
+        
+        documents = await self.messages.find(query).sort(
+            [("timestamp", -1), ("_id", -1)]
+        ).limit(limit + 1).to_list(length=limit + 1)
+        conversation = await self.conversations.find_one({"user_id": user_id})
+        
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = _cursor(documents[-1]["timestamp"], str(documents[-1]["_id"]))
+        
+        return ChatHistoryPage(
+            messages=[self._to_response(message, conversation) for message in documents],
+            next_cursor=next_cursor
+        )
+    
+    async def get_unread_count(self, user_id: str) -> ChatUnreadCount:
+        """Get the number of support replies a user has not read"""
+        conversation = await self.conversations.find_one({"user_id": user_id}, {"unread_user": 1})
+        return ChatUnreadCount(unread=conversation["unread_user"] if conversation else 0)
+    
+    async def mark_read_by_user(self, user_id: str) -> ChatUnreadCount:
+        """Mark all support replies as read by the user"""
+        now = datetime.utcnow()
+        await self.conversations.update_one(
+            {"user_id": user_id},
+            {"$set": {"user_read_at": now, "unread_user": 0}}
+        )
+        chat_events.publish(SUPPORT_CHANNEL, {"type": "read", "user_id": user_id, "reader": "user", "read_at": now.isoformat()})
+        return ChatUnreadCount(unread=0)
+    
+    async def mark_read_by_support(self, user_id: str) -> ChatUnreadCount:
+        """Mark a user's messages as read by support"""
+        now = datetime.utcnow()
+        previous = await self.conversations.find_one_and_update(
+            {"user_id": user_id},
+            {"$set": {"support_read_at": now, "unread_support": 0}},
+            projection={"unread_support": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        if not previous:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found"
+            )
+        
+        if previous.get("unread_support"):
+            await self.support_stats.update_one(
+                {"_id": SUPPORT_CHANNEL}, {"$inc": {"unread": -previous["unread_support"]}}
+            )
+        chat_events.publish(user_id, {"type": "read", "user_id": user_id, "reader": "support", "read_at": now.isoformat()})
+        return await self.get_support_unread_count()
+    
+    async def get_support_unread_count(self) -> ChatUnreadCount:
+        """Get the number of user messages support has not read"""
+        stats = await self.support_stats.find_one({"_id": SUPPORT_CHANNEL})
+        return ChatUnreadCount(unread=max(stats["unread"], 0) if stats else 0)
+    
+    async def get_conversations(self, cursor: Optional[str] = None, limit: int = 50,
+                                awaiting_only: bool = False) -> ChatConversationPage:
+        """
+        Get the support inbox, most recently active conversations first
+        
+        Reads one summary document per conversation, keyset paged on
+        (last_message_at, user_id), so the inbox never touches messages.
+        """
+        query: Dict[str, Any] = {}
+        if awaiting_only:
+            query["awaiting_support"] = True
+        if cursor:
+            moment, user_id = _parse_cursor(cursor)
+            query["$or"] = [
+                {"last_message_at": {"$lt": moment}},
+                {"last_message_at": moment, "user_id": {"$lt": user_id}}
+            ]
+        
+        documents = await self.conversations.find(query).sort(
+            [("last_message_at", -1), ("user_id", -1)]
+        ).limit(limit + 1).to_list(length=limit + 1)
+        
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = _cursor(documents[-1]["last_message_at"], documents[-1]["user_id"])
+        
+        conversations: List[ChatConversation] = [
+            ChatConversation(
+                user_id=document["user_id"],
+                last_message=document["last_message"],
+                last_sender=document["last_sender"],
+                last_message_at=document["last_message_at"],
+                unread=document.get("unread_support", 0),
+                awaiting_support=document.get("awaiting_support", False)
+            )
+            for document in documents
+        ]
+        return ChatConversationPage(conversations=conversations, next_cursor=next_cursor)
@@ -0,0 +1,239 @@
+"""
+Live dashboard updates pushed as server-sent events
+"""
+import asyncio
+import json
+import math
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from ..config import settings
+from ..database import get_database
+from ..utils.events import RESYNC, event_bus
+from ..utils.fx import get_fx_table
+from ..utils.money import to_paise, to_rupees
+from .analytics_service import AnalyticsService
+
+# Collections whose changes move dashboard figures
+WATCHED_COLLECTIONS = ("expenses", "bank_accounts", "assets", "liabilities", "emis")
+
+# Comment line sent on idle connections so proxies keep them open
+KEEPALIVE_SECONDS = 25
+
+
+def _contribution(source: str, document: Optional[Dict[str, Any]]) -> Dict[Any, int]:
+    """What a single document adds to the dashboard counters, in paise"""
+    if document is None:
+        return {}
+    if source == "expenses":
+        date = document["date"]
+        category = getattr(document["category"], "value", document["category"])
+        return {
+            ("spending", date.year, date.month): document["amount"],
+            ("category", date.year, date.month, category): document["amount"]
+        }
+    if source == "bank_accounts":
+        return {("balance", document.get("currency") or "INR"): document.get("balance", 0)}
+    if source == "assets":
+        return {"total_assets": document.get("current_value", 0)}
+    if source == "liabilities" and document.get("status") == "Active":
+        return {"total_liabilities": document["amount"]}
+    if source == "emis" and document.get("status") == "Active":
+        return {"total_emi": document["emi_amount"]}
+    return {}
+
+
+def _add(total: float, paise: int) -> float:
+    """Add a paise delta to a rupee figure of the summary without drift"""
+    return to_rupees(to_paise(total) + paise)
+
+
+def _deltas(source: str, previous: Optional[Dict[str, Any]],
+            current: Optional[Dict[str, Any]]) -> Dict[Any, int]:
+    """Counter changes caused by replacing previous with current"""
+    deltas = _contribution(source, current)
+    for key, value in _contribution(source, previous).items():
+        deltas[key] = deltas.get(key, 0) - value
+    return {key: value for key, value in deltas.items() if value}
+
+
+def publish_change(user_id: str, source: str, previous: Optional[Dict[str, Any]],
+                   current: Optional[Dict[str, Any]]) -> None:
+    """
+    Publish a write to the dashboard streams of a user
+    
+    Called from service write paths with the document before and after the
+    write (None for inserts and deletes). When change streams feed the bus
+    the write is picked up there instead.
+    """
+    if settings.DASHBOARD_CHANGE_STREAMS or not event_bus.has_subscribers(user_id):
+        return
+    deltas = _deltas(source, previous, current)
+    if deltas:
+        event_bus.publish(user_id, {"type": "deltas", "deltas": deltas})
+
+
+def publish_resync(user_id: str) -> None:
+    """Ask the dashboard streams of a user to reload after a bulk change"""
+    if not settings.DASHBOARD_CHANGE_STREAMS:
+        event_bus.publish(user_id, RESYNC)
+
+
+async def watch_change_streams() -> None:
+    """
+    Feed the event bus from a MongoDB change stream
+    
+    Used when several API replicas serve the same users, so a write made
+    through one replica reaches streams held by another. Updates and
+    deletes need pre-images (changeStreamPreAndPostImages) on the watched
+    collections; without them affected streams are told to resync and
+    deletes cannot be attributed to a user.
+    """
+    pipeline = [{"$match": {
+        "ns.coll": {"$in": list(WATCHED_COLLECTIONS)},
+        "operationType": {"$in": ["insert", "update", "replace", "delete"]}
+    }}]
+    
+    while True:
+        try:
+            async with get_database().watch(
+                pipeline,
+                full_document="updateLookup",
+                full_document_before_change="whenAvailable"
+            ) as stream:
+                async for change in stream:
+                    current = change.get("fullDocument")
+                    previous = change.get("fullDocumentBeforeChange")
+                    user_id = (current or previous or {}).get("user_id")
+                    if user_id is None or not event_bus.has_subscribers(user_id):
+                        continue
+                    if change["operationType"] != "insert" and previous is None:
+                        event_bus.publish(user_id, RESYNC)
+                        continue
+                    deltas = _deltas(change["ns"]["coll"], previous, current)
+                    if deltas:
+                        event_bus.publish(user_id, {"type": "deltas", "deltas": deltas})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Dashboard change stream failed, retrying: {e}")
+            await asyncio.sleep(5)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event; non-finite ratios are sent as null"""
+    data = {
+        key: None if isinstance(value, float) and not math.isfinite(value) else value
+        for key, value in data.items()
+    }
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class DashboardStream:
+    """
+    Dashboard state of one connection, kept current from published deltas
+    
+    The full summary is computed once when the stream opens; afterwards
+    each write only adjusts the affected figures and the changed fields
+    are sent to the client.
+    """
+    
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.analytics = AnalyticsService()
+        self.summary: Dict[str, Any] = {}
+        self.total_emi = 0.0
+        self.month: Tuple[int, int] = (0, 0)
+    
+    async def load(self) -> Dict[str, Any]:
+        """Compute the full dashboard summary"""
+        now = datetime.now()
+        self.month = (now.year, now.month)
+        self.summary = await self.analytics.get_dashboard_summary(self.user_id)
+        self.total_emi = await self.analytics.get_total_emi(self.user_id)
+        return self.summary
+    
+    def _ratios(self) -> Dict[str, float]:
+        """Recompute the derived ratios from the tracked totals"""
+        spending = self.summary["monthly_spending"]
+        assets = self.summary["total_assets"]
+        liabilities = self.summary["total_liabilities"]
+        return {
+            "emi_burden_percentage": round((self.total_emi / spending) * 100, 2) if spending else 0,
+            "asset_liability_ratio": (
+                round(assets / liabilities, 2) if liabilities
+                else float('inf') if assets > 0 else 0
+            )
+        }
+    
+    def apply(self, deltas: Dict[Any, int]) -> Dict[str, Any]:
+        """Apply counter deltas and return the dashboard fields that changed"""
+        changed = {}
+        for key, value in deltas.items():
+            if key[0] == "balance":
+                balances = self.summary["balances_by_currency"]
+                balances[key[1]] = _add(balances.get(key[1], 0), value)
+                changed["balances_by_currency"] = balances
+                # Per-currency totals are converted once, not per account
+                total, _ = get_fx_table().convert_totals(balances, self.summary["base_currency"])
+                if total != self.summary["total_balance"]:
+                    self.summary["total_balance"] = total
+                    changed["total_balance"] = total
+            elif key in ("total_assets", "total_liabilities"):
+                self.summary[key] = _add(self.summary[key], value)
+                changed[key] = self.summary[key]
+            elif key == "total_emi":
+                self.total_emi = _add(self.total_emi, value)
+            elif key[0] == "spending":
+                if key[1:] == self.month:
+                    self.summary["monthly_spending"] = _add(self.summary["monthly_spending"], value)
+                    changed["monthly_spending"] = self.summary["monthly_spending"]
+                for point in self.summary["spending_trend"]:
+                    if (point["year"], point["month"]) == key[1:]:
+                        point["total"] = _add(point["total"], value)
+                        changed["spending_trend"] = self.summary["spending_trend"]
+            elif key[0] == "category" and key[1:3] == self.month:
+                breakdown = self.summary["category_breakdown"]
+                total = _add(breakdown.get(key[3], 0), value)
+                if total:
+                    breakdown[key[3]] = total
+                else:
+                    breakdown.pop(key[3], None)
+                changed["category_breakdown"] = breakdown
+        
+        for key, value in self._ratios().items():
+            if value != self.summary[key]:
+                self.summary[key] = value
+                changed[key] = value
+        return changed
+    
+    async def events(self, is_disconnected) -> AsyncIterator[str]:
+        """
+        Server-sent events for the connection
+        
+        Starts with a "snapshot" event holding the full summary, followed
+        by "delta" events with only the changed fields.
+        """
+        async with event_bus.subscribe(self.user_id) as queue:
+            await self.load()
+            # Writes racing with the initial load may or may not be in it
+            while not queue.empty():
+                while not queue.empty():
+                    queue.get_nowait()
+                await self.load()
+            yield _sse("snapshot", self.summary)
+            
+            while not await is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                now = datetime.now()
+                if event is RESYNC or (now.year, now.month) != self.month:
+                    yield _sse("snapshot", await self.load())
+                    continue
+                
+                changed = self.apply(event["deltas"])
+                if changed:
+                    yield _sse("delta", changed)
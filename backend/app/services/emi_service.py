@@ -2,14 +2,20 @@
 EMI (Equated Monthly Installment) service with calculation logic
 """
 from datetime import datetime, date, timedelta
+from decimal import Decimal
 from dateutil.relativedelta import relativedelta
 from bson import ObjectId
+from pymongo import ReturnDocument
 from fastapi import HTTPException, status
 from typing import List
 from ..models.emi import (
     EMICreate, EMIUpdate, EMIResponse, EMIStatus, EMIPaymentSchedule
 )
 from ..database import get_database
+from ..utils.fields import ALL_FIELDS, FieldSelection
+from ..utils.money import divide, from_storage, round_paise, to_rupees, to_storage
+from ..utils.etag import bump_version
+from .dashboard_stream_service import publish_change
 
 
 class EMIService:
@@ -19,62 +25,62 @@ class EMIService:
         self.db = get_database()
         self.collection = self.db.emis
     
-    def calculate_emi(self, principal: float, annual_rate: float, tenure: int) -> float:
+    def calculate_emi(self, principal: int, annual_rate: float, tenure: int) -> int:
         """
         Calculate EMI amount using the formula:
         EMI = [P x R x (1+R)^N]/[(1+R)^N-1]
         
         Args:
-            principal: Principal loan amount
+            principal: Principal loan amount in paise
             annual_rate: Annual interest rate in percentage
             tenure: Tenure in months
         
         Returns:
-            EMI amount
+            EMI amount in paise
         """
         if annual_rate == 0:
-            return principal / tenure
+            return divide(principal, tenure)
         
         # Convert annual rate to monthly rate
-        monthly_rate = annual_rate / (12 * 100)
+        monthly_rate = Decimal(str(annual_rate)) / 1200
+        growth = (1 + monthly_rate) ** tenure
         
         # Apply EMI formula
-        emi = (principal * monthly_rate * pow(1 + monthly_rate, tenure)) / \
-              (pow(1 + monthly_rate, tenure) - 1)
-        
-        return round(emi, 2)
+        return round_paise(principal * monthly_rate * growth / (growth - 1))
     
-    def generate_payment_schedule(self, principal: float, annual_rate: float, 
-                                   tenure: int, start_date: date) -> List[EMIPaymentSchedule]:
+    def generate_payment_schedule(self, principal: int, annual_rate: float,
+                                  tenure: int, start_date: date) -> List[EMIPaymentSchedule]:
         """
         Generate complete amortization schedule
         
+        Balances are tracked in integer paise: each month's interest is
+        rounded once to the paisa and the last instalment settles whatever
+        balance is left, so principal payments add up to the loan exactly.
+        
         Returns:
             List of payment schedule items
         """
         emi_amount = self.calculate_emi(principal, annual_rate, tenure)
-        monthly_rate = annual_rate / (12 * 100)
+        monthly_rate = Decimal(str(annual_rate)) / 1200
         
         schedule = []
         balance = principal
         current_date = start_date
         
         for month in range(1, tenure + 1):
-            interest = round(balance * monthly_rate, 2)
-            principal_payment = round(emi_amount - interest, 2)
-            balance = round(balance - principal_payment, 2)
-            
-            # Ensure balance doesn't go negative due to rounding
-            if balance < 0:
-                balance = 0
+            interest = round_paise(balance * monthly_rate)
+            principal_payment = min(emi_amount - interest, balance)
+            if month == tenure:
+                principal_payment = balance
+            balance -= principal_payment
             
             schedule.append(EMIPaymentSchedule(
                 month=month,
                 payment_date=current_date,
-                emi_amount=emi_amount,
-                principal=principal_payment,
-                interest=interest,
-                balance=balance
+                emi_amount=to_rupees(principal_payment + interest),
+                principal=to_rupees(principal_payment),
+                interest=to_rupees(interest),
+                balance=to_rupees(balance)
             ))
             
             current_date += relativedelta(months=1)
@@ -84,20 +90,20 @@ class EMIService:
     async def create_emi(self, user_id: str, emi_data: EMICreate) -> EMIResponse:
         """Create a new EMI"""
         # Calculate EMI amount
+        emi_dict = to_storage(emi_data.dict(), EMICreate)
         emi_amount = self.calculate_emi(
-            emi_data.principal_amount,
+            emi_dict["principal_amount"],
             emi_data.interest_rate,
             emi_data.tenure
         )
         
         # Create EMI document
-        emi_dict = emi_data.dict()
         emi_dict["user_id"] = user_id
         emi_dict["emi_amount"] = emi_amount
         emi_dict["next_payment_date"] = emi_data.start_date
         emi_dict["remaining_tenure"] = emi_data.tenure
         emi_dict["total_interest_paid"] = 0
-        emi_dict["principal_outstanding"] = emi_data.principal_amount
+        emi_dict["principal_outstanding"] = emi_dict["principal_amount"]
         emi_dict["status"] = EMIStatus.ACTIVE
         emi_dict["created_at"] = datetime.utcnow()
         emi_dict["updated_at"] = datetime.utcnow()
@@ -105,26 +111,30 @@ class EMIService:
         # Insert into database
         result = await self.collection.insert_one(emi_dict)
         emi_dict["_id"] = str(result.inserted_id)
+        await bump_version(user_id, "emis")
+        publish_change(user_id, "emis", None, emi_dict)
         
-        return EMIResponse(**emi_dict, id=str(result.inserted_id))
+        return EMIResponse(**from_storage(emi_dict, EMIResponse), id=str(result.inserted_id))
     
-    async def get_emis(self, user_id: str) -> List[EMIResponse]:
+    async def get_emis(self, user_id: str, fields: FieldSelection = ALL_FIELDS) -> List[EMIResponse]:
         """Get all EMIs for a user"""
         emis = []
-        cursor = self.collection.find({"user_id": user_id})
+        model = fields.model(EMIResponse)
+        cursor = self.collection.find({"user_id": user_id}, fields.projection(EMIResponse))
         
         async for emi in cursor:
             emi["_id"] = str(emi["_id"])
-            emis.append(EMIResponse(**emi, id=emi["_id"]))
+            emis.append(model(**from_storage(emi, EMIResponse), id=emi["_id"]))
         
         return emis
     
-    async def get_emi_by_id(self, user_id: str, emi_id: str) -> EMIResponse:
+    async def get_emi_by_id(self, user_id: str, emi_id: str,
+                            fields: FieldSelection = ALL_FIELDS) -> EMIResponse:
         """Get specific EMI"""
         emi = await self.collection.find_one({
             "_id": ObjectId(emi_id),
             "user_id": user_id
-        })
+        }, fields.projection(EMIResponse))
         
         if not emi:
             raise HTTPException(
@@ -132,60 +142,85 @@ class EMIService:
                 detail="EMI not found"
             )
         
-        return EMIResponse(**emi, id=str(emi["_id"]))
+        emi["_id"] = str(emi["_id"])
+        
+        return fields.model(EMIResponse)(**from_storage(emi, EMIResponse), id=emi["_id"])
     
     async def update_emi(self, user_id: str, emi_id: str, 
                         emi_update: EMIUpdate) -> EMIResponse:
         """Update EMI"""
-        update_data = {k: v for k, v in emi_update.dict().items() if v is not None}
+        update_data = to_storage(
+            {k: v for k, v in emi_update.dict().items() if v is not None}, EMIUpdate
+        )
         update_data["updated_at"] = datetime.utcnow()
         
-        result = await self.collection.find_one_and_update(
+        previous = await self.collection.find_one_and_update(
             {"_id": ObjectId(emi_id), "user_id": user_id},
             {"$set": update_data},
-            return_document=True
+            return_document=ReturnDocument.BEFORE
         )
         
-        if not result:
+        if not previous:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="EMI not found"
             )
         
-        return EMIResponse(**result, id=str(result["_id"]))
+        result = {**previous, **update_data}
+        await bump_version(user_id, "emis")
+        publish_change(user_id, "emis", previous, result)
+        
+        return EMIResponse(**from_storage(result, EMIResponse), id=str(result["_id"]))
     
     async def delete_emi(self, user_id: str, emi_id: str) -> dict:
         """Delete EMI"""
-        result = await self.collection.delete_one({
+        deleted = await self.collection.find_one_and_delete({
             "_id": ObjectId(emi_id),
             "user_id": user_id
         })
         
-        if result.deleted_count == 0:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="EMI not found"
             )
         
+        await bump_version(user_id, "emis")
+        publish_change(user_id, "emis", deleted, None)
         return {"message": "EMI deleted successfully"}
     
     async def get_payment_schedule(self, user_id: str, emi_id: str) -> List[EMIPaymentSchedule]:
         """Get payment schedule for an EMI"""
-        emi = await self.get_emi_by_id(user_id, emi_id)
+        emi = await self.collection.find_one(
+            {"_id": ObjectId(emi_id), "user_id": user_id},
+            {"principal_amount": 1, "interest_rate": 1, "tenure": 1, "start_date": 1}
+        )
+        
+        if not emi:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="EMI not found"
+            )
+        
+        start_date = emi["start_date"]
+        if isinstance(start_date, datetime):
+            start_date = start_date.date()
         
         return self.generate_payment_schedule(
-            emi.principal_amount,
-            emi.interest_rate,
-            emi.tenure,
-            emi.start_date
+            emi["principal_amount"],
+            emi["interest_rate"],
+            emi["tenure"],
+            start_date
         )
     
-    async def get_upcoming_payments(self, user_id: str, days: int = 7) -> List[EMIResponse]:
+    async def get_upcoming_payments(self, user_id: str, days: int = 7,
+                                    fields: FieldSelection = ALL_FIELDS) -> List[EMIResponse]:
         """Get EMIs with payments due in next N days"""
         today = date.today()
         end_date = today + timedelta(days=days)
         
         emis = []
+        model = fields.model(EMIResponse)
         cursor = self.collection.find({
             "user_id": user_id,
             "status": EMIStatus.ACTIVE,
@@ -193,10 +228,10 @@ class EMIService:
                 "$gte": today,
                 "$lte": end_date
             }
-        })
+        }, fields.projection(EMIResponse))
         
         async for emi in cursor:
             emi["_id"] = str(emi["_id"])
-            emis.append(EMIResponse(**emi, id=emi["_id"]))
+            emis.append(model(**from_storage(emi, EMIResponse), id=emi["_id"]))
         
         return emis
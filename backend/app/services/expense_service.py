@@ -5,8 +5,24 @@ from datetime import datetime
 from bson import ObjectId
 from fastapi import HTTPException, status
 from typing import List, Optional
-from ..models.expense import ExpenseCreate, ExpenseUpdate, ExpenseResponse
+from pymongo import ReturnDocument
+from ..models.expense import ExpenseCreate, ExpenseUpdate, ExpenseResponse, PaymentMethod
+from ..models.budget import ExpenseBudgetResponse
 from ..database import get_database
+from ..utils.fields import ALL_FIELDS, FieldSelection
+from ..utils.etag import bump_version
+from ..models.anomaly import SpendingAnomaly
+from ..utils.money import from_storage, to_storage
+from .anomaly_service import SpendingAnomalyService
+from .budget_service import BudgetService
+from .categorization_service import CategorizationService
+from .dashboard_stream_service import publish_change
+from .forecast_service import ForecastService, recurring_key
+from .heatmap_service import SpendingHeatmapService
+from .reconciliation_service import ReconciliationService
+
+# Fields a UPI transaction link is matched on
+RECONCILED_FIELDS = ("amount", "date", "payment_method")
 
 
 class ExpenseService:
@@ -16,20 +32,48 @@ class ExpenseService:
         self.db = get_database()
         self.collection = self.db.expenses
     
-    async def create_expense(self, user_id: str, expense_data: ExpenseCreate) -> ExpenseResponse:
+    async def create_expense(self, user_id: str, expense_data: ExpenseCreate) -> ExpenseBudgetResponse:
         """Create a new expense"""
-        expense_dict = expense_data.dict()
+        expense_dict = to_storage(expense_data.dict(), ExpenseCreate)
         expense_dict["user_id"] = user_id
+        if expense_dict["category"] is None:
+            expense_dict["category"], _ = await CategorizationService().classify(
+                user_id, description=expense_dict["description"], amount=expense_dict["amount"]
+            )
+            expense_dict["category_source"] = "auto"
+        else:
+            expense_dict["category_source"] = "manual"
+        expense_dict["recurring_key"] = recurring_key(expense_dict["category"], expense_dict["description"])
         expense_dict["created_at"] = datetime.utcnow()
         expense_dict["updated_at"] = datetime.utcnow()
         
         result = await self.collection.insert_one(expense_dict)
+        expense_dict["_id"] = result.inserted_id
+        
+        if expense_dict["payment_method"] == PaymentMethod.UPI:
+            # Link to the UPI transaction this expense duplicates, if recorded
+            expense_dict["upi_transaction_id"] = await ReconciliationService().reconcile_expense(
+                user_id, expense_dict
+            )
         expense_dict["_id"] = str(result.inserted_id)
         
-        return ExpenseResponse(**expense_dict, id=str(result.inserted_id))
+        # Keep the recurring expense model used by forecasts up to date
+        await ForecastService().record_expense(user_id, expense_dict)
+        budget_status = await BudgetService().apply_expense_change(user_id, None, expense_dict)
+        anomaly = await SpendingAnomalyService().apply_expense_change(user_id, None, expense_dict)
+        await SpendingHeatmapService().apply_expense_change(user_id, None, expense_dict)
+        await bump_version(user_id, "expenses")
+        publish_change(user_id, "expenses", None, expense_dict)
+        
+        return ExpenseBudgetResponse(
+            **from_storage(expense_dict, ExpenseResponse),
+            budget_status=budget_status,
+            anomaly=self._anomaly_response(anomaly)
+        )
     
     async def get_expenses(self, user_id: str, month: Optional[int] = None, 
-                          year: Optional[int] = None) -> List[ExpenseResponse]:
+                          year: Optional[int] = None,
+                          fields: FieldSelection = ALL_FIELDS) -> List[ExpenseResponse]:
         """Get expenses for a user, optionally filtered by month/year"""
         query = {"user_id": user_id}
         
@@ -44,20 +88,22 @@ class ExpenseService:
             query["date"] = {"$gte": start_date, "$lt": end_date}
         
         expenses = []
-        cursor = self.collection.find(query).sort("date", -1)
+        model = fields.model(ExpenseResponse)
+        cursor = self.collection.find(query, fields.projection(ExpenseResponse)).sort("date", -1)
         
         async for expense in cursor:
             expense["_id"] = str(expense["_id"])
-            expenses.append(ExpenseResponse(**expense, id=expense["_id"]))
+            expenses.append(model(**from_storage(expense, ExpenseResponse), id=expense["_id"]))
         
         return expenses
     
-    async def get_expense_by_id(self, user_id: str, expense_id: str) -> ExpenseResponse:
+    async def get_expense_by_id(self, user_id: str, expense_id: str,
+                                fields: FieldSelection = ALL_FIELDS) -> ExpenseResponse:
         """Get specific expense"""
         expense = await self.collection.find_one({
             "_id": ObjectId(expense_id),
             "user_id": user_id
-        })
+        }, fields.projection(ExpenseResponse))
         
         if not expense:
             raise HTTPException(
@@ -65,39 +111,112 @@ class ExpenseService:
                 detail="Expense not found"
             )
         
-        return ExpenseResponse(**expense, id=str(expense["_id"]))
+        expense["_id"] = str(expense["_id"])
+        
+        return fields.model(ExpenseResponse)(**from_storage(expense, ExpenseResponse), id=expense["_id"])
     
     async def update_expense(self, user_id: str, expense_id: str, 
-                           expense_update: ExpenseUpdate) -> ExpenseResponse:
+                           expense_update: ExpenseUpdate) -> ExpenseBudgetResponse:
         """Update expense"""
-        update_data = {k: v for k, v in expense_update.dict().items() if v is not None}
+        update_data = to_storage(
+            {k: v for k, v in expense_update.dict().items() if v is not None}, ExpenseUpdate
+        )
+        if "category" in update_data:
+            update_data["category_source"] = "manual"
         update_data["updated_at"] = datetime.utcnow()
         
-        result = await self.collection.find_one_and_update(
+        # Fetch the previous version in the same round trip so derived
+        # models can be adjusted without a separate read
+        previous = await self.collection.find_one_and_update(
             {"_id": ObjectId(expense_id), "user_id": user_id},
             {"$set": update_data},
-            return_document=True
+            return_document=ReturnDocument.BEFORE
         )
         
-        if not result:
+        if not previous:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Expense not found"
             )
         
-        return ExpenseResponse(**result, id=str(result["_id"]))
+        result = {**previous, **update_data, "_id": str(previous["_id"])}
+        result["recurring_key"] = recurring_key(result["category"], result["description"])
+        if result["recurring_key"] != previous.get("recurring_key"):
+            await self.collection.update_one(
+                {"_id": ObjectId(expense_id)},
+                {"$set": {"recurring_key": result["recurring_key"]}}
+            )
+        
+        if any(field in update_data and update_data[field] != previous.get(field) for field in RECONCILED_FIELDS):
+            result["upi_transaction_id"] = await self._relink(user_id, previous, result)
+        
+        await self._refresh_forecast(user_id, previous, result)
+        budget_status = await BudgetService().apply_expense_change(user_id, previous, result)
+        anomaly = await SpendingAnomalyService().apply_expense_change(user_id, previous, result)
+        await SpendingHeatmapService().apply_expense_change(user_id, previous, result)
+        await bump_version(user_id, "expenses")
+        publish_change(user_id, "expenses", previous, result)
+        
+        return ExpenseBudgetResponse(
+            **from_storage(result, ExpenseResponse),
+            budget_status=budget_status,
+            anomaly=self._anomaly_response(anomaly)
+        )
     
     async def delete_expense(self, user_id: str, expense_id: str) -> dict:
         """Delete expense"""
-        result = await self.collection.delete_one({
+        deleted = await self.collection.find_one_and_delete({
             "_id": ObjectId(expense_id),
             "user_id": user_id
         })
         
-        if result.deleted_count == 0:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Expense not found"
             )
         
-        return {"message": "Expense deleted successfully"}
+        if deleted.get("upi_transaction_id"):
+            await ReconciliationService().release_expense(user_id, expense_id)
+        await self._refresh_forecast(user_id, deleted, None)
+        budget_status = await BudgetService().apply_expense_change(user_id, deleted, None)
+        await SpendingAnomalyService().apply_expense_change(user_id, deleted, None)
+        await SpendingHeatmapService().apply_expense_change(user_id, deleted, None)
+        await bump_version(user_id, "expenses")
+        publish_change(user_id, "expenses", deleted, None)
+        
+        return {"message": "Expense deleted successfully", "budget_status": budget_status}
+    
+    def _anomaly_response(self, anomaly: Optional[dict]) -> Optional[SpendingAnomaly]:
+        """Response model of an anomaly recorded by a write"""
+        return SpendingAnomaly(**from_storage(anomaly, SpendingAnomaly)) if anomaly else None
+    
+    async def _relink(self, user_id: str, previous: dict, current: dict) -> Optional[str]:
+        """
+        Redo reconciliation for an expense whose matched fields changed
+        
+        The old link no longer describes the expense, so it is released on
+        both sides before matching again. Returns the new transaction id.
+        """
+        reconciliation = ReconciliationService()
+        if previous.get("upi_transaction_id"):
+            await self.collection.update_one(
+                {"_id": previous["_id"], "upi_transaction_id": previous["upi_transaction_id"]},
+                {"$set": {"upi_transaction_id": None}}
+            )
+            await reconciliation.release_expense(user_id, current["_id"])
+        
+        if current["payment_method"] != PaymentMethod.UPI:
+            return None
+        return await reconciliation.reconcile_expense(user_id, current)
+    
+    async def _refresh_forecast(self, user_id: str, previous: dict, current: Optional[dict]) -> None:
+        """Refresh the recurring patterns touched by an update or delete"""
+        keys = {previous.get("recurring_key")}
+        if current:
+            keys.add(current["recurring_key"])
+        keys.discard(None)
+        
+        forecast_service = ForecastService()
+        for key in keys:
+            await forecast_service.refresh_pattern(user_id, key)
@@ -0,0 +1,346 @@
+"""
+Cash flow forecasting service with recurring expense detection
+"""
+import math
+import re
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+from dateutil.relativedelta import relativedelta
+from typing import Any, Dict, List, Optional
+from pymongo import UpdateOne
+from ..models.forecast import (
+    CashFlowForecast, ForecastDay, ForecastEvent, ForecastSource, RecurringExpense
+)
+from ..database import get_database
+from ..utils.money import divide, to_paise, to_rupees
+from ..utils.rebuild import replace_rebuilt
+from .analytics_service import AnalyticsService
+
+# Recurring expense detection thresholds
+MIN_OCCURRENCES = 3
+MIN_INTERVAL_DAYS = 6
+MAX_INTERVAL_DAYS = 95
+MAX_INTERVAL_VARIATION = 0.25  # Allowed coefficient of variation between payments
+MAX_AMOUNT_VARIATION = 0.5
+MISSED_INTERVALS_BEFORE_STALE = 2
+
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+
+
+def recurring_key(category: Any, description: str) -> str:
+    """
+    Build the key used to group expenses into recurring patterns
+    
+    Digits are dropped so that "Rent 03/2024" and "Rent 04/2024" land in
+    the same pattern.
+    """
+    category = getattr(category, "value", category)
+    normalized = _SPACES.sub(" ", _DIGITS.sub("", description.lower())).strip()
+    return f"{category}|{normalized}"
+
+
+def _as_date(value: Any) -> date:
+    """Normalize datetime/date values read from MongoDB to a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _std(total: float, square_total: float, count: int) -> float:
+    """Population standard deviation from running sums"""
+    if count == 0:
+        return 0.0
+    mean = total / count
+    return math.sqrt(max(square_total / count - mean * mean, 0.0))
+
+
+class ForecastService:
+    """Cash flow forecast service"""
+    
+    def __init__(self):
+        self.db = get_database()
+        self.patterns = self.db.recurring_expenses
+        self.models = self.db.forecast_models
+    
+    def _build_pattern(self, user_id: str, key: str, expenses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build a pattern document from expenses sorted by date"""
+        first = expenses[0]
+        last = expenses[-1]
+        intervals = [
+            (current["date"] - previous["date"]).total_seconds() / 86400
+            for previous, current in zip(expenses, expenses[1:])
+        ]
+        amounts = [expense["amount"] for expense in expenses]
+        
+        return {
+            "user_id": user_id,
+            "key": key,
+            "category": getattr(last["category"], "value", last["category"]),
+            "description": last["description"],
+            "count": len(expenses),
+            "first_date": first["date"],
+            "last_date": last["date"],
+            "last_amount": last["amount"],
+            "interval_count": len(intervals),
+            "interval_sum": sum(intervals),
+            "interval_sq_sum": sum(i * i for i in intervals),
+            "amount_sum": sum(amounts),
+            "amount_sq_sum": sum(float(a * a) for a in amounts),
+            "updated_at": datetime.utcnow()
+        }
+    
+    async def record_expense(self, user_id: str, expense: Dict[str, Any]) -> None:
+        """
+        Fold a newly created expense into its recurring pattern
+        
+        Expenses that arrive in date order are applied incrementally.
+        Back-dated expenses (or a concurrent writer) fall back to rebuilding
+        only the affected pattern.
+        """
+        key = expense["recurring_key"]
+        pattern = await self.patterns.find_one({"user_id": user_id, "key": key})
+        
+        if not pattern:
+            result = await self.patterns.update_one(
+                {"user_id": user_id, "key": key},
+                {"$setOnInsert": self._build_pattern(user_id, key, [expense])},
+                upsert=True
+            )
+            if result.upserted_id is None:
+                await self.refresh_pattern(user_id, key)
+            return
+        
+        if expense["date"] < pattern["last_date"]:
+            await self.refresh_pattern(user_id, key)
+            return
+        
+        interval = (expense["date"] - pattern["last_date"]).total_seconds() / 86400
+        amount = expense["amount"]
+        result = await self.patterns.update_one(
+            {"_id": pattern["_id"], "last_date": pattern["last_date"]},
+            {
+                "$inc": {
+                    "count": 1,
+                    "interval_count": 1,
+                    "interval_sum": interval,
+                    "interval_sq_sum": interval * interval,
+                    "amount_sum": amount,
+                    "amount_sq_sum": float(amount * amount)
+                },
+                "$set": {
+                    "description": expense["description"],
+                    "last_date": expense["date"],
+                    "last_amount": amount,
+                    "updated_at": datetime.utcnow()
+                }
+            }
+        )
+        if result.matched_count == 0:
+            await self.refresh_pattern(user_id, key)
+    
+    async def refresh_pattern(self, user_id: str, key: str) -> None:
+        """Recompute a single pattern from the expenses that share its key"""
+        expenses = await self.db.expenses.find(
+            {"user_id": user_id, "recurring_key": key},
+            {"date": 1, "amount": 1, "category": 1, "description": 1}
+        ).sort("date", 1).to_list(length=None)
+        
+        if not expenses:
+            await self.patterns.delete_one({"user_id": user_id, "key": key})
+            return
+        
+        await self.patterns.replace_one(
+            {"user_id": user_id, "key": key},
+            self._build_pattern(user_id, key, expenses),
+            upsert=True
+        )
+    
+    async def rebuild_patterns(self, user_id: str) -> int:
+        """
+        Rebuild every pattern for a user from full expense history
+        
+        Also backfills ``recurring_key`` on expenses created before the
+        forecast model existed. Returns the number of patterns stored.
+        """
+        groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        backfill = []
+        
+        cursor = self.db.expenses.find(
+            {"user_id": user_id},
+            {"date": 1, "amount": 1, "category": 1, "description": 1, "recurring_key": 1}
+        ).sort("date", 1)
+        
+        async for expense in cursor:
+            key = recurring_key(expense["category"], expense["description"])
+            groups[key].append(expense)
+            if expense.get("recurring_key") != key:
+                backfill.append(UpdateOne({"_id": expense["_id"]}, {"$set": {"recurring_key": key}}))
+        
+        if backfill:
+            await self.db.expenses.bulk_write(backfill, ordered=False)
+        
+        await replace_rebuilt(
+            self.patterns,
+            user_id,
+            [self._build_pattern(user_id, key, expenses) for key, expenses in groups.items()],
+            ("key",)
+        )
+        
+        await self.models.update_one(
+            {"user_id": user_id},
+            {"$set": {"built_at": datetime.utcnow()}},
+            upsert=True
+        )
+        return len(groups)
+    
+    async def _ensure_model(self, user_id: str) -> None:
+        """Build the pattern model once for users with pre-existing history"""
+        if not await self.models.find_one({"user_id": user_id}, {"_id": 1}):
+            await self.rebuild_patterns(user_id)
+    
+    def _describe_pattern(self, pattern: Dict[str, Any], today: date) -> Optional[RecurringExpense]:
+        """Turn a pattern document into a RecurringExpense if it is recurring"""
+        if pattern["count"] < MIN_OCCURRENCES or pattern["interval_count"] == 0:
+            return None
+        
+        interval = pattern["interval_sum"] / pattern["interval_count"]
+        if not MIN_INTERVAL_DAYS <= interval <= MAX_INTERVAL_DAYS:
+            return None
+        
+        interval_std = _std(pattern["interval_sum"], pattern["interval_sq_sum"], pattern["interval_count"])
+        if interval_std / interval > MAX_INTERVAL_VARIATION:
+            return None
+        
+        average_amount = pattern["amount_sum"] / pattern["count"]
+        amount_std = _std(pattern["amount_sum"], pattern["amount_sq_sum"], pattern["count"])
+        if average_amount <= 0 or amount_std / average_amount > MAX_AMOUNT_VARIATION:
+            return None
+        
+        last_date = _as_date(pattern["last_date"])
+        step = timedelta(days=round(interval))
+        if today - last_date > step * MISSED_INTERVALS_BEFORE_STALE + timedelta(days=7):
+            return None
+        
+        next_date = last_date + step
+        while next_date < today:
+            next_date += step
+        
+        return RecurringExpense(
+            category=pattern["category"],
+            description=pattern["description"],
+            average_amount=to_rupees(average_amount),
+            interval_days=round(interval, 1),
+            occurrences=pattern["count"],
+            last_date=last_date,
+            next_date=next_date
+        )
+    
+    async def get_forecast(self, user_id: str, days: int = 90) -> CashFlowForecast:
+        """Project daily balances for the next N days"""
+        await self._ensure_model(user_id)
+        
+        today = date.today()
+        end_date = today + timedelta(days=days)
+        events: Dict[date, List[ForecastEvent]] = defaultdict(list)
+        
+        # Recurring expenses
+        recurring = []
+        async for pattern in self.patterns.find({"user_id": user_id}):
+            summary = self._describe_pattern(pattern, today)
+            if summary is None:
+                continue
+            recurring.append(summary)
+            
+            step = timedelta(days=round(summary.interval_days))
+            occurrence = summary.next_date
+            while occurrence < end_date:
+                events[occurrence].append(ForecastEvent(
+                    source=ForecastSource.RECURRING_EXPENSE,
+                    name=summary.description,
+                    amount=summary.average_amount
+                ))
+                occurrence += step
+        
+        # EMI schedules
+        emis = self.db.emis.find(
+            {"user_id": user_id, "status": "Active"},
+            {"loan_name": 1, "emi_amount": 1, "next_payment_date": 1, "remaining_tenure": 1}
+        )
+        async for emi in emis:
+            next_payment = _as_date(emi["next_payment_date"])
+            for i in range(emi["remaining_tenure"]):
+                payment_date = next_payment + relativedelta(months=i)
+                if payment_date >= end_date:
+                    break
+                if payment_date >= today:
+                    events[payment_date].append(ForecastEvent(
+                        source=ForecastSource.EMI,
+                        name=emi["loan_name"],
+                        amount=to_rupees(emi["emi_amount"])
+                    ))
+        
+        # Goal contributions, spread evenly over the months left
+        goals = self.db.financial_goals.find(
+            {"user_id": user_id, "status": "In Progress"},
+            {"goal_name": 1, "target_amount": 1, "current_amount": 1, "deadline": 1}
+        )
+        first_of_next_month = today.replace(day=1) + relativedelta(months=1)
+        async for goal in goals:
+            remaining = goal["target_amount"] - goal["current_amount"]
+            deadline = _as_date(goal["deadline"])
+            if remaining <= 0 or deadline < today:
+                continue
+            
+            contribution_dates = []
+            contribution_date = today if today.day == 1 else first_of_next_month
+            while contribution_date <= deadline:
+                contribution_dates.append(contribution_date)
+                contribution_date += relativedelta(months=1)
+            if not contribution_dates:
+                contribution_dates = [deadline]
+            
+            amount = to_rupees(divide(remaining, len(contribution_dates)))
+            for contribution_date in contribution_dates:
+                if contribution_date >= end_date:
+                    break
+                events[contribution_date].append(ForecastEvent(
+                    source=ForecastSource.GOAL,
+                    name=goal["goal_name"],
+                    amount=amount
+                ))
+        
+        # Daily balance projection, in paise
+        opening_balance = to_paise(await AnalyticsService().get_total_balances(user_id))
+        balance = opening_balance
+        lowest_balance = opening_balance
+        lowest_balance_date = None
+        total_outflow = 0
+        daily = []
+        
+        for offset in range(days):
+            day = today + timedelta(days=offset)
+            day_events = events.get(day, [])
+            outflow = sum(to_paise(event.amount) for event in day_events)
+            balance -= outflow
+            total_outflow += outflow
+            
+            if balance < lowest_balance:
+                lowest_balance = balance
+                lowest_balance_date = day
+            
+            daily.append(ForecastDay(
+                date=day, outflow=to_rupees(outflow), balance=to_rupees(balance), events=day_events
+            ))
+        
+        return CashFlowForecast(
+            start_date=today,
+            days=days,
+            opening_balance=to_rupees(opening_balance),
+            closing_balance=to_rupees(balance),
+            total_outflow=to_rupees(total_outflow),
+            lowest_balance=to_rupees(lowest_balance),
+            lowest_balance_date=lowest_balance_date,
+            recurring_expenses=sorted(recurring, key=lambda r: r.next_date),
+            daily=daily
+        )
@@ -1,12 +1,21 @@
 """
 Financial goal service
 """
-from datetime import datetime
+from datetime import datetime, date, timedelta
 from bson import ObjectId
 from fastapi import HTTPException, status
-from typing import List
-from ..models.financial_goal import FinancialGoalCreate, FinancialGoalUpdate, FinancialGoalResponse, GoalStatus
+from typing import Any, Dict, List
+from pymongo import ReturnDocument
+from ..models.financial_goal import (
+    FinancialGoalCreate, FinancialGoalUpdate, FinancialGoalResponse, GoalStatus, GoalProjection
+)
 from ..database import get_database
+from ..utils.fields import ALL_FIELDS, FieldSelection
+from ..utils.money import from_storage, to_rupees, to_storage
+
+# Number of current_amount snapshots kept per goal for velocity estimates
+CONTRIBUTION_HISTORY_LIMIT = 24
+DAYS_PER_MONTH = 30.44
 
 
 class FinancialGoalService:
@@ -25,7 +34,7 @@ class FinancialGoalService:
     
     async def create_goal(self, user_id: str, goal_data: FinancialGoalCreate) -> FinancialGoalResponse:
         """Create a new financial goal"""
-        goal_dict = goal_data.dict()
+        goal_dict = to_storage(goal_data.dict(), FinancialGoalCreate)
         goal_dict["user_id"] = user_id
         goal_dict["status"] = GoalStatus.IN_PROGRESS
         goal_dict["progress_percentage"] = self._calculate_progress(
@@ -34,29 +43,37 @@ class FinancialGoalService:
         )
         goal_dict["created_at"] = datetime.utcnow()
         goal_dict["updated_at"] = datetime.utcnow()
+        goal_dict["contribution_history"] = [
+            {"amount": goal_dict["current_amount"], "recorded_at": goal_dict["created_at"]}
+        ]
         
         result = await self.collection.insert_one(goal_dict)
         goal_dict["_id"] = str(result.inserted_id)
         
-        return FinancialGoalResponse(**goal_dict, id=str(result.inserted_id))
+        return FinancialGoalResponse(
+            **from_storage(goal_dict, FinancialGoalResponse), id=str(result.inserted_id)
+        )
     
-    async def get_goals(self, user_id: str) -> List[FinancialGoalResponse]:
+    async def get_goals(self, user_id: str,
+                        fields: FieldSelection = ALL_FIELDS) -> List[FinancialGoalResponse]:
         """Get all financial goals for a user"""
         goals = []
-        cursor = self.collection.find({"user_id": user_id})
+        model = fields.model(FinancialGoalResponse)
+        cursor = self.collection.find({"user_id": user_id}, fields.projection(FinancialGoalResponse))
         
         async for goal in cursor:
             goal["_id"] = str(goal["_id"])
-            goals.append(FinancialGoalResponse(**goal, id=goal["_id"]))
+            goals.append(model(**from_storage(goal, FinancialGoalResponse), id=goal["_id"]))
         
         return goals
     
-    async def get_goal_by_id(self, user_id: str, goal_id: str) -> FinancialGoalResponse:
+    async def get_goal_by_id(self, user_id: str, goal_id: str,
+                             fields: FieldSelection = ALL_FIELDS) -> FinancialGoalResponse:
         """Get specific financial goal"""
         goal = await self.collection.find_one({
             "_id": ObjectId(goal_id),
             "user_id": user_id
-        })
+        }, fields.projection(FinancialGoalResponse))
         
         if not goal:
             raise HTTPException(
@@ -64,31 +81,73 @@ class FinancialGoalService:
                 detail="Goal not found"
             )
         
-        return FinancialGoalResponse(**goal, id=str(goal["_id"]))
+        goal["_id"] = str(goal["_id"])
+        
+        return fields.model(FinancialGoalResponse)(**from_storage(goal, FinancialGoalResponse), id=goal["_id"])
     
     async def update_goal(self, user_id: str, goal_id: str, 
                         goal_update: FinancialGoalUpdate) -> FinancialGoalResponse:
-        """Update financial goal"""
-        # Get current goal to recalculate progress
-        current_goal = await self.get_goal_by_id(user_id, goal_id)
-        
-        update_data = {k: v for k, v in goal_update.dict().items() if v is not None}
+        """
+        Update financial goal
         
-        # Recalculate progress if amounts changed
-        current_amount = update_data.get("current_amount", current_goal.current_amount)
-        target_amount = update_data.get("target_amount", current_goal.target_amount)
-        update_data["progress_percentage"] = self._calculate_progress(current_amount, target_amount)
+        Progress and status are recomputed server-side in a single pipeline
+        update, so no read is needed before the write.
+        """
+        now = datetime.utcnow()
+        update_data = to_storage(
+            {k: v for k, v in goal_update.dict().items() if v is not None}, FinancialGoalUpdate
+        )
         
-        # Auto-update status if goal is achieved
-        if update_data["progress_percentage"] >= 100:
-            update_data["status"] = GoalStatus.ACHIEVED
+        # $literal keeps user supplied values from being parsed as expressions
+        pipeline = [
+            {"$set": {
+                **{k: {"$literal": v} for k, v in update_data.items()},
+                "updated_at": now
+            }},
+            {"$set": {
+                "progress_percentage": {
+                    "$cond": [
+                        {"$gt": ["$target_amount", 0]},
+                        {"$min": [
+                            {"$round": [
+                                {"$multiply": [{"$divide": ["$current_amount", "$target_amount"]}, 100]},
+                                2
+                            ]},
+                            100.0
+                        ]},
+                        0.0
+                    ]
+                }
+            }},
+            # Auto-update status if goal is achieved
+            {"$set": {
+                "status": {
+                    "$cond": [
+                        {"$gte": ["$progress_percentage", 100]},
+                        GoalStatus.ACHIEVED.value,
+                        "$status"
+                    ]
+                }
+            }}
+        ]
         
-        update_data["updated_at"] = datetime.utcnow()
+        if "current_amount" in update_data:
+            pipeline.append({"$set": {
+                "contribution_history": {
+                    "$slice": [
+                        {"$concatArrays": [
+                            {"$ifNull": ["$contribution_history", []]},
+                            [{"amount": "$current_amount", "recorded_at": now}]
+                        ]},
+                        -CONTRIBUTION_HISTORY_LIMIT
+                    ]
+                }
+            }})
         
         result = await self.collection.find_one_and_update(
             {"_id": ObjectId(goal_id), "user_id": user_id},
-            {"$set": update_data},
-            return_document=True
+            pipeline,
+            return_document=ReturnDocument.AFTER
         )
         
         if not result:
@@ -97,7 +156,8 @@ class FinancialGoalService:
                 detail="Goal not found"
             )
         
-        return FinancialGoalResponse(**result, id=str(result["_id"]))
+        result["_id"] = str(result["_id"])
+        return FinancialGoalResponse(**from_storage(result, FinancialGoalResponse), id=result["_id"])
     
     async def delete_goal(self, user_id: str, goal_id: str) -> dict:
         """Delete financial goal"""
@@ -113,3 +173,72 @@ class FinancialGoalService:
             )
         
         return {"message": "Goal deleted successfully"}
+    
+    def _monthly_velocity(self, goal: Dict[str, Any], today: date) -> float:
+        """
+        Estimate average monthly contribution in paise from recorded snapshots
+        
+        Progress since the oldest snapshot is spread over the time up to
+        today, not up to the newest snapshot, so a goal that stopped
+        receiving money slows down instead of keeping its old pace. A
+        single snapshot only records the starting amount.
+        """
+        history = goal.get("contribution_history")
+        
+        if history:
+            start, gained = history[0]["recorded_at"], goal["current_amount"] - history[0]["amount"]
+        else:
+            # Goals created before snapshots existed: assume saving started at creation
+            start, gained = goal["created_at"], goal["current_amount"]
+        elapsed_days = (today - start.date()).days
+        
+        if elapsed_days < 1 or gained <= 0:
+            return 0.0
+        
+        return gained / elapsed_days * DAYS_PER_MONTH
+    
+    def _project_goal(self, goal: Dict[str, Any], today: date) -> GoalProjection:
+        """Project completion date and required savings for a single goal"""
+        deadline = goal["deadline"]
+        if isinstance(deadline, datetime):
+            deadline = deadline.date()
+        
+        remaining = max(goal["target_amount"] - goal["current_amount"], 0)
+        velocity = self._monthly_velocity(goal, today)
+        
+        if remaining == 0:
+            completion_date = today
+        elif velocity > 0:
+            completion_date = today + timedelta(days=round(remaining / velocity * DAYS_PER_MONTH))
+        else:
+            completion_date = None
+        
+        months_left = (deadline - today).days / DAYS_PER_MONTH
+        required_monthly = remaining / months_left if months_left >= 1 else remaining
+        
+        return GoalProjection(
+            goal_id=str(goal["_id"]),
+            goal_name=goal["goal_name"],
+            status=goal["status"],
+            target_amount=to_rupees(goal["target_amount"]),
+            current_amount=to_rupees(goal["current_amount"]),
+            remaining_amount=to_rupees(remaining),
+            deadline=deadline,
+            monthly_velocity=to_rupees(velocity),
+            projected_completion_date=completion_date,
+            required_monthly_amount=to_rupees(required_monthly),
+            on_track=completion_date is not None and completion_date <= deadline
+        )
+    
+    async def get_projections(self, user_id: str) -> List[GoalProjection]:
+        """Project every goal of a user from a single query"""
+        today = date.today()
+        cursor = self.collection.find(
+            {"user_id": user_id},
+            {
+                "goal_name": 1, "status": 1, "target_amount": 1, "current_amount": 1,
+                "deadline": 1, "created_at": 1, "contribution_history": 1
+            }
+        )
+        
+        return [self._project_goal(goal, today) async for goal in cursor]
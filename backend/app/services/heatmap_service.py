@@ -0,0 +1,127 @@
+"""
+Daily spending heatmaps cached per user and window
+
+A window is built with one aggregation and kept in spending_heatmaps as a
+map of UTC day to total (paise) and count. Expense writes increment the
+day they touch in every cached window covering it. Cached windows expire
+after HEATMAP_CACHE_TTL_SECONDS, which also bounds how long a write
+racing a build can be missing.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Tuple
+from pymongo import ReturnDocument
+from ..database import HEATMAP_CACHE_TTL_SECONDS, get_database
+from ..models.analytics import SpendingHeatmap
+from ..utils.money import to_rupees
+
+DAY_FORMAT = "%Y-%m-%d"
+
+
+def heatmap_window(start: Optional[date] = None) -> Tuple[date, date]:
+    """
+    12-month window starting at start
+    
+    Defaults to the window ending with the current month.
+    """
+    if start is None:
+        today = date.today()
+        start = date(today.year - 1, today.month, 1)
+        start = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    try:
+        end = start.replace(year=start.year + 1)
+    except ValueError:
+        # Windows starting on 29 February end on 1 March
+        end = date(start.year + 1, 3, 1)
+    return start, end
+
+
+class SpendingHeatmapService:
+    """Daily spending totals for calendar heatmaps"""
+    
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.spending_heatmaps
+    
+    async def get_heatmap(self, user_id: str, start: Optional[date] = None) -> SpendingHeatmap:
+        """Get daily spending for the 12 months from start, from cache when built"""
+        start, end = heatmap_window(start)
+        heatmap = await self.collection.find_one(
+            {"user_id": user_id, "start": datetime.combine(start, datetime.min.time())}
+        )
+        if not heatmap:
+            heatmap = await self._build(user_id, start, end)
+        
+        offsets, totals, counts = [], [], []
+        for day, value in sorted(heatmap["days"].items()):
+            if value["count"] <= 0:
+                continue
+            offsets.append((datetime.strptime(day, DAY_FORMAT).date() - start).days)
+            totals.append(to_rupees(value["total"]))
+            counts.append(value["count"])
+        
+        return SpendingHeatmap(
+            start=start,
+            end=end,
+            offsets=offsets,
+            totals=totals,
+            counts=counts,
+            max_total=max(totals, default=0.0)
+        )
+    
+    async def _build(self, user_id: str, start: date, end: date) -> Dict[str, Any]:
+        """Aggregate a window from expenses and cache it"""
+        window_start = datetime.combine(start, datetime.min.time())
+        window_end = datetime.combine(end, datetime.min.time())
+        pipeline = [
+            {
+                "$match": {
+                    "user_id": user_id,
+                    "date": {"$gte": window_start, "$lt": window_end}
+                }
+            },
+            {
+                "$group": {
+                    "_id": {"$dateToString": {"format": DAY_FORMAT, "date": "$date"}},
+                    "total": {"$sum": "$amount"},
+                    "count": {"$sum": 1}
+                }
+            }
+        ]
+        days = {
+            item["_id"]: {"total": item["total"], "count": item["count"]}
+            async for item in self.db.expenses.aggregate(pipeline)
+        }
+        
+        return await self.collection.find_one_and_update(
+            {"user_id": user_id, "start": window_start},
+            {"$set": {"end": window_end, "days": days, "built_at": datetime.utcnow()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    
+    async def apply_expense_change(self, user_id: str, previous: Optional[Dict[str, Any]],
+                                   current: Optional[Dict[str, Any]]) -> None:
+        """
+        Apply an expense insert, update or delete to the cached windows
+        
+        Args:
+            previous: Expense before the write (None for inserts)
+            current: Expense after the write (None for deletes)
+        """
+        changes = []
+        if previous:
+            changes.append((previous["date"], -previous["amount"], -1))
+        if current:
+            changes.append((current["date"], current["amount"], 1))
+        if len(changes) == 2 and changes[0][0].date() == changes[1][0].date():
+            changes = [(current["date"], current["amount"] - previous["amount"], 0)]
+            if changes[0][1] == 0:
+                return
+        
+        for moment, amount, count in changes:
+            day = moment.strftime(DAY_FORMAT)
+            day_start = datetime.combine(moment.date(), datetime.min.time())
+            await self.collection.update_many(
+                {"user_id": user_id, "start": {"$lte": day_start}, "end": {"$gt": day_start}},
+                {"$inc": {f"days.{day}.total": amount, f"days.{day}.count": count}}
+            )
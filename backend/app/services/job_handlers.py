@@ -0,0 +1,103 @@
+"""
+Background job handlers and periodic job scheduling
+"""
+import asyncio
+from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
+from typing import Any, Dict
+from ..config import settings
+from .categorization_service import CategorizationService
+from .forecast_service import ForecastService
+from .job_service import JobQueue, job_handler
+from .reminder_service import ReminderService
+from .rollup_service import SpendingRollupService
+from .statement_service import StatementService
+
+# Daily EMI reminders go out at 09:00 IST
+REMINDER_TIME_UTC = timedelta(hours=3, minutes=30)
+
+# Month-close statements start 30 minutes into the 1st (UTC)
+MONTH_CLOSE_DELAY = timedelta(minutes=30)
+
+SCHEDULER_INTERVAL_SECONDS = 60
+
+
+@job_handler("reminders.send_emi")
+async def send_emi_reminders(payload: Dict[str, Any]) -> None:
+    """Send WhatsApp reminders for EMIs due soon"""
+    stats = await ReminderService().send_emi_reminders()
+    print(f"✅ EMI reminders: {stats['sent']} sent, {stats['failed']} failed")
+
+
+@job_handler("rollups.rebuild")
+async def rebuild_rollups(payload: Dict[str, Any]) -> None:
+    """Rebuild a user's monthly spending rollups"""
+    await SpendingRollupService().rebuild(payload["user_id"])
+
+
+@job_handler("forecast.rebuild")
+async def rebuild_forecast(payload: Dict[str, Any]) -> None:
+    """Rebuild a user's recurring expense patterns"""
+    await ForecastService().rebuild_patterns(payload["user_id"])
+
+
+@job_handler("categorization.recategorize")
+async def recategorize_history(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-apply a user's current rules to their history"""
+    result = await CategorizationService().recategorize_history(payload["user_id"])
+    return result.dict()
+
+
+@job_handler("statements.generate")
+async def generate_statement(payload: Dict[str, Any]) -> None:
+    """Generate one user's statement for a month"""
+    await StatementService().generate(payload["user_id"], payload["year"], payload["month"])
+
+
+@job_handler("statements.close_month")
+async def close_month(payload: Dict[str, Any]) -> None:
+    """Generate every user's statement for a closed month"""
+    stats = await StatementService().generate_all(payload["year"], payload["month"])
+    print(f"✅ Statements {payload['year']}-{payload['month']:02d}: "
+          f"{stats['generated']} generated, {stats['failed']} failed")
+
+
+async def enqueue_periodic_jobs(now: datetime) -> None:
+    """
+    Enqueue the periodic jobs that are due
+    
+    Each run is keyed by its period, so calling this repeatedly, or from
+    several replicas, enqueues every run once.
+    """
+    job_queue = JobQueue()
+    today = datetime(now.year, now.month, now.day)
+    
+    if now >= today + REMINDER_TIME_UTC:
+        await job_queue.enqueue(
+            "reminders.send_emi",
+            queue="notifications",
+            dedupe_key=f"reminders.send_emi:{today.date().isoformat()}",
+            dedupe_until=today + timedelta(days=1)
+        )
+    
+    if settings.STATEMENTS_AT_MONTH_CLOSE and now >= today.replace(day=1) + MONTH_CLOSE_DELAY:
+        last_month = today.replace(day=1) - timedelta(days=1)
+        await job_queue.enqueue(
+            "statements.close_month",
+            {"year": last_month.year, "month": last_month.month},
+            queue="statements",
+            dedupe_key=f"statements.close_month:{last_month.year}-{last_month.month:02d}",
+            dedupe_until=today.replace(day=1) + relativedelta(months=1)
+        )
+
+
+async def run_job_scheduler() -> None:
+    """Enqueue periodic jobs once a minute until cancelled"""
+    while True:
+        try:
+            await enqueue_periodic_jobs(datetime.utcnow())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Periodic job scheduling failed: {e}")
+        await asyncio.sleep(SCHEDULER_INTERVAL_SECONDS)
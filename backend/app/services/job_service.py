@@ -0,0 +1,359 @@
+"""
+Persistent background job queue backed by MongoDB
+"""
+import asyncio
+import os
+import socket
+import traceback
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi import HTTPException, status
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from ..config import settings
+from ..models.job import JobStatus, JobResponse, QueueStats, JobQueueStats
+from ..database import get_database
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+# Registered handlers by job name
+_handlers: Dict[str, JobHandler] = {}
+
+# Finished jobs are kept this long for inspection
+FINISHED_JOB_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Retry backoff: RETRY_BASE_SECONDS * 2^(attempt - 1), capped
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 60 * 60
+
+# Window used for throughput figures
+STATS_WINDOW_MINUTES = 15
+
+
+def job_handler(name: str) -> Callable[[JobHandler], JobHandler]:
+    """Register a coroutine function as the handler of a job name"""
+    def register(handler: JobHandler) -> JobHandler:
+        _handlers[name] = handler
+        return handler
+    return register
+
+
+class JobQueue:
+    """
+    Job storage and leasing
+    
+    A worker leases a job with one atomic find_one_and_update, which
+    marks it running until its lease expires. Jobs whose lease runs out
+    (the worker died or hung) are put back on the queue by a sweep.
+    """
+    
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.jobs
+    
+    async def enqueue(self, name: str, payload: Optional[Dict[str, Any]] = None, queue: str = "default",
+                      priority: int = 0, run_at: Optional[datetime] = None,
+                      max_attempts: Optional[int] = None, dedupe_key: Optional[str] = None,
+                      dedupe_until: Optional[datetime] = None, user_id: Optional[str] = None) -> str:
+        """
+        Add a job to a queue
+        
+        Args:
+            name: Registered handler name
+            payload: Handler arguments, must be BSON serializable
+            queue: Queue name; workers choose which queues they serve
+            priority: Higher runs first
+            run_at: Earliest start, defaults to now
+            max_attempts: Attempts before the job is marked dead
+            dedupe_key: Jobs with the same key are enqueued only once
+            dedupe_until: When the key stops needing to block re-enqueues,
+                typically the end of the period it guards; without it a
+                deduplicated job is kept forever
+            user_id: Owner, allowed to read the job's status
+        
+        Returns:
+            ID of the new job, or of the existing job with the same dedupe_key
+        """
+        now = datetime.utcnow()
+        job = {
+            "queue": queue,
+            "name": name,
+            "payload": payload or {},
+            "priority": priority,
+            "status": JobStatus.QUEUED,
+            "attempts": 0,
+            "max_attempts": max_attempts or settings.JOB_MAX_ATTEMPTS,
+            "run_at": run_at or now,
+            "lease_until": None,
+            "worker_id": None,
+            "last_error": None,
+            "user_id": user_id,
+            "created_at": now
+        }
+        if dedupe_key:
+            job["dedupe_key"] = dedupe_key
+            job["dedupe_until"] = dedupe_until
+        
+        while True:
+            try:
+                result = await self.collection.insert_one(job)
+            except DuplicateKeyError:
+                existing = await self.collection.find_one({"dedupe_key": dedupe_key}, {"_id": 1})
+                if existing:
+                    return str(existing["_id"])
+                # The job holding the key expired since the insert; try again
+                continue
+            return str(result.inserted_id)
+    
+    async def lease(self, queue: str, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically take the highest priority ready job of a queue"""
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"queue": queue, "status": JobStatus.QUEUED, "run_at": {"$lte": now}},
+            {
+                "$set": {
+                    "status": JobStatus.RUNNING,
+                    "worker_id": worker_id,
+                    "lease_until": now + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT_SECONDS),
+                    "started_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("priority", -1), ("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+    
+    async def extend_lease(self, job_id: ObjectId, worker_id: str) -> bool:
+        """Push back the lease of a job still being worked on"""
+        result = await self.collection.update_one(
+            {"_id": job_id, "worker_id": worker_id, "status": JobStatus.RUNNING},
+            {"$set": {
+                "lease_until": datetime.utcnow() + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT_SECONDS)
+            }}
+        )
+        return result.modified_count == 1
+    
+    def _finished(self, job: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        """Fields set when a job finishes"""
+        fields = {"lease_until": None, "finished_at": now}
+        expire_at = now + timedelta(seconds=FINISHED_JOB_TTL_SECONDS)
+        if "dedupe_key" not in job:
+            fields["expire_at"] = expire_at
+        elif job.get("dedupe_until"):
+            # Deduplicated jobs are kept while their key must block re-enqueues
+            fields["expire_at"] = max(expire_at, job["dedupe_until"])
+        return fields
+    
+    async def complete(self, job: Dict[str, Any], worker_id: str,
+                       result: Optional[Dict[str, Any]] = None) -> None:
+        """Mark a leased job as succeeded, keeping what its handler returned"""
+        await self.collection.update_one(
+            {"_id": job["_id"], "worker_id": worker_id, "status": JobStatus.RUNNING},
+            {"$set": {"status": JobStatus.SUCCEEDED, "result": result, **self._finished(job, datetime.utcnow())}}
+        )
+    
+    async def fail(self, job: Dict[str, Any], worker_id: str, error: str) -> None:
+        """Schedule a retry with exponential backoff, or mark the job dead"""
+        now = datetime.utcnow()
+        if job["attempts"] < job["max_attempts"]:
+            delay = min(RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1), RETRY_MAX_SECONDS)
+            update = {
+                "status": JobStatus.QUEUED,
+                "run_at": now + timedelta(seconds=delay),
+                "lease_until": None,
+                "worker_id": None,
+                "last_error": error
+            }
+        else:
+            update = {"status": JobStatus.DEAD, "last_error": error, **self._finished(job, now)}
+        await self.collection.update_one(
+            {"_id": job["_id"], "worker_id": worker_id, "status": JobStatus.RUNNING},
+            {"$set": update}
+        )
+    
+    async def requeue_expired(self) -> int:
+        """
+        Return jobs with an expired lease to their queue
+        
+        A lease runs out when the job crashed or hung its worker, which
+        counts as a failed attempt: jobs already on their last attempt are
+        marked dead instead, so they cannot take down workers forever.
+        """
+        now = datetime.utcnow()
+        expired = {"status": JobStatus.RUNNING, "lease_until": {"$lt": now}}
+        
+        dead = 0
+        exhausted = self.collection.find({**expired, "$expr": {"$gte": ["$attempts", "$max_attempts"]}})
+        async for job in exhausted:
+            result = await self.collection.update_one(
+                {"_id": job["_id"], **expired},
+                {"$set": {"status": JobStatus.DEAD, "last_error": "Lease expired", **self._finished(job, now)}}
+            )
+            dead += result.modified_count
+        
+        result = await self.collection.update_many(
+            {**expired, "$expr": {"$lt": ["$attempts", "$max_attempts"]}},
+            {"$set": {
+                "status": JobStatus.QUEUED,
+                "run_at": now,
+                "lease_until": None,
+                "worker_id": None,
+                "last_error": "Lease expired"
+            }}
+        )
+        return dead + result.modified_count
+    
+    async def get_job(self, job_id: str, user_id: Optional[str] = None) -> JobResponse:
+        """Get a job, optionally only if it belongs to a user"""
+        query: Dict[str, Any] = {"_id": ObjectId(job_id)}
+        if user_id is not None:
+            query["user_id"] = user_id
+        
+        job = await self.collection.find_one(query)
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
+            )
+        
+        job["_id"] = str(job["_id"])
+        return JobResponse(**job)
+    
+    async def get_stats(self) -> JobQueueStats:
+        """
+        Per-queue depth, throughput and lag
+        
+        Lag is the age of the oldest job that is ready to run, i.e. how far
+        the workers of a queue are behind.
+        """
+        now = datetime.utcnow()
+        window_start = now - timedelta(minutes=STATS_WINDOW_MINUTES)
+        pipeline = [
+            {"$match": {"$or": [
+                {"status": {"$in": [JobStatus.QUEUED, JobStatus.RUNNING, JobStatus.DEAD]}},
+                {"status": JobStatus.SUCCEEDED, "finished_at": {"$gte": window_start}}
+            ]}},
+            {"$group": {
+                "_id": "$queue",
+                "queued": {"$sum": {"$cond": [{"$eq": ["$status", JobStatus.QUEUED]}, 1, 0]}},
+                "ready": {"$sum": {"$cond": [
+                    {"$and": [{"$eq": ["$status", JobStatus.QUEUED]}, {"$lte": ["$run_at", now]}]}, 1, 0
+                ]}},
+                "running": {"$sum": {"$cond": [{"$eq": ["$status", JobStatus.RUNNING]}, 1, 0]}},
+                "dead": {"$sum": {"$cond": [{"$eq": ["$status", JobStatus.DEAD]}, 1, 0]}},
+                "succeeded": {"$sum": {"$cond": [{"$eq": ["$status", JobStatus.SUCCEEDED]}, 1, 0]}},
+                "oldest_ready": {"$min": {"$cond": [
+                    {"$and": [{"$eq": ["$status", JobStatus.QUEUED]}, {"$lte": ["$run_at", now]}]},
+                    "$run_at",
+                    None
+                ]}}
+            }},
+            {"$sort": {"_id": 1}}
+        ]
+        
+        queues = []
+        async for item in self.collection.aggregate(pipeline):
+            queues.append(QueueStats(
+                queue=item["_id"],
+                queued=item["queued"],
+                ready=item["ready"],
+                running=item["running"],
+                dead=item["dead"],
+                succeeded_last_window=item["succeeded"],
+                throughput_per_minute=round(item["succeeded"] / STATS_WINDOW_MINUTES, 2),
+                lag_seconds=(now - item["oldest_ready"]).total_seconds() if item["oldest_ready"] else 0.0
+            ))
+        
+        return JobQueueStats(window_minutes=STATS_WINDOW_MINUTES, queues=queues)
+
+
+class JobWorker:
+    """
+    Pool of coroutines running jobs from a set of queues
+    
+    Each slot leases one job at a time, trying queues in the order given,
+    and backs off while the queues are empty. Running jobs keep their lease
+    alive, so only jobs of a dead worker become visible again.
+    """
+    
+    def __init__(self, queues: Optional[List[str]] = None, concurrency: Optional[int] = None):
+        self.queues = queues or settings.JOB_QUEUES
+        self.concurrency = concurrency or settings.JOB_CONCURRENCY
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self.job_queue = JobQueue()
+    
+    async def _heartbeat(self, job_id: ObjectId) -> None:
+        """Extend a job's lease until cancelled"""
+        while True:
+            await asyncio.sleep(settings.JOB_VISIBILITY_TIMEOUT_SECONDS / 2)
+            await self.job_queue.extend_lease(job_id, self.worker_id)
+    
+    async def _run(self, job: Dict[str, Any]) -> None:
+        """Run one leased job and record the outcome"""
+        handler = _handlers.get(job["name"])
+        if handler is None:
+            await self.job_queue.fail({**job, "attempts": job["max_attempts"]}, self.worker_id,
+                                      f"No handler registered for {job['name']}")
+            return
+        
+        heartbeat = asyncio.create_task(self._heartbeat(job["_id"]))
+        try:
+            result = await handler(job["payload"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await self.job_queue.fail(job, self.worker_id, traceback.format_exc(limit=5))
+        else:
+            await self.job_queue.complete(job, self.worker_id, result if isinstance(result, dict) else None)
+        finally:
+            heartbeat.cancel()
+    
+    async def _slot(self) -> None:
+        """
+        Lease and run jobs until cancelled
+        
+        Database errors back off like an empty queue instead of ending the
+        slot; a job interrupted by one is retried once its lease expires.
+        """
+        idle = settings.JOB_POLL_INTERVAL_SECONDS
+        while True:
+            try:
+                job = None
+                for queue in self.queues:
+                    job = await self.job_queue.lease(queue, self.worker_id)
+                    if job:
+                        break
+                
+                if job is not None:
+                    idle = settings.JOB_POLL_INTERVAL_SECONDS
+                    await self._run(job)
+                    continue
+            except Exception as e:
+                print(f"⚠️ Job worker slot failed: {e}")
+            
+            await asyncio.sleep(idle)
+            idle = min(idle * 2, settings.JOB_POLL_INTERVAL_SECONDS * 10)
+    
+    async def _sweeper(self) -> None:
+        """Periodically requeue jobs whose lease expired"""
+        while True:
+            try:
+                await self.job_queue.requeue_expired()
+            except Exception as e:
+                print(f"⚠️ Job lease sweep failed: {e}")
+            await asyncio.sleep(settings.JOB_VISIBILITY_TIMEOUT_SECONDS / 2)
+    
+    async def run(self) -> None:
+        """Run the worker pool until cancelled"""
+        # Registers the built-in handlers
+        from . import job_handlers  # noqa: F401
+        
+        print(f"✅ Job worker {self.worker_id} serving {', '.join(self.queues)} ({self.concurrency} slots)")
+        tasks = [asyncio.create_task(self._slot()) for _ in range(self.concurrency)]
+        tasks.append(asyncio.create_task(self._sweeper()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -3,10 +3,14 @@ Liability service
 """
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 from fastapi import HTTPException, status
 from typing import List
 from ..models.liability import LiabilityCreate, LiabilityUpdate, LiabilityResponse
 from ..database import get_database
+from ..utils.fields import ALL_FIELDS, FieldSelection
+from ..utils.money import from_storage, to_storage
+from .dashboard_stream_service import publish_change
 
 
 class LiabilityService:
@@ -18,7 +22,7 @@ class LiabilityService:
     
     async def create_liability(self, user_id: str, liability_data: LiabilityCreate) -> LiabilityResponse:
         """Create a new liability"""
-        liability_dict = liability_data.dict()
+        liability_dict = to_storage(liability_data.dict(), LiabilityCreate)
         liability_dict["user_id"] = user_id
         liability_dict["status"] = "Active"
         liability_dict["created_at"] = datetime.utcnow()
@@ -26,26 +30,30 @@ class LiabilityService:
         
         result = await self.collection.insert_one(liability_dict)
         liability_dict["_id"] = str(result.inserted_id)
+        publish_change(user_id, "liabilities", None, liability_dict)
         
-        return LiabilityResponse(**liability_dict, id=str(result.inserted_id))
+        return LiabilityResponse(**from_storage(liability_dict, LiabilityResponse), id=str(result.inserted_id))
     
-    async def get_liabilities(self, user_id: str) -> List[LiabilityResponse]:
+    async def get_liabilities(self, user_id: str,
+                              fields: FieldSelection = ALL_FIELDS) -> List[LiabilityResponse]:
         """Get all liabilities for a user"""
         liabilities = []
-        cursor = self.collection.find({"user_id": user_id})
+        model = fields.model(LiabilityResponse)
+        cursor = self.collection.find({"user_id": user_id}, fields.projection(LiabilityResponse))
         
         async for liability in cursor:
             liability["_id"] = str(liability["_id"])
-            liabilities.append(LiabilityResponse(**liability, id=liability["_id"]))
+            liabilities.append(model(**from_storage(liability, LiabilityResponse), id=liability["_id"]))
         
         return liabilities
     
-    async def get_liability_by_id(self, user_id: str, liability_id: str) -> LiabilityResponse:
+    async def get_liability_by_id(self, user_id: str, liability_id: str,
+                                  fields: FieldSelection = ALL_FIELDS) -> LiabilityResponse:
         """Get specific liability"""
         liability = await self.collection.find_one({
             "_id": ObjectId(liability_id),
             "user_id": user_id
-        })
+        }, fields.projection(LiabilityResponse))
         
         if not liability:
             raise HTTPException(
@@ -53,39 +61,49 @@ class LiabilityService:
                 detail="Liability not found"
             )
         
-        return LiabilityResponse(**liability, id=str(liability["_id"]))
+        liability["_id"] = str(liability["_id"])
+        
+        return fields.model(LiabilityResponse)(
+            **from_storage(liability, LiabilityResponse), id=liability["_id"]
+        )
     
     async def update_liability(self, user_id: str, liability_id: str, 
                              liability_update: LiabilityUpdate) -> LiabilityResponse:
         """Update liability"""
-        update_data = {k: v for k, v in liability_update.dict().items() if v is not None}
+        update_data = to_storage(
+            {k: v for k, v in liability_update.dict().items() if v is not None}, LiabilityUpdate
+        )
         update_data["updated_at"] = datetime.utcnow()
         
-        result = await self.collection.find_one_and_update(
+        previous = await self.collection.find_one_and_update(
             {"_id": ObjectId(liability_id), "user_id": user_id},
             {"$set": update_data},
-            return_document=True
+            return_document=ReturnDocument.BEFORE
         )
         
-        if not result:
+        if not previous:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Liability not found"
             )
         
-        return LiabilityResponse(**result, id=str(result["_id"]))
+        result = {**previous, **update_data}
+        publish_change(user_id, "liabilities", previous, result)
+        
+        return LiabilityResponse(**from_storage(result, LiabilityResponse), id=str(result["_id"]))
     
     async def delete_liability(self, user_id: str, liability_id: str) -> dict:
         """Delete liability"""
-        result = await self.collection.delete_one({
+        deleted = await self.collection.find_one_and_delete({
             "_id": ObjectId(liability_id),
             "user_id": user_id
         })
         
-        if result.deleted_count == 0:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Liability not found"
             )
         
+        publish_change(user_id, "liabilities", deleted, None)
         return {"message": "Liability deleted successfully"}
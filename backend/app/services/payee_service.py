@@ -0,0 +1,186 @@
+"""
+Per-user payee counters maintained on UPI transaction writes
+
+Successful payments are counted per payee twice: all time (period "all")
+and per UTC month (period "YYYY-MM"). The top payees of all time or of
+one month are then a single indexed, sorted read; longer ranges sum the
+monthly counters instead of grouping the transaction history. Totals are
+integer paise.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import DESCENDING, UpdateOne
+from ..database import get_database
+from ..models.upi_transaction import PayeeSort, PayeeStats, TopPayees, TransactionStatus
+from ..utils.money import from_storage
+from ..utils.rebuild import replace_rebuilt
+from .upi_store import get_upi_store
+
+ALL_TIME = "all"
+
+SORT_FIELDS = {PayeeSort.AMOUNT: "total", PayeeSort.COUNT: "count"}
+
+
+def _period(moment: datetime) -> str:
+    """Monthly counter a payment made at moment belongs to"""
+    return f"{moment.year:04d}-{moment.month:02d}"
+
+
+def _succeeded(transaction: Dict[str, Any]) -> bool:
+    return getattr(transaction["status"], "value", transaction["status"]) == TransactionStatus.SUCCESS.value
+
+
+class PayeeStatsService:
+    """Per user, per payee payment totals and counts"""
+    
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.payee_stats
+        self.state = self.db.payee_stats_state
+    
+    async def _ensure_built(self, user_id: str) -> bool:
+        """Build a user's counters on first use; returns whether they already existed"""
+        if await self.state.find_one({"user_id": user_id}, {"_id": 1}):
+            return True
+        await self.rebuild(user_id)
+        return False
+    
+    async def apply_transactions(self, user_id: str, transactions: List[Dict[str, Any]],
+                                 deleted: bool = False) -> None:
+        """
+        Count newly stored transactions, or take deleted ones back out
+        
+        Only successful payments are counted. All counters a write touches
+        are updated in one bulk write.
+        """
+        transactions = [transaction for transaction in transactions if _succeeded(transaction)]
+        if not transactions:
+            return
+        if not await self._ensure_built(user_id):
+            # The rebuild already reflects this write
+            return
+        
+        sign = -1 if deleted else 1
+        deltas: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for transaction in sorted(transactions, key=lambda item: item["timestamp"]):
+            for period in (ALL_TIME, _period(transaction["timestamp"])):
+                delta = deltas.setdefault((period, transaction["payee_upi"]), {"total": 0, "count": 0})
+                delta["total"] += sign * transaction["amount"]
+                delta["count"] += sign
+                delta["payee_name"] = transaction["payee_name"]
+                delta["last_paid_at"] = transaction["timestamp"]
+        
+        operations = []
+        for (period, payee_upi), delta in deltas.items():
+            update = {"$inc": {"total": delta["total"], "count": delta["count"]}}
+            if not deleted:
+                update["$set"] = {"payee_name": delta["payee_name"]}
+                update["$max"] = {"last_paid_at": delta["last_paid_at"]}
+            operations.append(UpdateOne(
+                {"user_id": user_id, "period": period, "payee_upi": payee_upi}, update, upsert=not deleted
+            ))
+        await self.collection.bulk_write(operations, ordered=False)
+        
+        if deleted:
+            await self.collection.delete_many({"user_id": user_id, "count": {"$lte": 0}})
+    
+    async def get_top_payees(self, user_id: str, sort: PayeeSort = PayeeSort.AMOUNT, limit: int = 10,
+                             start: Optional[date] = None, end: Optional[date] = None) -> TopPayees:
+        """
+        Get the top payees by amount paid or number of payments
+        
+        Without start and end the ranking is all time. Otherwise it covers
+        the whole months from the month of start up to end, exclusive and
+        rounded up to a month start.
+        """
+        await self._ensure_built(user_id)
+        field = SORT_FIELDS[sort]
+        
+        if start is None and end is None:
+            cursor = self.collection.find({"user_id": user_id, "period": ALL_TIME})
+            documents = await cursor.sort(field, DESCENDING).limit(limit).to_list(length=limit)
+        else:
+            if start is not None:
+                start = date(start.year, start.month, 1)
+            if end is not None and end.day != 1:
+                end = date(end.year + end.month // 12, end.month % 12 + 1, 1)
+            
+            # "all" sorts after every "YYYY-MM" period, so it is never in range
+            periods = {"$gte": _period(start) if start else "0000-00", "$lt": _period(end) if end else ALL_TIME}
+            single_month = start and end and (end.year - start.year) * 12 + end.month - start.month == 1
+            
+            if single_month:
+                cursor = self.collection.find({"user_id": user_id, "period": _period(start)})
+                documents = await cursor.sort(field, DESCENDING).limit(limit).to_list(length=limit)
+            else:
+                pipeline = [
+                    {"$match": {"user_id": user_id, "period": periods}},
+                    {"$sort": {"last_paid_at": 1}},
+                    {
+                        "$group": {
+                            "_id": "$payee_upi",
+                            "payee_name": {"$last": "$payee_name"},
+                            "total": {"$sum": "$total"},
+                            "count": {"$sum": "$count"},
+                            "last_paid_at": {"$max": "$last_paid_at"}
+                        }
+                    },
+                    {"$match": {"count": {"$gt": 0}}},
+                    {"$sort": {field: DESCENDING}},
+                    {"$limit": limit}
+                ]
+                documents = [
+                    {**item, "payee_upi": item["_id"]}
+                    async for item in self.collection.aggregate(pipeline)
+                ]
+        
+        return TopPayees(
+            sort=sort,
+            start=start,
+            end=end,
+            payees=[PayeeStats(**from_storage(document, PayeeStats)) for document in documents]
+        )
+    
+    async def rebuild(self, user_id: str) -> int:
+        """Rebuild a user's payee counters from transaction history"""
+        pipeline = [
+            {"$match": {"user_id": user_id, "status": TransactionStatus.SUCCESS.value}},
+            {"$sort": {"timestamp": 1}},
+            {
+                "$group": {
+                    "_id": {
+                        "payee_upi": "$payee_upi",
+                        "year": {"$year": "$timestamp"},
+                        "month": {"$month": "$timestamp"}
+                    },
+                    "payee_name": {"$last": "$payee_name"},
+                    "total": {"$sum": "$amount"},
+                    "count": {"$sum": 1},
+                    "last_paid_at": {"$max": "$timestamp"}
+                }
+            }
+        ]
+        
+        counters: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        async for item in get_upi_store().aggregate(pipeline):
+            payee_upi = item["_id"]["payee_upi"]
+            month = f"{item['_id']['year']:04d}-{item['_id']['month']:02d}"
+            for period in (month, ALL_TIME):
+                counter = counters.setdefault((period, payee_upi), {
+                    "user_id": user_id, "period": period, "payee_upi": payee_upi,
+                    "total": 0, "count": 0, "last_paid_at": item["last_paid_at"]
+                })
+                counter["total"] += item["total"]
+                counter["count"] += item["count"]
+                if item["last_paid_at"] >= counter["last_paid_at"]:
+                    counter["last_paid_at"] = item["last_paid_at"]
+                    counter["payee_name"] = item["payee_name"]
+        
+        await replace_rebuilt(self.collection, user_id, list(counters.values()), ("period", "payee_upi"))
+        
+        await self.state.update_one(
+            {"user_id": user_id},
+            {"$set": {"built_at": datetime.utcnow()}},
+            upsert=True
+        )
+        return len(counters)
@@ -0,0 +1,255 @@
+"""
+Reconciliation of UPI transactions against expenses
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi import HTTPException, status
+from typing import Any, Dict, List, Optional, Tuple
+from ..models.reconciliation import ReconciliationMatch, ReconciliationResult, UnmatchedItems
+from ..models.expense import ExpenseResponse
+from ..models.upi_transaction import UPITransactionResponse
+from ..database import get_database
+from ..utils.etag import bump_version
+from ..utils.money import from_storage, to_rupees
+from .upi_store import get_upi_store
+
+MATCH_WINDOW_DAYS = 2
+AUTO_LINK_CONFIDENCE = 0.8
+SUGGESTION_CONFIDENCE = 0.5
+
+_TRANSACTION_FIELDS = {"amount": 1, "timestamp": 1, "payee_name": 1}
+_EXPENSE_FIELDS = {"amount": 1, "date": 1, "description": 1}
+
+
+def _day_window(moment: datetime) -> Tuple[datetime, datetime]:
+    """Date range covered by the match window around a moment"""
+    day = datetime(moment.year, moment.month, moment.day)
+    return day - timedelta(days=MATCH_WINDOW_DAYS), day + timedelta(days=MATCH_WINDOW_DAYS + 1)
+
+
+def match_confidence(transaction: Dict[str, Any], expense: Dict[str, Any]) -> float:
+    """
+    Score how likely an expense is the manual entry of a UPI transaction
+    
+    Amounts must already be equal. Expense dates are often entered without
+    a time, so closeness is measured in calendar days. A payee name that
+    appears in the expense description adds confidence.
+    """
+    day_gap = abs((transaction["timestamp"].date() - expense["date"].date()).days)
+    if day_gap > MATCH_WINDOW_DAYS:
+        return 0.0
+    
+    time_score = 1 - day_gap / (MATCH_WINDOW_DAYS + 1)
+    description = expense["description"].lower()
+    name_match = any(
+        token in description
+        for token in transaction["payee_name"].lower().split()
+        if len(token) >= 3
+    )
+    
+    return round(0.5 + 0.35 * time_score + (0.15 if name_match else 0.0), 3)
+
+
+class ReconciliationService:
+    """Links UPI transactions to the expenses users entered for them"""
+    
+    def __init__(self):
+        self.db = get_database()
+        self.transactions = get_upi_store()
+        self.expenses = self.db.expenses
+    
+    def _unlinked_transactions_query(self, user_id: str) -> Dict[str, Any]:
+        """Filter for successful UPI transactions without a linked expense"""
+        return {"user_id": user_id, "status": "Success", "linked_expense_id": None}
+    
+    def _unlinked_expenses_query(self, user_id: str) -> Dict[str, Any]:
+        """Filter for UPI expenses without a linked transaction"""
+        return {"user_id": user_id, "payment_method": "UPI", "upi_transaction_id": None}
+    
+    async def _link(self, user_id: str, transaction_id: str, expense_id: str) -> bool:
+        """Link a transaction and an expense if both are still unlinked"""
+        expense = await self.expenses.update_one(
+            {"_id": ObjectId(expense_id), "user_id": user_id, "upi_transaction_id": None},
+            {"$set": {"upi_transaction_id": transaction_id}}
+        )
+        if expense.modified_count == 0:
+            return False
+        
+        transaction_linked = await self.transactions.update(
+            user_id, ObjectId(transaction_id), {"linked_expense_id": expense_id}, {"linked_expense_id": None}
+        )
+        if not transaction_linked:
+            # Lost a race for the transaction: release the expense again
+            await self.expenses.update_one(
+                {"_id": ObjectId(expense_id), "upi_transaction_id": transaction_id},
+                {"$set": {"upi_transaction_id": None}}
+            )
+            return False
+        
+        await bump_version(user_id, "expenses", "upi_transactions")
+        return True
+    
+    async def reconcile_transaction(self, user_id: str, transaction: Dict[str, Any]) -> Optional[str]:
+        """
+        Try to link a newly recorded UPI transaction
+        
+        Only expenses with the same amount inside the date window are read.
+        Returns the linked expense id, if any.
+        """
+        if transaction.get("status", "Success") != "Success":
+            return None
+        
+        start, end = _day_window(transaction["timestamp"])
+        query = self._unlinked_expenses_query(user_id)
+        query.update({"amount": transaction["amount"], "date": {"$gte": start, "$lt": end}})
+        
+        best, best_confidence = None, 0.0
+        async for expense in self.expenses.find(query, _EXPENSE_FIELDS):
+            confidence = match_confidence(transaction, expense)
+            if confidence > best_confidence:
+                best, best_confidence = expense, confidence
+        
+        if best and best_confidence >= AUTO_LINK_CONFIDENCE:
+            expense_id = str(best["_id"])
+            if await self._link(user_id, str(transaction["_id"]), expense_id):
+                return expense_id
+        return None
+    
+    async def reconcile_expense(self, user_id: str, expense: Dict[str, Any]) -> Optional[str]:
+        """
+        Try to link a newly recorded UPI expense to an existing transaction
+        
+        Returns the linked transaction id, if any.
+        """
+        start, end = _day_window(expense["date"])
+        query = self._unlinked_transactions_query(user_id)
+        query.update({"amount": expense["amount"], "timestamp": {"$gte": start, "$lt": end}})
+        
+        best, best_confidence = None, 0.0
+        async for transaction in self.transactions.find(query, _TRANSACTION_FIELDS):
+            confidence = match_confidence(transaction, expense)
+            if confidence > best_confidence:
+                best, best_confidence = transaction, confidence
+        
+        if best and best_confidence >= AUTO_LINK_CONFIDENCE:
+            transaction_id = str(best["_id"])
+            if await self._link(user_id, transaction_id, str(expense["_id"])):
+                return transaction_id
+        return None
+    
+    async def reconcile_user(self, user_id: str) -> ReconciliationResult:
+        """
+        Reconcile all unlinked UPI transactions and expenses of a user
+        
+        Expenses are grouped by exact amount and sorted by date, so each
+        transaction finds its candidates with two binary searches instead of
+        comparing against every expense.
+        """
+        expenses_by_amount: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        cursor = self.expenses.find(self._unlinked_expenses_query(user_id), _EXPENSE_FIELDS).sort("date", 1)
+        async for expense in cursor:
+            expenses_by_amount[expense["amount"]].append(expense)
+        expense_dates = {
+            amount: [expense["date"] for expense in expenses]
+            for amount, expenses in expenses_by_amount.items()
+        }
+        
+        window = timedelta(days=MATCH_WINDOW_DAYS + 1)
+        used = set()
+        linked, suggestions = [], []
+        
+        cursor = self.transactions.find(
+            self._unlinked_transactions_query(user_id), _TRANSACTION_FIELDS, [("timestamp", 1)]
+        )
+        async for transaction in cursor:
+            amount = transaction["amount"]
+            candidates = expenses_by_amount.get(amount)
+            if not candidates:
+                continue
+            
+            dates = expense_dates[amount]
+            low = bisect_left(dates, transaction["timestamp"] - window)
+            high = bisect_right(dates, transaction["timestamp"] + window)
+            
+            best, best_confidence = None, 0.0
+            for expense in candidates[low:high]:
+                if expense["_id"] in used:
+                    continue
+                confidence = match_confidence(transaction, expense)
+                if confidence > best_confidence:
+                    best, best_confidence = expense, confidence
+            
+            if not best or best_confidence < SUGGESTION_CONFIDENCE:
+                continue
+            
+            match = ReconciliationMatch(
+                transaction_id=str(transaction["_id"]),
+                expense_id=str(best["_id"]),
+                amount=to_rupees(transaction["amount"]),
+                confidence=best_confidence
+            )
+            if best_confidence >= AUTO_LINK_CONFIDENCE:
+                if await self._link(user_id, match.transaction_id, match.expense_id):
+                    used.add(best["_id"])
+                    linked.append(match)
+            else:
+                suggestions.append(match)
+        
+        return ReconciliationResult(linked=linked, suggestions=suggestions)
+    
+    async def get_unmatched(self, user_id: str) -> UnmatchedItems:
+        """Get UPI transactions and UPI expenses that are not linked"""
+        transactions = []
+        cursor = self.transactions.find(self._unlinked_transactions_query(user_id), sort=[("timestamp", -1)])
+        async for transaction in cursor:
+            transaction["_id"] = str(transaction["_id"])
+            transactions.append(UPITransactionResponse(**from_storage(transaction, UPITransactionResponse)))
+        
+        expenses = []
+        async for expense in self.expenses.find(self._unlinked_expenses_query(user_id)).sort("date", -1):
+            expense["_id"] = str(expense["_id"])
+            expenses.append(ExpenseResponse(**from_storage(expense, ExpenseResponse)))
+        
+        return UnmatchedItems(transactions=transactions, expenses=expenses)
+    
+    async def link(self, user_id: str, transaction_id: str, expense_id: str) -> dict:
+        """Manually link a UPI transaction to an expense"""
+        if not await self._link(user_id, transaction_id, expense_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Transaction or expense not found or already linked"
+            )
+        return {"message": "Transaction linked successfully"}
+    
+    async def unlink_transaction(self, user_id: str, transaction_id: str) -> dict:
+        """Remove the link of a UPI transaction"""
+        found = await self.transactions.update(user_id, ObjectId(transaction_id), {"linked_expense_id": None})
+        if not found:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Transaction not found"
+            )
+        
+        await self.expenses.update_many(
+            {"user_id": user_id, "upi_transaction_id": transaction_id},
+            {"$set": {"upi_transaction_id": None}}
+        )
+        await bump_version(user_id, "expenses", "upi_transactions")
+        return {"message": "Transaction unlinked successfully"}
+    
+    async def release_expense(self, user_id: str, expense_id: str) -> None:
+        """Clear links pointing at a deleted expense"""
+        await self.transactions.update_many(
+            user_id, {"linked_expense_id": expense_id}, {"linked_expense_id": None}
+        )
+        await bump_version(user_id, "upi_transactions")
+    
+    async def release_transaction(self, user_id: str, transaction_id: str) -> None:
+        """Clear links pointing at a deleted transaction"""
+        await self.expenses.update_many(
+            {"user_id": user_id, "upi_transaction_id": transaction_id},
+            {"$set": {"upi_transaction_id": None}}
+        )
+        await bump_version(user_id, "expenses")
@@ -1,9 +1,13 @@
 """
 Reminder service for EMI payment notifications
 """
-from datetime import date, timedelta
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Dict
+from bson import ObjectId
 from ..utils.whatsapp import whatsapp_service
 from ..database import get_database
+from ..utils.money import to_rupees
 from ..config import settings
 
 
@@ -26,28 +30,32 @@ class ReminderService:
         reminder_date = today + timedelta(days=settings.REMINDER_DAYS_BEFORE)
         
         # Find EMIs due on the reminder date
+        day_start = datetime.combine(reminder_date, datetime.min.time())
         emis = await self.db.emis.find({
             "status": "Active",
             "reminder_enabled": True,
-            "next_payment_date": reminder_date
+            "next_payment_date": {"$gte": day_start, "$lt": day_start + timedelta(days=1)}
         }).to_list(length=None)
         
         sent_count = 0
         failed_count = 0
+        loop = asyncio.get_running_loop()
         
         for emi in emis:
             # Get user details
-            user = await self.db.users.find_one({"_id": emi["user_id"]})
+            user = await self.db.users.find_one({"_id": ObjectId(emi["user_id"])})
             if not user:
                 continue
             
-            # Send WhatsApp reminder
-            result = self.whatsapp.send_emi_reminder(
-                name=user["name"],
-                phone=user["phone"],
-                loan_name=emi["loan_name"],
-                amount=emi["emi_amount"],
-                due_date=emi["next_payment_date"].strftime("%d %B %Y")
+            # Send WhatsApp reminder (Twilio client is blocking)
+            result = await loop.run_in_executor(
+                None,
+                self.whatsapp.send_emi_reminder,
+                user["name"],
+                user["phone"],
+                emi["loan_name"],
+                to_rupees(emi["emi_amount"]),
+                emi["next_payment_date"].strftime("%d %B %Y")
             )
             
             if result:
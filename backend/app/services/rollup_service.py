@@ -0,0 +1,153 @@
+"""
+Monthly spending rollups maintained incrementally on expense writes
+
+Totals are integer paise, like the expense amounts they sum.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import ReturnDocument
+from ..database import get_database
+from ..utils.rebuild import replace_rebuilt
+
+# (year, month, category)
+Bucket = Tuple[int, int, str]
+
+
+def expense_bucket(expense: Dict[str, Any]) -> Bucket:
+    """Rollup bucket an expense document belongs to"""
+    category = getattr(expense["category"], "value", expense["category"])
+    return expense["date"].year, expense["date"].month, category
+
+
+class SpendingRollupService:
+    """Per user, per month, per category spending totals"""
+    
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.spending_rollups
+        self.state = self.db.spending_rollup_state
+    
+    async def apply_change(self, user_id: str, previous: Optional[Dict[str, Any]],
+                           current: Optional[Dict[str, Any]]) -> Dict[Bucket, Tuple[int, int]]:
+        """
+        Apply an expense insert, update or delete to the rollups
+        
+        Args:
+            previous: Expense before the write (None for inserts)
+            current: Expense after the write (None for deletes)
+        
+        Returns:
+            Mapping of touched bucket to (total after the write, amount delta)
+        """
+        if not await self.state.find_one({"user_id": user_id}, {"_id": 1}):
+            # First write since rollups were introduced: the rebuild already
+            # includes this write, so report it without incrementing again
+            await self.rebuild(user_id)
+            touched = {}
+            for expense in (previous, current):
+                if expense:
+                    bucket = expense_bucket(expense)
+                    touched[bucket] = (await self.get_total(user_id, bucket), 0)
+            return touched
+        
+        deltas: Dict[Bucket, list] = {}
+        if previous:
+            delta = deltas.setdefault(expense_bucket(previous), [0, 0])
+            delta[0] -= previous["amount"]
+            delta[1] -= 1
+        if current:
+            delta = deltas.setdefault(expense_bucket(current), [0, 0])
+            delta[0] += current["amount"]
+            delta[1] += 1
+        
+        touched = {}
+        for bucket, (amount, count) in deltas.items():
+            if amount == 0 and count == 0:
+                touched[bucket] = (await self.get_total(user_id, bucket), 0)
+                continue
+            
+            year, month, category = bucket
+            rollup = await self.collection.find_one_and_update(
+                {"user_id": user_id, "year": year, "month": month, "category": category},
+                {
+                    "$inc": {"total": amount, "count": count},
+                    "$set": {"updated_at": datetime.utcnow()}
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            touched[bucket] = (rollup["total"], amount)
+        
+        return touched
+    
+    async def get_total(self, user_id: str, bucket: Bucket) -> int:
+        """Get the spending total of a single bucket"""
+        year, month, category = bucket
+        rollup = await self.collection.find_one(
+            {"user_id": user_id, "year": year, "month": month, "category": category},
+            {"total": 1}
+        )
+        return rollup["total"] if rollup else 0
+    
+    async def get_month(self, user_id: str, year: int, month: int) -> Dict[str, int]:
+        """Get spending by category for a month"""
+        if not await self.state.find_one({"user_id": user_id}, {"_id": 1}):
+            await self.rebuild(user_id)
+        
+        cursor = self.collection.find(
+            {"user_id": user_id, "year": year, "month": month},
+            {"category": 1, "total": 1}
+        )
+        return {rollup["category"]: rollup["total"] async for rollup in cursor}
+    
+    async def get_months(self, user_id: str, first: Tuple[int, int],
+                         end: Tuple[int, int]) -> List[Dict[str, Any]]:
+        """Get the rollups of the (year, month) range [first, end)"""
+        if not await self.state.find_one({"user_id": user_id}, {"_id": 1}):
+            await self.rebuild(user_id)
+        
+        cursor = self.collection.find(
+            {"user_id": user_id, "year": {"$gte": first[0], "$lte": end[0]}},
+            {"year": 1, "month": 1, "category": 1, "total": 1, "count": 1}
+        )
+        return [rollup async for rollup in cursor if first <= (rollup["year"], rollup["month"]) < end]
+    
+    async def rebuild(self, user_id: str) -> int:
+        """Rebuild all rollups for a user from expense history"""
+        pipeline = [
+            {"$match": {"user_id": user_id}},
+            {
+                "$group": {
+                    "_id": {
+                        "year": {"$year": "$date"},
+                        "month": {"$month": "$date"},
+                        "category": "$category"
+                    },
+                    "total": {"$sum": "$amount"},
+                    "count": {"$sum": 1}
+                }
+            }
+        ]
+        
+        now = datetime.utcnow()
+        rollups = [
+            {
+                "user_id": user_id,
+                "year": item["_id"]["year"],
+                "month": item["_id"]["month"],
+                "category": item["_id"]["category"],
+                "total": item["total"],
+                "count": item["count"],
+                "updated_at": now
+            }
+            async for item in self.db.expenses.aggregate(pipeline)
+        ]
+        
+        await replace_rebuilt(self.collection, user_id, rollups, ("year", "month", "category"))
+        
+        await self.state.update_one(
+            {"user_id": user_id},
+            {"$set": {"built_at": now}},
+            upsert=True
+        )
+        return len(rollups)
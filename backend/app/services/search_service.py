@@ -0,0 +1,180 @@
+"""
+Faceted search over expenses and UPI transactions
+"""
+import asyncio
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from ..models.search import SearchSort, FacetCount, ExpenseSearchResult, UPISearchResult
+from ..models.expense import ExpenseResponse
+from ..models.upi_transaction import UPITransactionResponse
+from ..database import get_database
+from ..utils.money import from_storage, paise_or_none
+from .upi_store import BucketUPIStore, get_upi_store
+
+# Matches counted for the total and facets; past it counts are lower bounds
+COUNT_LIMIT = 10_000
+
+
+def _range(low: Any, high: Any) -> Optional[Dict[str, Any]]:
+    """Build a $gte/$lte range condition, None when unbounded"""
+    condition = {}
+    if low is not None:
+        condition["$gte"] = low
+    if high is not None:
+        condition["$lte"] = high
+    return condition or None
+
+
+class SearchService:
+    """Full-text and faceted search service"""
+    
+    def __init__(self):
+        self.db = get_database()
+    
+    async def _faceted_search(self, collection, match: Dict[str, Any], facet_filters: Dict[str, Optional[list]],
+                              date_field: str, sort: SearchSort, page: int, page_size: int) -> Dict[str, Any]:
+        """
+        Run a search as a page query and a count query, concurrently
+        
+        The page is a $match, $sort, $skip, $limit pipeline, which MongoDB
+        answers from the (user_id, ...) compound indexes like a sorted
+        find. Totals and facet counts come from one $facet over only the
+        facet fields of at most COUNT_LIMIT matches. Each facet is counted
+        with every filter applied except its own, so the client can show
+        how many matches selecting another value would give.
+        """
+        filters = {field: {"$in": values} for field, values in facet_filters.items() if values}
+        
+        if sort == SearchSort.RELEVANCE and "$text" in match:
+            sort_stage = {"score": {"$meta": "textScore"}, date_field: -1}
+        elif sort == SearchSort.AMOUNT:
+            sort_stage = {"amount": -1, date_field: -1}
+        else:
+            sort_stage = {date_field: -1}
+        
+        items_pipeline = [
+            {"$match": {**match, **filters}},
+            {"$sort": sort_stage},
+            {"$skip": (page - 1) * page_size},
+            {"$limit": page_size}
+        ]
+        
+        facets: Dict[str, List[Dict[str, Any]]] = {
+            "scanned": [{"$count": "count"}],
+            "total": [{"$match": filters}, {"$count": "count"}]
+        }
+        for field in facet_filters:
+            other_filters = {k: v for k, v in filters.items() if k != field}
+            facets[field] = [
+                {"$match": other_filters},
+                {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}}
+            ]
+        counts_pipeline = [
+            {"$match": match},
+            {"$limit": COUNT_LIMIT},
+            {"$project": {"_id": 0, **{field: 1 for field in facet_filters}}},
+            {"$facet": facets}
+        ]
+        
+        items, counts = await asyncio.gather(
+            collection.aggregate(items_pipeline).to_list(length=page_size),
+            collection.aggregate(counts_pipeline).to_list(length=1)
+        )
+        counts = counts[0]
+        
+        return {
+            "items": items,
+            "total": counts["total"][0]["count"] if counts["total"] else 0,
+            "counts_capped": bool(counts["scanned"]) and counts["scanned"][0]["count"] >= COUNT_LIMIT,
+            "facets": {
+                field: [FacetCount(value=str(item["_id"]), count=item["count"]) for item in counts[field]]
+                for field in facet_filters
+            }
+        }
+    
+    async def search_expenses(self, user_id: str, q: Optional[str] = None,
+                              categories: Optional[List[str]] = None,
+                              payment_methods: Optional[List[str]] = None,
+                              min_amount: Optional[float] = None, max_amount: Optional[float] = None,
+                              start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                              sort: SearchSort = SearchSort.DATE,
+                              page: int = 1, page_size: int = 50) -> ExpenseSearchResult:
+        """Search expenses by description with category and payment method facets"""
+        match: Dict[str, Any] = {"user_id": user_id}
+        if q:
+            match["$text"] = {"$search": q}
+        if amount := _range(paise_or_none(min_amount), paise_or_none(max_amount)):
+            match["amount"] = amount
+        if date := _range(start_date, end_date):
+            match["date"] = date
+        
+        result = await self._faceted_search(
+            self.db.expenses,
+            match,
+            {"category": categories, "payment_method": payment_methods},
+            "date", sort, page, page_size
+        )
+        
+        items = []
+        for expense in result["items"]:
+            expense["_id"] = str(expense["_id"])
+            items.append(ExpenseResponse(**from_storage(expense, ExpenseResponse)))
+        
+        return ExpenseSearchResult(
+            items=items,
+            total=result["total"],
+            counts_capped=result["counts_capped"],
+            page=page,
+            page_size=page_size,
+            facets=result["facets"]
+        )
+    
+    async def search_upi_transactions(self, user_id: str, q: Optional[str] = None,
+                                      statuses: Optional[List[str]] = None,
+                                      min_amount: Optional[float] = None, max_amount: Optional[float] = None,
+                                      start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                                      sort: SearchSort = SearchSort.DATE,
+                                      page: int = 1, page_size: int = 50) -> UPISearchResult:
+        """
+        Search UPI transactions by payee name, UPI ID or transaction ID with status facets
+        
+        With bucket storage, q is not a $text search. $text must be the
+        first stage and can only select whole buckets, so q is matched as
+        one case-insensitive substring of each embedded transaction's
+        fields, unstemmed and unindexed within the user's buckets. Words
+        are not searched separately, and relevance sort falls back to date.
+        """
+        store = get_upi_store()
+        match: Dict[str, Any] = {"user_id": user_id}
+        if q and isinstance(store, BucketUPIStore):
+            pattern = {"$regex": re.escape(q), "$options": "i"}
+            match["$or"] = [{field: pattern} for field in ("payee_name", "payee_upi", "transaction_id")]
+        elif q:
+            match["$text"] = {"$search": q}
+        if amount := _range(paise_or_none(min_amount), paise_or_none(max_amount)):
+            match["amount"] = amount
+        if timestamp := _range(start_date, end_date):
+            match["timestamp"] = timestamp
+        
+        result = await self._faceted_search(
+            store,
+            match,
+            {"status": statuses},
+            "timestamp", sort, page, page_size
+        )
+        
+        items = []
+        for transaction in result["items"]:
+            transaction["_id"] = str(transaction["_id"])
+            items.append(UPITransactionResponse(**from_storage(transaction, UPITransactionResponse)))
+        
+        return UPISearchResult(
+            items=items,
+            total=result["total"],
+            counts_capped=result["counts_capped"],
+            page=page,
+            page_size=page_size,
+            facets=result["facets"]
+        )
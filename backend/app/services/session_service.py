@@ -0,0 +1,101 @@
+"""
+Refresh token sessions
+
+Logins open a session holding an opaque refresh token, which is exchanged
+at /api/auth/refresh for a new access token without re-checking the
+password. Refresh tokens are random 256-bit strings, so they are stored as
+SHA-256 digests: a fast hash is enough where there is nothing to brute
+force, and keeps the refresh path free of bcrypt.
+
+Every refresh rotates the token. Presenting a token that was already
+rotated away means it leaked (or a client replayed it), so the session
+is revoked.
+"""
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Tuple
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+from ..config import settings
+from ..database import get_database
+
+
+def _hash_token(token: str) -> str:
+    """Digest a refresh token is stored and looked up by"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token"
+    )
+
+
+class SessionService:
+    """Refresh token session management service"""
+    
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.sessions
+    
+    def _expires_at(self, now: datetime) -> datetime:
+        return now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    
+    async def create_session(self, user_id: str) -> str:
+        """Open a session for a user and return its refresh token"""
+        token = secrets.token_urlsafe(32)
+        now = datetime.utcnow()
+        
+        await self.collection.insert_one({
+            "user_id": user_id,
+            "token_hash": _hash_token(token),
+            "created_at": now,
+            "last_used_at": now,
+            "expires_at": self._expires_at(now)
+        })
+        
+        return token
+    
+    async def rotate(self, refresh_token: str) -> Tuple[str, str]:
+        """
+        Exchange a refresh token for a new one
+        
+        Returns the session's user ID and the new refresh token. The session
+        is extended by REFRESH_TOKEN_EXPIRE_DAYS on every use, so active
+        users never have to log in again.
+        """
+        token_hash = _hash_token(refresh_token)
+        new_token = secrets.token_urlsafe(32)
+        now = datetime.utcnow()
+        
+        # Matching on the current hash makes concurrent refreshes with the
+        # same token race for a single winner
+        session = await self.collection.find_one_and_update(
+            {"token_hash": token_hash, "expires_at": {"$gt": now}},
+            {"$set": {
+                "token_hash": _hash_token(new_token),
+                "previous_token_hash": token_hash,
+                "last_used_at": now,
+                "expires_at": self._expires_at(now)
+            }},
+            projection={"user_id": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        
+        if not session:
+            # A rotated-away token coming back: revoke the session it belonged to
+            await self.collection.delete_one({"previous_token_hash": token_hash})
+            raise _invalid_refresh_token()
+        
+        return session["user_id"], new_token
+    
+    async def revoke(self, refresh_token: str) -> None:
+        """End the session a refresh token belongs to (logout)"""
+        await self.collection.delete_one({"token_hash": _hash_token(refresh_token)})
+    
+    async def revoke_all(self, user_id: str) -> int:
+        """End every session of a user (logout everywhere)"""
+        result = await self.collection.delete_many({"user_id": user_id})
+        return result.deleted_count
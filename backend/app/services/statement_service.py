@@ -0,0 +1,226 @@
+"""
+Monthly statement generation and storage
+"""
+import asyncio
+import gzip
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from fastapi import HTTPException, status
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+from bson import Binary
+from ..config import settings
+from ..models.statement import (
+    MonthlyStatement, StatementEMIPayment, StatementNetWorth, StatementPayee,
+    StatementSummary, StatementUPIActivity
+)
+from ..database import get_database
+from ..utils.money import to_paise, to_rupees
+from .analytics_service import AnalyticsService
+from .rollup_service import SpendingRollupService
+from .upi_store import get_upi_store
+
+
+def _month_range(year: int, month: int) -> Tuple[datetime, datetime]:
+    """Start and end (exclusive) of a month"""
+    start = datetime(year, month, 1)
+    return start, start + relativedelta(months=1)
+
+
+class StatementService:
+    """
+    Monthly statements rendered ahead of time
+    
+    Statements of closed months are generated once, stored gzip-compressed
+    and served from storage. Month-close generation (the
+    statements.close_month job) runs a pool of workers over all users; a
+    shared semaphore bounds how many MongoDB queries are in flight at once.
+    """
+    
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.statements
+        self.mongo_concurrency = asyncio.Semaphore(settings.STATEMENT_MONGO_CONCURRENCY)
+    
+    async def _query(self, operation: Awaitable[Any]) -> Any:
+        """Run a database operation inside the concurrency bound"""
+        async with self.mongo_concurrency:
+            return await operation
+    
+    async def _emi_payments(self, user_id: str, year: int, month: int) -> List[StatementEMIPayment]:
+        """EMI instalments scheduled in a month"""
+        emis = await self.db.emis.find(
+            {"user_id": user_id, "status": {"$ne": "Defaulted"}},
+            {"loan_name": 1, "emi_amount": 1, "start_date": 1, "tenure": 1}
+        ).to_list(length=None)
+        
+        payments = []
+        for emi in emis:
+            start = emi["start_date"]
+            start = start.date() if isinstance(start, datetime) else start
+            index = (year - start.year) * 12 + month - start.month
+            if 0 <= index < emi["tenure"]:
+                payments.append(StatementEMIPayment(
+                    loan_name=emi["loan_name"],
+                    payment_date=start + relativedelta(months=index),
+                    amount=to_rupees(emi["emi_amount"])
+                ))
+        return sorted(payments, key=lambda payment: payment.payment_date)
+    
+    async def _upi_activity(self, user_id: str, year: int, month: int) -> StatementUPIActivity:
+        """UPI totals by status and top payees in a month, in one aggregation"""
+        start, end = _month_range(year, month)
+        pipeline = [
+            {"$match": {"user_id": user_id, "timestamp": {"$gte": start, "$lt": end}}},
+            {"$facet": {
+                "by_status": [
+                    {"$group": {"_id": "$status", "count": {"$sum": 1}, "total": {"$sum": "$amount"}}}
+                ],
+                "top_payees": [
+                    {"$match": {"status": "Success"}},
+                    {"$group": {
+                        "_id": "$payee_upi",
+                        "payee_name": {"$last": "$payee_name"},
+                        "count": {"$sum": 1},
+                        "total": {"$sum": "$amount"}
+                    }},
+                    {"$sort": {"total": -1}},
+                    {"$limit": 5}
+                ]
+            }}
+        ]
+        result = (await get_upi_store().aggregate(pipeline).to_list(length=1))[0]
+        
+        return StatementUPIActivity(
+            transaction_count=sum(item["count"] for item in result["by_status"]),
+            total_by_status={item["_id"]: to_rupees(item["total"]) for item in result["by_status"]},
+            top_payees=[
+                StatementPayee(
+                    payee_name=item["payee_name"],
+                    payee_upi=item["_id"],
+                    count=item["count"],
+                    total=to_rupees(item["total"])
+                )
+                for item in result["top_payees"]
+            ]
+        )
+    
+    async def _net_worth(self, user_id: str) -> StatementNetWorth:
+        """Current balances, assets and liabilities, labelled with when they were read"""
+        as_of = datetime.utcnow()
+        analytics = AnalyticsService()
+        balances = await self._query(analytics.get_balance_summary(user_id))
+        assets = await self._query(analytics.get_total_assets(user_id))
+        liabilities = await self._query(analytics.get_total_liabilities(user_id))
+        
+        return StatementNetWorth(
+            as_of=as_of,
+            currency=balances.base_currency,
+            total_balance=balances.total_balance,
+            total_assets=assets,
+            total_liabilities=liabilities,
+            net_worth=to_rupees(to_paise(balances.total_balance) + to_paise(assets) - to_paise(liabilities))
+        )
+    
+    async def build(self, user_id: str, year: int, month: int) -> MonthlyStatement:
+        """Compute a statement; the parts are queried concurrently"""
+        spending, emi_payments, upi, net_worth = await asyncio.gather(
+            self._query(SpendingRollupService().get_month(user_id, year, month)),
+            self._query(self._emi_payments(user_id, year, month)),
+            self._query(self._upi_activity(user_id, year, month)),
+            self._net_worth(user_id)
+        )
+        
+        return MonthlyStatement(
+            user_id=user_id,
+            year=year,
+            month=month,
+            total_spending=to_rupees(sum(spending.values())),
+            spending_by_category={category: to_rupees(total) for category, total in spending.items()},
+            emi_payments=emi_payments,
+            total_emi=to_rupees(sum(to_paise(payment.amount) for payment in emi_payments)),
+            upi=upi,
+            net_worth=net_worth,
+            generated_at=datetime.utcnow()
+        )
+    
+    async def generate(self, user_id: str, year: int, month: int) -> bytes:
+        """Build a statement and store it compressed; returns the stored body"""
+        statement = await self.build(user_id, year, month)
+        body = gzip.compress(statement.model_dump_json().encode("utf-8"))
+        
+        await self._query(self.collection.update_one(
+            {"user_id": user_id, "year": year, "month": month},
+            {"$set": {"body": Binary(body), "size": len(body), "generated_at": statement.generated_at}},
+            upsert=True
+        ))
+        return body
+    
+    async def get_statement(self, user_id: str, year: int, month: int) -> Tuple[bytes, bool]:
+        """
+        Get a statement as gzip-compressed JSON
+        
+        Closed months are served from storage, generating the statement
+        first if the month-close run missed it. The current month is
+        built on the fly and not stored.
+        
+        Returns:
+            Tuple of the compressed body and whether it came from storage
+        """
+        now = datetime.utcnow()
+        if (year, month) > (now.year, now.month):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Statement month is in the future"
+            )
+        
+        if (year, month) == (now.year, now.month):
+            statement = await self.build(user_id, year, month)
+            return gzip.compress(statement.model_dump_json().encode("utf-8")), False
+        
+        stored = await self.collection.find_one(
+            {"user_id": user_id, "year": year, "month": month}, {"body": 1}
+        )
+        if stored:
+            return bytes(stored["body"]), True
+        return await self.generate(user_id, year, month), True
+    
+    async def get_statements(self, user_id: str) -> List[StatementSummary]:
+        """List stored statements, newest first"""
+        cursor = self.collection.find(
+            {"user_id": user_id}, {"year": 1, "month": 1, "generated_at": 1, "size": 1}
+        ).sort([("year", -1), ("month", -1)])
+        return [StatementSummary(**statement) async for statement in cursor]
+    
+    async def generate_all(self, year: int, month: int, workers: Optional[int] = None) -> Dict[str, int]:
+        """
+        Generate the statements of every user for a month
+        
+        User IDs are streamed into a bounded queue consumed by a pool of
+        workers, so memory stays flat however many users there are.
+        """
+        workers = workers or settings.STATEMENT_WORKERS
+        queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        stats = {"generated": 0, "failed": 0}
+        
+        async def worker():
+            while True:
+                user_id = await queue.get()
+                if user_id is None:
+                    return
+                try:
+                    await self.generate(user_id, year, month)
+                    stats["generated"] += 1
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"❌ Statement {year}-{month:02d} failed for user {user_id}: {e}")
+        
+        pool = [asyncio.create_task(worker()) for _ in range(workers)]
+        try:
+            async for user in self.db.users.find({}, {"_id": 1}):
+                await queue.put(str(user["_id"]))
+        finally:
+            for _ in pool:
+                await queue.put(None)
+            await asyncio.gather(*pool)
+        
+        return stats
@@ -4,9 +4,16 @@ UPI transaction service
 from datetime import datetime
 from bson import ObjectId
 from fastapi import HTTPException, status
-from typing import List
-from ..models.upi_transaction import UPITransactionCreate, UPITransactionResponse
+from typing import Any, Dict, List, Optional
+from ..models.upi_transaction import UPITransactionCreate, UPITransactionResponse, UPIBatchResult
 from ..database import get_database
+from ..utils.fields import ALL_FIELDS, FieldSelection
+from ..utils.etag import bump_version
+from ..utils.money import from_storage, to_storage
+from .categorization_service import CategorizationService
+from .payee_service import PayeeStatsService
+from .reconciliation_service import ReconciliationService
+from .upi_store import get_upi_store
 
 
 class UPITransactionService:
@@ -14,37 +21,125 @@ class UPITransactionService:
     
     def __init__(self):
         self.db = get_database()
-        self.collection = self.db.upi_transactions
+        self.store = get_upi_store()
     
-    async def create_transaction(self, user_id: str, transaction_data: UPITransactionCreate) -> UPITransactionResponse:
-        """Create a new UPI transaction"""
-        transaction_dict = transaction_data.dict()
+    async def _prepare(self, user_id: str, transaction_data: UPITransactionCreate) -> Dict[str, Any]:
+        """Build the document stored for a new transaction"""
+        transaction_dict = to_storage(transaction_data.dict(), UPITransactionCreate)
         transaction_dict["user_id"] = user_id
+        if transaction_dict["category"] is None:
+            transaction_dict["category"], _ = await CategorizationService().classify(
+                user_id,
+                payee_name=transaction_dict["payee_name"],
+                payee_upi=transaction_dict["payee_upi"],
+                amount=transaction_dict["amount"]
+            )
+            transaction_dict["category_source"] = "auto"
+        else:
+            transaction_dict["category_source"] = "manual"
+        transaction_dict["linked_expense_id"] = None
         transaction_dict["timestamp"] = datetime.utcnow()
         transaction_dict["created_at"] = datetime.utcnow()
+        return transaction_dict
+    
+    async def create_transaction(self, user_id: str, transaction_data: UPITransactionCreate) -> UPITransactionResponse:
+        """
+        Create a new UPI transaction
+        
+        Ingestion is idempotent on (user_id, transaction_id): recording a
+        transaction that already exists returns the stored one unchanged.
+        """
+        transaction_dict = await self._prepare(user_id, transaction_data)
+        inserted_id = await self.store.insert(transaction_dict)
+        
+        if inserted_id is None:
+            existing = await self.store.find_by_transaction_id(user_id, transaction_dict["transaction_id"])
+            existing["_id"] = str(existing["_id"])
+            return UPITransactionResponse(**from_storage(existing, UPITransactionResponse))
         
-        result = await self.collection.insert_one(transaction_dict)
-        transaction_dict["_id"] = str(result.inserted_id)
+        transaction_dict["_id"] = inserted_id
+        await bump_version(user_id, "upi_transactions")
+        await PayeeStatsService().apply_transactions(user_id, [transaction_dict])
         
-        return UPITransactionResponse(**transaction_dict, id=str(result.inserted_id))
+        # Link to a matching expense the user already entered by hand
+        transaction_dict["linked_expense_id"] = await ReconciliationService().reconcile_transaction(
+            user_id, transaction_dict
+        )
+        transaction_dict["_id"] = str(inserted_id)
+        
+        return UPITransactionResponse(**from_storage(transaction_dict, UPITransactionResponse))
     
-    async def get_transactions(self, user_id: str) -> List[UPITransactionResponse]:
-        """Get all UPI transactions for a user"""
-        transactions = []
-        cursor = self.collection.find({"user_id": user_id}).sort("timestamp", -1)
+    async def create_transactions(self, user_id: str, transactions: List[UPITransactionCreate]) -> UPIBatchResult:
+        """
+        Ingest a batch of UPI transactions
+        
+        Duplicates inside the batch are collapsed on transaction_id (the
+        first occurrence wins) and the rest is written in bulk, skipping
+        transactions already stored. Only newly inserted transactions are
+        reconciled.
+        """
+        unique: Dict[str, UPITransactionCreate] = {}
+        for transaction in transactions:
+            unique.setdefault(transaction.transaction_id, transaction)
+        
+        documents = [await self._prepare(user_id, transaction) for transaction in unique.values()]
+        if not documents:
+            return UPIBatchResult(received=len(transactions), unique=0, inserted=0, existing=0)
+        
+        upserted_ids = await self.store.insert_many(documents)
+        if upserted_ids:
+            await bump_version(user_id, "upi_transactions")
         
-        async for transaction in cursor:
+        await PayeeStatsService().apply_transactions(user_id, [documents[index] for index in upserted_ids])
+        
+        reconciliation = ReconciliationService()
+        inserted_ids = []
+        for index, inserted_id in sorted(upserted_ids.items()):
+            document = documents[index]
+            document["_id"] = inserted_id
+            await reconciliation.reconcile_transaction(user_id, document)
+            inserted_ids.append(str(inserted_id))
+        
+        return UPIBatchResult(
+            received=len(transactions),
+            unique=len(documents),
+            inserted=len(inserted_ids),
+            existing=len(documents) - len(inserted_ids),
+            inserted_ids=inserted_ids
+        )
+    
+    async def get_transactions(self, user_id: str, month: Optional[int] = None, year: Optional[int] = None,
+                               fields: FieldSelection = ALL_FIELDS) -> List[UPITransactionResponse]:
+        """Get UPI transactions for a user, newest first, optionally for one month"""
+        if (month is None) != (year is None):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="month and year must be given together"
+            )
+        
+        projection = fields.projection(UPITransactionResponse)
+        if month and year:
+            documents = await self.store.list_month(user_id, year, month, projection)
+        else:
+            cursor = self.store.find({"user_id": user_id}, projection, [("timestamp", -1)])
+            documents = await cursor.to_list(length=None)
+        
+        model = fields.model(UPITransactionResponse)
+        transactions = []
+        for transaction in documents:
             transaction["_id"] = str(transaction["_id"])
-            transactions.append(UPITransactionResponse(**transaction, id=transaction["_id"]))
+            transactions.append(model(
+                **from_storage(transaction, UPITransactionResponse), id=transaction["_id"]
+            ))
         
         return transactions
     
-    async def get_transaction_by_id(self, user_id: str, transaction_id: str) -> UPITransactionResponse:
+    async def get_transaction_by_id(self, user_id: str, transaction_id: str,
+                                    fields: FieldSelection = ALL_FIELDS) -> UPITransactionResponse:
         """Get specific UPI transaction"""
-        transaction = await self.collection.find_one({
-            "_id": ObjectId(transaction_id),
-            "user_id": user_id
-        })
+        transaction = await self.store.get(
+            user_id, ObjectId(transaction_id), fields.projection(UPITransactionResponse)
+        )
         
         if not transaction:
             raise HTTPException(
@@ -52,19 +147,25 @@ class UPITransactionService:
                 detail="Transaction not found"
             )
         
-        return UPITransactionResponse(**transaction, id=str(transaction["_id"]))
+        transaction["_id"] = str(transaction["_id"])
+        
+        return fields.model(UPITransactionResponse)(
+            **from_storage(transaction, UPITransactionResponse), id=transaction["_id"]
+        )
     
     async def delete_transaction(self, user_id: str, transaction_id: str) -> dict:
         """Delete UPI transaction"""
-        result = await self.collection.delete_one({
-            "_id": ObjectId(transaction_id),
-            "user_id": user_id
-        })
+        deleted = await self.store.delete(user_id, ObjectId(transaction_id))
         
-        if result.deleted_count == 0:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Transaction not found"
             )
         
+        if deleted.get("linked_expense_id"):
+            await ReconciliationService().release_transaction(user_id, transaction_id)
+        await bump_version(user_id, "upi_transactions")
+        await PayeeStatsService().apply_transactions(user_id, [deleted], deleted=True)
+        
         return {"message": "Transaction deleted successfully"}
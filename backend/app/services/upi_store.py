@@ -0,0 +1,378 @@
+"""
+Storage of UPI transactions: one document each, or monthly buckets
+"""
+from collections import defaultdict
+from datetime import datetime
+from bson import ObjectId
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from ..config import settings
+from ..database import get_database
+
+
+def month_start(moment: datetime) -> datetime:
+    """First instant of a moment's month, the bucket key"""
+    return datetime(moment.year, moment.month, 1)
+
+
+def _next_month(moment: datetime) -> datetime:
+    """First instant of the following month"""
+    return datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1)
+
+
+class DocumentUPIStore:
+    """One document per transaction in upi_transactions"""
+    
+    def __init__(self):
+        self.collection = get_database().upi_transactions
+    
+    async def insert(self, document: Dict[str, Any]) -> Optional[ObjectId]:
+        """
+        Store a transaction unless its (user_id, transaction_id) exists
+        
+        Returns:
+            ID of the new document, None when it was already recorded
+        """
+        key = {"user_id": document["user_id"], "transaction_id": document["transaction_id"]}
+        try:
+            result = await self.collection.update_one(key, {"$setOnInsert": document}, upsert=True)
+        except DuplicateKeyError:
+            # A concurrent request inserted the same transaction first
+            return None
+        return result.upserted_id
+    
+    async def insert_many(self, documents: List[Dict[str, Any]]) -> Dict[int, ObjectId]:
+        """
+        Store transactions, skipping recorded ones, in one round trip
+        
+        Returns:
+            IDs of the inserted documents by their index in documents
+        """
+        operations = [
+            UpdateOne(
+                {"user_id": document["user_id"], "transaction_id": document["transaction_id"]},
+                {"$setOnInsert": document},
+                upsert=True
+            )
+            for document in documents
+        ]
+        try:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            return result.upserted_ids
+        except BulkWriteError as error:
+            # Lost races against concurrent inserts count as existing
+            if any(item["code"] != 11000 for item in error.details["writeErrors"]):
+                raise
+            return {item["index"]: item["_id"] for item in error.details["upserted"]}
+    
+    async def find_by_transaction_id(self, user_id: str, transaction_id: str) -> Optional[Dict[str, Any]]:
+        """Transaction with a given UPI transaction ID"""
+        return await self.collection.find_one({"user_id": user_id, "transaction_id": transaction_id})
+    
+    async def get(self, user_id: str, transaction_id: ObjectId,
+                  projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        """Transaction by ID"""
+        return await self.collection.find_one({"_id": transaction_id, "user_id": user_id}, projection)
+    
+    def find(self, query: Dict[str, Any], projection: Optional[Dict[str, int]] = None,
+             sort: Optional[List[Tuple[str, int]]] = None):
+        """Cursor over the transactions matching a query (which must include user_id)"""
+        cursor = self.collection.find(query, projection)
+        return cursor.sort(sort) if sort else cursor
+    
+    async def list_month(self, user_id: str, year: int, month: int,
+                         projection: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """A month's transactions, newest first"""
+        start = datetime(year, month, 1)
+        cursor = self.find(
+            {"user_id": user_id, "timestamp": {"$gte": start, "$lt": _next_month(start)}},
+            projection,
+            [("timestamp", -1)]
+        )
+        return await cursor.to_list(length=None)
+    
+    def aggregate(self, pipeline: List[Dict[str, Any]]):
+        """Aggregation cursor over transactions"""
+        return self.collection.aggregate(pipeline)
+    
+    async def update(self, user_id: str, transaction_id: ObjectId, fields: Dict[str, Any],
+                     condition: Optional[Dict[str, Any]] = None) -> bool:
+        """Set fields on a transaction if it matches condition; returns whether it did"""
+        result = await self.collection.update_one(
+            {"_id": transaction_id, "user_id": user_id, **(condition or {})},
+            {"$set": fields}
+        )
+        return result.matched_count == 1
+    
+    async def update_many(self, user_id: str, condition: Dict[str, Any], fields: Dict[str, Any]) -> None:
+        """Set fields on all of a user's transactions matching condition"""
+        await self.collection.update_many({"user_id": user_id, **condition}, {"$set": fields})
+    
+    async def bulk_update(self, user_id: str, updates: List[Tuple[ObjectId, Dict[str, Any]]]) -> None:
+        """Set fields on many of a user's transactions, given as (ID, fields) pairs"""
+        await self.collection.bulk_write(
+            [
+                UpdateOne({"_id": transaction_id, "user_id": user_id}, {"$set": fields})
+                for transaction_id, fields in updates
+            ],
+            ordered=False
+        )
+    
+    async def delete(self, user_id: str, transaction_id: ObjectId) -> Optional[Dict[str, Any]]:
+        """Delete a transaction, returning it"""
+        return await self.collection.find_one_and_delete({"_id": transaction_id, "user_id": user_id})
+
+
+class BucketUPIStore:
+    """
+    A user's transactions of a month packed into one upi_buckets document
+    
+    Buckets keep a running count and total of their transactions, and
+    embedded transactions keep their own _id, so IDs handed out before a
+    migration stay valid. Queries run on the unwound transactions after
+    selecting candidate buckets, so callers use the same filters and
+    pipelines as with one document per transaction.
+    """
+    
+    def __init__(self):
+        self.collection = get_database().upi_buckets
+    
+    def _bucket_filter(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        """Buckets that can hold transactions matching a flat query"""
+        element = {key: value for key, value in query.items() if key != "user_id"}
+        bucket: Dict[str, Any] = {"user_id": query["user_id"]}
+        
+        timestamp = element.get("timestamp")
+        if isinstance(timestamp, dict):
+            months = {}
+            if "$gte" in timestamp or "$gt" in timestamp:
+                months["$gte"] = month_start(timestamp.get("$gte", timestamp.get("$gt")))
+            if "$lte" in timestamp:
+                months["$lte"] = month_start(timestamp["$lte"])
+            if "$lt" in timestamp:
+                months["$lt"] = timestamp["$lt"]
+            if months:
+                bucket["month"] = months
+        
+        if element:
+            bucket["transactions"] = {"$elemMatch": element}
+        return bucket
+    
+    def _unwind(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Pipeline stages yielding the flat transactions matching a query"""
+        return [
+            {"$match": self._bucket_filter(query)},
+            {"$unwind": "$transactions"},
+            {"$replaceRoot": {"newRoot": "$transactions"}},
+            {"$addFields": {"user_id": query["user_id"]}},
+            {"$match": query}
+        ]
+    
+    def _element(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Embedded form of a transaction; user_id lives on the bucket"""
+        element = {key: value for key, value in document.items() if key != "user_id"}
+        element.setdefault("_id", ObjectId())
+        return element
+    
+    async def insert(self, document: Dict[str, Any]) -> Optional[ObjectId]:
+        """See DocumentUPIStore.insert"""
+        element = self._element(document)
+        try:
+            # When the bucket already holds the transaction the filter misses
+            # and the upsert collides with the (user_id, month) unique index
+            await self.collection.update_one(
+                {
+                    "user_id": document["user_id"],
+                    "month": month_start(document["timestamp"]),
+                    "transactions.transaction_id": {"$ne": document["transaction_id"]}
+                },
+                {
+                    "$push": {"transactions": element},
+                    "$inc": {"count": 1, "total": element["amount"]}
+                },
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return None
+        return element["_id"]
+    
+    async def insert_many(self, documents: List[Dict[str, Any]]) -> Dict[int, ObjectId]:
+        """
+        See DocumentUPIStore.insert_many
+        
+        Transactions already stored are skipped up front, then each month
+        gets one $push. A bucket changed concurrently makes that push miss,
+        and its transactions fall back to one insert each.
+        """
+        if not documents:
+            return {}
+        user_id = documents[0]["user_id"]
+        
+        existing = set()
+        cursor = self.collection.aggregate([
+            {"$match": {
+                "user_id": user_id,
+                "transactions.transaction_id": {"$in": [document["transaction_id"] for document in documents]}
+            }},
+            {"$unwind": "$transactions"},
+            {"$project": {"_id": 0, "transaction_id": "$transactions.transaction_id"}}
+        ])
+        async for item in cursor:
+            existing.add(item["transaction_id"])
+        
+        months: Dict[datetime, List[Tuple[int, Dict[str, Any]]]] = defaultdict(list)
+        for index, document in enumerate(documents):
+            if document["transaction_id"] not in existing:
+                months[month_start(document["timestamp"])].append((index, self._element(document)))
+        
+        inserted: Dict[int, ObjectId] = {}
+        for month, items in months.items():
+            elements = [element for _, element in items]
+            transaction_ids = [element["transaction_id"] for element in elements]
+            try:
+                result = await self.collection.update_one(
+                    {
+                        "user_id": user_id,
+                        "month": month,
+                        "transactions.transaction_id": {"$nin": transaction_ids}
+                    },
+                    {
+                        "$push": {"transactions": {"$each": elements}},
+                        "$inc": {
+                            "count": len(elements),
+                            "total": sum(element["amount"] for element in elements)
+                        }
+                    },
+                    upsert=True
+                )
+                pushed = result.matched_count == 1 or result.upserted_id is not None
+            except DuplicateKeyError:
+                pushed = False
+            
+            for index, element in items:
+                if pushed:
+                    inserted[index] = element["_id"]
+                elif await self.insert({**element, "user_id": user_id}) is not None:
+                    inserted[index] = element["_id"]
+        
+        return inserted
+    
+    async def _find_element(self, query: Dict[str, Any]) -> Optional[Tuple[ObjectId, Dict[str, Any]]]:
+        """Bucket ID and transaction for a query on transactions.* fields"""
+        bucket = await self.collection.find_one(query, {"transactions.$": 1, "user_id": 1})
+        if not bucket:
+            return None
+        return bucket["_id"], {**bucket["transactions"][0], "user_id": bucket["user_id"]}
+    
+    async def find_by_transaction_id(self, user_id: str, transaction_id: str) -> Optional[Dict[str, Any]]:
+        """See DocumentUPIStore.find_by_transaction_id"""
+        found = await self._find_element({"user_id": user_id, "transactions.transaction_id": transaction_id})
+        return found[1] if found else None
+    
+    async def get(self, user_id: str, transaction_id: ObjectId,
+                  projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        """See DocumentUPIStore.get"""
+        found = await self._find_element({"user_id": user_id, "transactions._id": transaction_id})
+        if not found:
+            return None
+        transaction = found[1]
+        if projection:
+            transaction = {
+                key: value for key, value in transaction.items() if key in projection or key == "_id"
+            }
+        return transaction
+    
+    def find(self, query: Dict[str, Any], projection: Optional[Dict[str, int]] = None,
+             sort: Optional[List[Tuple[str, int]]] = None):
+        """See DocumentUPIStore.find"""
+        pipeline = self._unwind(query)
+        if sort:
+            pipeline.append({"$sort": dict(sort)})
+        if projection:
+            pipeline.append({"$project": projection})
+        return self.collection.aggregate(pipeline)
+    
+    async def list_month(self, user_id: str, year: int, month: int,
+                         projection: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """A month's transactions, newest first, read from a single bucket"""
+        bucket = await self.collection.find_one({"user_id": user_id, "month": datetime(year, month, 1)})
+        if not bucket:
+            return []
+        
+        transactions = sorted(bucket["transactions"], key=lambda item: item["timestamp"], reverse=True)
+        if projection:
+            return [
+                {key: value for key, value in transaction.items() if key in projection or key == "_id"}
+                for transaction in transactions
+            ]
+        return [{**transaction, "user_id": user_id} for transaction in transactions]
+    
+    def aggregate(self, pipeline: List[Dict[str, Any]]):
+        """
+        See DocumentUPIStore.aggregate
+        
+        The pipeline must start with a $match on user_id; it selects the
+        buckets to unwind. $text is not available on embedded transactions.
+        """
+        return self.collection.aggregate(self._unwind(pipeline[0]["$match"]) + pipeline[1:])
+    
+    async def update(self, user_id: str, transaction_id: ObjectId, fields: Dict[str, Any],
+                     condition: Optional[Dict[str, Any]] = None) -> bool:
+        """See DocumentUPIStore.update"""
+        result = await self.collection.update_one(
+            {"user_id": user_id, "transactions": {"$elemMatch": {"_id": transaction_id, **(condition or {})}}},
+            {"$set": {f"transactions.$.{key}": value for key, value in fields.items()}}
+        )
+        return result.matched_count == 1
+    
+    async def update_many(self, user_id: str, condition: Dict[str, Any], fields: Dict[str, Any]) -> None:
+        """See DocumentUPIStore.update_many"""
+        await self.collection.update_many(
+            {"user_id": user_id, "transactions": {"$elemMatch": condition}},
+            {"$set": {f"transactions.$[t].{key}": value for key, value in fields.items()}},
+            array_filters=[{f"t.{key}": value for key, value in condition.items()}]
+        )
+    
+    async def bulk_update(self, user_id: str, updates: List[Tuple[ObjectId, Dict[str, Any]]]) -> None:
+        """See DocumentUPIStore.bulk_update"""
+        await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"user_id": user_id, "transactions._id": transaction_id},
+                    {"$set": {f"transactions.$.{key}": value for key, value in fields.items()}}
+                )
+                for transaction_id, fields in updates
+            ],
+            ordered=False
+        )
+    
+    async def delete(self, user_id: str, transaction_id: ObjectId) -> Optional[Dict[str, Any]]:
+        """See DocumentUPIStore.delete"""
+        found = await self._find_element({"user_id": user_id, "transactions._id": transaction_id})
+        if not found:
+            return None
+        bucket_id, transaction = found
+        
+        # The filter guarantees the running totals only move if the pull happens
+        bucket = await self.collection.find_one_and_update(
+            {"_id": bucket_id, "transactions._id": transaction_id},
+            {
+                "$pull": {"transactions": {"_id": transaction_id}},
+                "$inc": {"count": -1, "total": -transaction["amount"]}
+            },
+            projection={"count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if not bucket:
+            return None
+        if bucket["count"] == 0:
+            await self.collection.delete_one({"_id": bucket_id, "count": 0})
+        return transaction
+
+
+def get_upi_store():
+    """Store selected by the UPI_STORAGE setting"""
+    if settings.UPI_STORAGE == "buckets":
+        return BucketUPIStore()
+    return DocumentUPIStore()
@@ -0,0 +1,138 @@
+"""
+Rule matching for automatic expense categorization
+"""
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+# Rule types in order of precedence when several rules match
+RULE_TYPE_RANK = {"payee_upi": 2, "keyword": 1, "amount_range": 0}
+
+# Global rules applied when no rule of the user matches
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"rule_type": "keyword", "pattern": pattern, "category": category}
+    for category, patterns in {
+        "Food & Dining": ["swiggy", "zomato", "restaurant", "cafe", "dominos", "pizza", "grocery", "bigbasket", "blinkit", "zepto"],
+        "Transportation": ["uber", "ola", "rapido", "metro", "petrol", "diesel", "fuel", "irctc", "fastag", "parking"],
+        "Utilities": ["electricity", "water bill", "gas bill", "broadband", "recharge", "airtel", "jio", "bescom", "tneb"],
+        "Entertainment": ["netflix", "hotstar", "spotify", "prime video", "bookmyshow", "movie", "pvr"],
+        "Shopping": ["amazon", "flipkart", "myntra", "ajio", "meesho", "nykaa"],
+        "Healthcare": ["pharmacy", "hospital", "clinic", "apollo", "medplus", "1mg", "pharmeasy", "doctor"],
+        "Education": ["school", "college", "tuition", "udemy", "coursera", "byjus"],
+        "Rent": ["rent", "nobroker"],
+        "Insurance": ["insurance", "lic", "policy premium"],
+        "Investments": ["zerodha", "groww", "mutual fund", "sip", "upstox", "ppf"],
+    }.items()
+    for pattern in patterns
+]
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton for finding many keywords in one pass
+    
+    Matches are reported only on word boundaries so that "ola" does not
+    match inside "chocolate".
+    """
+    
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Any]] = [[]]
+    
+    def add(self, pattern: str, value: Any) -> None:
+        """Add a lowercase pattern; build() must be called afterwards"""
+        node = 0
+        for char in pattern:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][char] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = child
+        self._output[node].append((len(pattern), value))
+    
+    def build(self) -> None:
+        """Compute failure links breadth first"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+    
+    def search(self, text: str) -> Iterator[Any]:
+        """Yield values of all patterns found in lowercase text"""
+        node = 0
+        last = len(text) - 1
+        for end, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, value in self._output[node]:
+                start = end - length + 1
+                if (start == 0 or not text[start - 1].isalnum()) and \
+                        (end == last or not text[end + 1].isalnum()):
+                    yield value
+
+
+class CompiledRules:
+    """Categorization rules compiled into lookup structures"""
+    
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.payees: Dict[str, List[Dict[str, Any]]] = {}
+        self.keywords = AhoCorasick()
+        self.amount_rules: List[Dict[str, Any]] = []
+        
+        for rule in rules:
+            if rule["rule_type"] == "payee_upi":
+                self.payees.setdefault(rule["pattern"].lower(), []).append(rule)
+            elif rule["rule_type"] == "keyword":
+                self.keywords.add(rule["pattern"].lower(), rule)
+            else:
+                self.amount_rules.append(rule)
+        
+        self.keywords.build()
+    
+    def match(self, text: str, payee_upi: Optional[str], amount: Optional[float]) -> Optional[Dict[str, Any]]:
+        """
+        Find the best rule for a payment
+        
+        Payee rules match the full UPI ID or its handle before "@".
+        Keyword rules are searched in the text. Amount bounds on any rule
+        must also hold. Ties go to the higher priority, then the longer
+        pattern.
+        """
+        candidates: List[Dict[str, Any]] = []
+        if payee_upi:
+            payee_upi = payee_upi.lower()
+            candidates.extend(self.payees.get(payee_upi, []))
+            handle = payee_upi.split("@", 1)[0]
+            if handle != payee_upi:
+                candidates.extend(self.payees.get(handle, []))
+        if text:
+            candidates.extend(self.keywords.search(text.lower()))
+        candidates.extend(self.amount_rules)
+        
+        best, best_rank = None, None
+        for rule in candidates:
+            if rule.get("min_amount") is not None and (amount is None or amount < rule["min_amount"]):
+                continue
+            if rule.get("max_amount") is not None and (amount is None or amount > rule["max_amount"]):
+                continue
+            
+            rank = (
+                RULE_TYPE_RANK[rule["rule_type"]],
+                rule.get("priority", 0),
+                len(rule.get("pattern") or "")
+            )
+            if best_rank is None or rank > best_rank:
+                best, best_rank = rule, rank
+        
+        return best
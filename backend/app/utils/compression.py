@@ -0,0 +1,53 @@
+"""
+Response compression middleware (brotli when available, else gzip)
+"""
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+
+try:
+    import brotli
+except ImportError:  # Optional: fall back to gzip only
+    brotli = None
+
+
+class BrotliResponder(IdentityResponder):
+    """Brotli counterpart of Starlette's GZipResponder"""
+    content_encoding = "br"
+    
+    def __init__(self, app, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+    
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least minimum_size bytes
+    
+    Brotli is preferred when the client accepts it and the package is
+    installed. Event streams and responses that already carry a
+    Content-Encoding (stored statements) are passed through.
+    """
+    
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        accepted = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and "br" in accepted:
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif "gzip" in accepted:
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        
+        await responder(scope, receive, send)
@@ -0,0 +1,56 @@
+"""
+In-process publish/subscribe for per-user events
+"""
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Set
+
+# Sent instead of an event when a subscriber fell too far behind; the
+# subscriber has to reload its state
+RESYNC = {"type": "resync"}
+
+
+class EventBus:
+    """
+    Fan out events to the subscribers of a user
+    
+    Publishing never blocks the write path: each subscriber has a bounded
+    queue and one that overflows is told to resync instead.
+    """
+    
+    def __init__(self, max_queue_size: int = 256):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+    
+    def has_subscribers(self, user_id: str) -> bool:
+        """Whether anyone is listening for a user's events"""
+        return bool(self._subscribers.get(user_id))
+    
+    @asynccontextmanager
+    async def subscribe(self, user_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Receive a user's events on a queue until the context exits"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers[user_id].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[user_id]
+    
+    def publish(self, user_id: str, event: Dict[str, Any]) -> None:
+        """Deliver an event to every subscriber of a user"""
+        for queue in self._subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Drop the backlog, the subscriber reloads everything anyway
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+
+event_bus = EventBus()
@@ -0,0 +1,79 @@
+"""
+Sparse fieldsets: ?fields= on read endpoints
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Type
+from fastapi import HTTPException, Query, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, Field, create_model
+
+
+@lru_cache(maxsize=None)
+def partial_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """Copy of a response model with every field optional"""
+    fields = {
+        name: (Optional[info.annotation], Field(None, alias=info.alias))
+        for name, info in model.model_fields.items()
+    }
+    return create_model(
+        f"Partial{model.__name__}",
+        __config__=ConfigDict(populate_by_name=True),
+        **fields
+    )
+
+
+class FieldSelection:
+    """
+    Fields requested by the client, or all of them
+    
+    Services turn the selection into a Mongo projection and build partial
+    response models; routes pass their result through render so partial
+    objects are serialized without the fields that were not loaded.
+    """
+    
+    def __init__(self, names: Optional[List[str]] = None, response: Optional[Response] = None):
+        self.names = names
+        self.response = response
+    
+    def projection(self, model: Type[BaseModel]) -> Optional[Dict[str, int]]:
+        """Mongo projection for the selected fields (None loads everything)"""
+        if not self.names:
+            return None
+        
+        known = {name: info.alias or name for name, info in model.model_fields.items()}
+        unknown = [name for name in self.names if name not in known and name != "_id"]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        # _id is always returned
+        return {known.get(name, name): 1 for name in self.names}
+    
+    def model(self, model: Type[BaseModel]) -> Type[BaseModel]:
+        """Response model to build loaded documents with"""
+        return partial_model(model) if self.names else model
+    
+    def render(self, data: Any) -> Any:
+        """Route result: unchanged for full objects, trimmed JSON for partial ones"""
+        if not self.names:
+            return data
+        
+        # Returning a response directly skips headers set on the injected one
+        headers = {key: value for key, value in self.response.headers.items() if key != "content-length"}
+        return JSONResponse(jsonable_encoder(data, by_alias=True, exclude_unset=True), headers=headers)
+
+
+ALL_FIELDS = FieldSelection()
+
+
+def get_fields(
+    response: Response,
+    fields: Optional[str] = Query(
+        None, max_length=500, description="Comma-separated fields to return, e.g. amount,date,category"
+    )
+) -> FieldSelection:
+    """Parse the fields query parameter"""
+    names = [name.strip() for name in (fields or "").split(",") if name.strip()]
+    return FieldSelection(names or None, response)
@@ -0,0 +1,81 @@
+"""
+Foreign exchange rates loaded from a local rate table
+"""
+import json
+import os
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from ..config import settings
+
+DEFAULT_FX_RATES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "fx_rates.json")
+
+
+class FXTable:
+    """
+    Exchange rates for one day
+    
+    Rates are stored as the value of one unit of each currency in the
+    table's base currency, so any pair converts through the base.
+    """
+    
+    def __init__(self, version: str, base: str, rates: Dict[str, float]):
+        self.version = version
+        self.base = base
+        self.rates = {currency.upper(): float(rate) for currency, rate in rates.items()}
+    
+    def supports(self, currency: str) -> bool:
+        """Whether a currency can be converted"""
+        return currency.upper() in self.rates
+    
+    def rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Units of to_currency per unit of from_currency, None if unknown"""
+        source = self.rates.get(from_currency.upper())
+        target = self.rates.get(to_currency.upper())
+        if source is None or not target:
+            return None
+        return source / target
+    
+    def convert_totals(self, totals: Dict[str, float], to_currency: str) -> Tuple[float, List[str]]:
+        """
+        Convert per-currency totals into one currency
+        
+        Works on totals already grouped by currency, so each currency is
+        converted once no matter how many documents it covers.
+        
+        Returns:
+            Tuple of the converted sum and currencies without a rate
+        """
+        total = 0.0
+        missing = []
+        for currency, amount in totals.items():
+            rate = self.rate(currency, to_currency)
+            if rate is None:
+                missing.append(currency)
+            else:
+                total += amount * rate
+        return round(total, 2), missing
+
+
+# (day loaded, file modification time, table)
+_cache: Optional[Tuple[date, float, FXTable]] = None
+
+
+def get_fx_table() -> FXTable:
+    """
+    Get the current rate table
+    
+    The table is read once and kept in memory. It is reloaded when the
+    day changes or the file is replaced, so a daily rate drop is picked
+    up without a restart.
+    """
+    global _cache
+    path = settings.FX_RATES_PATH or DEFAULT_FX_RATES_PATH
+    modified = os.path.getmtime(path)
+    today = date.today()
+    
+    if _cache is None or _cache[0] != today or _cache[1] != modified:
+        with open(path, encoding="utf-8") as rates_file:
+            data = json.load(rates_file)
+        _cache = (today, modified, FXTable(data["version"], data["base"], data["rates"]))
+    
+    return _cache[2]
@@ -0,0 +1,85 @@
+"""
+Idempotency-Key support for create endpoints
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+from fastapi import Header, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from pymongo.errors import DuplicateKeyError
+from ..database import get_database
+
+
+async def get_idempotency_key(
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+) -> Optional[str]:
+    """Read the optional Idempotency-Key request header"""
+    return idempotency_key
+
+
+async def run_idempotent(user_id: str, key: Optional[str], scope: str, payload: Any,
+                         create: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run a create operation at most once per Idempotency-Key
+    
+    The first request with a key stores its response; retries with the
+    same key and body get the stored response without creating anything.
+    Reusing a key for a different request is rejected.
+    
+    Args:
+        user_id: Owner of the key
+        key: Idempotency-Key header value, None to skip idempotency
+        scope: Endpoint the key is used for (e.g. "expenses.create")
+        payload: Request body, fingerprinted to detect key reuse
+        create: Coroutine factory performing the create
+    
+    Returns:
+        Result of create(), or the stored response of the first request
+    """
+    if not key:
+        return await create()
+    
+    collection = get_database().idempotency_keys
+    fingerprint = hashlib.sha256(
+        json.dumps(jsonable_encoder(payload), sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    
+    try:
+        record = await collection.insert_one({
+            "user_id": user_id,
+            "key": key,
+            "scope": scope,
+            "fingerprint": fingerprint,
+            "completed": False,
+            "created_at": datetime.utcnow()
+        })
+    except DuplicateKeyError:
+        existing = await collection.find_one({"user_id": user_id, "key": key})
+        if not existing:
+            # Expired between the insert and the read; start over
+            return await run_idempotent(user_id, key, scope, payload, create)
+        if existing["scope"] != scope or existing["fingerprint"] != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        if not existing["completed"]:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed"
+            )
+        return existing["response"]
+    
+    try:
+        result = await create()
+    except Exception:
+        # Let the client retry with the same key after a failure
+        await collection.delete_one({"_id": record.inserted_id})
+        raise
+    
+    await collection.update_one(
+        {"_id": record.inserted_id},
+        {"$set": {"completed": True, "response": jsonable_encoder(result)}}
+    )
+    return result
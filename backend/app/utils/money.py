@@ -0,0 +1,96 @@
+"""
+Money amounts: rupees at the API, integer paise in the database
+
+Amounts are stored as whole paise so sums in aggregation pipelines and
+running counters are exact. Models mark amount fields with the Money type;
+services convert documents with to_storage before writing and with
+from_storage before building response models.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+from typing import Annotated, Any, Dict, Optional, Tuple, Type, Union, get_args, get_origin
+from pydantic import BaseModel, BeforeValidator
+
+PAISE_PER_RUPEE = 100
+
+
+def round_paise(amount: Decimal) -> int:
+    """Fractional paise rounded to the nearest paisa, halves away from zero"""
+    return int(amount.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def to_paise(amount: Union[float, int, Decimal]) -> int:
+    """Rupee amount as whole paise"""
+    return round_paise(Decimal(str(amount)) * PAISE_PER_RUPEE)
+
+
+def to_rupees(paise: Union[int, float]) -> float:
+    """Paise amount as rupees; fractional paise (e.g. averages) are rounded"""
+    if isinstance(paise, float):
+        paise = round_paise(Decimal(str(paise)))
+    return paise / PAISE_PER_RUPEE
+
+
+def divide(paise: int, divisor: Union[int, Decimal]) -> int:
+    """Share of a paise amount rounded to the nearest paisa"""
+    return round_paise(Decimal(paise) / Decimal(divisor))
+
+
+class _Money:
+    """Marks a field as an amount stored in paise"""
+
+
+def _round_money(value: Any) -> Any:
+    """
+    Round an incoming amount to whole paise
+    
+    Runs before float parsing so gt/ge bounds apply to the amount actually
+    stored: 0.001 rounds to 0 and fails gt=0. Values that are not numbers
+    are left for pydantic to reject.
+    """
+    if isinstance(value, (int, float, Decimal, str)) and not isinstance(value, bool):
+        try:
+            return to_rupees(to_paise(value))
+        except (ArithmeticError, ValueError):
+            return value
+    return value
+
+
+Money = Annotated[float, _Money(), BeforeValidator(_round_money)]
+
+
+def _is_money(annotation: Any) -> bool:
+    """Whether an annotation is Money or Optional[Money]"""
+    if get_origin(annotation) is Annotated:
+        return any(isinstance(item, _Money) for item in annotation.__metadata__)
+    return any(_is_money(arg) for arg in get_args(annotation))
+
+
+@lru_cache(maxsize=None)
+def money_fields(model: Type[BaseModel]) -> Tuple[str, ...]:
+    """Names of the Money fields of a model"""
+    return tuple(
+        name for name, info in model.model_fields.items()
+        if any(isinstance(item, _Money) for item in info.metadata) or _is_money(info.annotation)
+    )
+
+
+def to_storage(data: Dict[str, Any], model: Type[BaseModel]) -> Dict[str, Any]:
+    """Copy of API data with the model's Money fields in paise"""
+    return {
+        key: to_paise(value) if value is not None and key in money_fields(model) else value
+        for key, value in data.items()
+    }
+
+
+def from_storage(document: Dict[str, Any], model: Type[BaseModel]) -> Dict[str, Any]:
+    """Copy of a stored document with the model's Money fields in rupees"""
+    return {
+        key: to_rupees(value) if value is not None and key in money_fields(model) else value
+        for key, value in document.items()
+    }
+
+
+def paise_or_none(amount: Optional[float]) -> Optional[int]:
+    """to_paise for optional query parameters"""
+    return None if amount is None else to_paise(amount)
@@ -0,0 +1,189 @@
+"""
+Token bucket rate limiting middleware
+"""
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Pattern, Tuple
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pymongo import ReturnDocument
+from ..config import settings
+from ..database import get_database
+from .security import BATCH_USER_ID, decode_access_token
+
+
+@dataclass
+class RateLimitRule:
+    """Budget for the requests matching a method and path pattern"""
+    name: str
+    methods: Tuple[str, ...]
+    path: Pattern
+    by_ip: bool  # Key on client IP instead of the authenticated user
+    
+    @property
+    def budget(self) -> Tuple[int, float]:
+        """Bucket capacity and refill rate (tokens per second) from settings"""
+        count, _, period = settings.RATE_LIMITS[self.name].partition("/")
+        seconds = {"second": 1, "minute": 60, "hour": 3600}[period]
+        return int(count), int(count) / seconds
+
+
+# First matching rule applies; requests matching none are not limited
+RULES: List[RateLimitRule] = [
+    RateLimitRule("auth", ("POST",), re.compile(r"^/api/auth/(login|register)$"), by_ip=True),
+    RateLimitRule("auth_refresh", ("POST",), re.compile(r"^/api/auth/refresh$"), by_ip=True),
+    RateLimitRule("dashboard", ("GET",), re.compile(r"^/api/analytics/dashboard$"), by_ip=False),
+    RateLimitRule("emi_schedule", ("GET",), re.compile(r"^/api/emis/[^/]+/schedule$"), by_ip=False),
+    RateLimitRule("default", ("GET", "POST", "PUT", "PATCH", "DELETE"), re.compile(r"^/api/"), by_ip=False),
+]
+
+
+class MemoryBucketStore:
+    """
+    Token buckets kept in process memory
+    
+    Each bucket is two numbers refilled lazily on access, so a check is
+    O(1). The least recently used buckets are dropped beyond max_keys.
+    """
+    
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+    
+    async def take(self, key: str, capacity: int, rate: float) -> Tuple[bool, float]:
+        """
+        Take one token from a bucket
+        
+        Returns:
+            Tuple of whether the request is allowed and the tokens left
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, tokens
+
+
+class MongoBucketStore:
+    """
+    Token buckets shared by all workers through MongoDB
+    
+    Refill and take happen in one pipeline update on the server, so
+    concurrent requests from different processes cannot overspend.
+    """
+    
+    async def take(self, key: str, capacity: int, rate: float) -> Tuple[bool, float]:
+        """Take one token from a bucket; see MemoryBucketStore.take"""
+        elapsed = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, 1000]}
+        bucket = await get_database().rate_limits.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {
+                    "tokens": {"$min": [
+                        capacity,
+                        {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed, rate]}]}
+                    ]},
+                    "updated_at": "$$NOW"
+                }},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]}}}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return bucket["allowed"], bucket["tokens"]
+
+
+def _client_ip(scope) -> str:
+    """
+    Address of the client that sent a request
+    
+    Behind TRUSTED_PROXY_HOPS proxies that is the X-Forwarded-For entry
+    the outermost proxy appended, counted from the right: anything further
+    left came from the client and can be forged to dodge IP budgets.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops > 0:
+        forwarded: List[str] = []
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                forwarded.extend(entry.strip() for entry in value.decode("latin-1").split(","))
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _client_key(scope, rule: RateLimitRule) -> str:
+    """Authenticated user ID, falling back to the client IP"""
+    if not rule.by_ip and BATCH_USER_ID in scope:
+        return f"user:{scope[BATCH_USER_ID]}"
+    if not rule.by_ip:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer":
+                    try:
+                        user_id = decode_access_token(token).get("sub")
+                    except HTTPException:
+                        user_id = None
+                    if user_id:
+                        return f"user:{user_id}"
+                break
+    
+    return f"ip:{_client_ip(scope)}"
+
+
+class RateLimitMiddleware:
+    """
+    Reject requests over their route's budget with 429 and Retry-After
+    
+    Requests are keyed on the JWT subject so one user's burst only drains
+    their own buckets; login, registration and token refresh are keyed on
+    client IP.
+    """
+    
+    def __init__(self, app, store=None):
+        self.app = app
+        self.store = store or (MongoBucketStore() if settings.RATE_LIMIT_BACKEND == "mongo" else MemoryBucketStore())
+    
+    def _match(self, method: str, path: str) -> Optional[RateLimitRule]:
+        """First rule matching a request"""
+        for rule in RULES:
+            if method in rule.methods and rule.path.match(path):
+                return rule
+        return None
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        rule = self._match(scope["method"], scope["path"])
+        if rule is None:
+            return await self.app(scope, receive, send)
+        
+        capacity, rate = rule.budget
+        allowed, tokens = await self.store.take(f"{rule.name}:{_client_key(scope, rule)}", capacity, rate)
+        if not allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests"},
+                headers={
+                    "Retry-After": str(math.ceil((1 - tokens) / rate)),
+                    "X-RateLimit-Limit": str(capacity),
+                    "X-RateLimit-Remaining": "0"
+                }
+            )
+            return await response(scope, receive, send)
+        
+        return await self.app(scope, receive, send)
@@ -0,0 +1,40 @@
+"""
+Writing rebuilt per-user derived documents (rollups, statistics, counters)
+"""
+from typing import Any, Dict, List, Sequence
+from pymongo import ReplaceOne
+
+
+async def replace_rebuilt(collection, user_id: str, documents: List[Dict[str, Any]], key: Sequence[str]) -> None:
+    """
+    Replace a user's derived documents with freshly rebuilt ones
+    
+    Each document is upserted on its unique key and only documents the
+    rebuild no longer produces are deleted. Two rebuilds of the same user
+    running at once (e.g. concurrent first writes) then both succeed with
+    the same result instead of colliding on the unique index.
+    
+    Args:
+        key: Fields that, with user_id, uniquely identify a document
+    """
+    keys = {tuple(document[field] for field in key) for document in documents}
+    stale = [
+        existing["_id"]
+        async for existing in collection.find({"user_id": user_id}, {field: 1 for field in key})
+        if tuple(existing.get(field) for field in key) not in keys
+    ]
+    if stale:
+        await collection.delete_many({"_id": {"$in": stale}})
+    
+    if documents:
+        await collection.bulk_write(
+            [
+                ReplaceOne(
+                    {"user_id": user_id, **{field: document[field] for field in key}},
+                    document,
+                    upsert=True
+                )
+                for document in documents
+            ],
+            ordered=False
+        )
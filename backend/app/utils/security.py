@@ -5,13 +5,16 @@ from datetime import datetime, timedelta
 from typing import Optional
 import bcrypt
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from ..config import settings
 
 # HTTP Bearer token
 security = HTTPBearer()
 
+# ASGI scope key holding the user ID a batch request already authenticated
+BATCH_USER_ID = "fintech.batch_user_id"
+
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt"""
@@ -61,8 +64,13 @@ def decode_access_token(token: str) -> dict:
         )
 
 
-async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+async def get_current_user_id(request: Request,
+                              credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """Get current user ID from JWT token"""
+    # Sub-requests of a batch reuse the batch's verified token
+    if BATCH_USER_ID in request.scope:
+        return request.scope[BATCH_USER_ID]
+    
     token = credentials.credentials
     payload = decode_access_token(token)
     user_id: str = payload.get("sub")
@@ -75,3 +83,33 @@ async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depend
         )
     
     return user_id
+
+
+async def get_stream_user_id(token: str = Query(...)) -> str:
+    """
+    Get current user ID from a JWT passed as a query parameter
+    
+    Used by event streams, since browsers cannot set headers on EventSource.
+    """
+    payload = decode_access_token(token)
+    user_id: str = payload.get("sub")
+    
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return user_id
+
+
+async def get_support_user_id(user_id: str = Depends(get_current_user_id)) -> str:
+    """Get current user ID, requiring a support staff account"""
+    if user_id not in settings.SUPPORT_USER_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Support access required"
+        )
+    
+    return user_id
@@ -1,8 +1,9 @@
 """
 WhatsApp integration using Twilio
 """
-from typing import Optional
-from twilio.rest import Client
+import asyncio
+from functools import cached_property
+from typing import Any, Callable, Optional
 from ..config import settings
 
 
@@ -16,15 +17,22 @@ class WhatsAppService:
             settings.TWILIO_WHATSAPP_FROM
         ])
         
-        if self.enabled:
-            self.client = Client(
-                settings.TWILIO_ACCOUNT_SID,
-                settings.TWILIO_AUTH_TOKEN
-            )
-        else:
-            self.client = None
+        if not self.enabled:
             print("⚠️  WhatsApp reminders disabled: Twilio credentials not configured")
     
+    @cached_property
+    def client(self):
+        """
+        Twilio client, built on the first message
+        
+        twilio.rest pulls in requests and urllib3, so importing it here
+        keeps it off the startup path of every worker.
+        """
+        if not self.enabled:
+            return None
+        from twilio.rest import Client
+        return Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+    
     def send_message(self, to_phone: str, message: str) -> Optional[str]:
         """
         Send WhatsApp message
@@ -58,6 +66,16 @@ class WhatsAppService:
             print(f"❌ Failed to send WhatsApp to {to_phone}: {str(e)}")
             return None
     
+    def send_in_background(self, send: Callable[..., Optional[str]], *args: Any) -> None:
+        """
+        Run a send method in the default executor without awaiting it
+        
+        Failures are reported when the send finishes instead of surfacing
+        as an exception that was never retrieved.
+        """
+        future = asyncio.get_running_loop().run_in_executor(None, send, *args)
+        future.add_done_callback(_report_send_failure)
+    
     def send_emi_reminder(self, name: str, phone: str, loan_name: str, 
                           amount: float, due_date: str) -> Optional[str]:
         """
@@ -84,6 +102,71 @@ class WhatsAppService:
         )
         
         return self.send_message(phone, message)
+    
+    def send_budget_alert(self, name: str, phone: str, category: str, period: str,
+                          spent: float, limit: float, exceeded: bool) -> Optional[str]:
+        """
+        Send budget threshold alert
+        
+        Args:
+            name: User's name
+            phone: User's phone number
+            category: Expense category of the budget
+            period: Month of the spending (e.g., September 2026)
+            spent: Amount spent in the month
+            limit: Monthly budget limit
+            exceeded: Whether the limit has been exceeded
+            
+        Returns:
+            Message SID if successful
+        """
+        from .formatters import format_indian_currency
+        
+        if exceeded:
+            headline = f"You have exceeded your {category} budget"
+        else:
+            headline = f"You are close to your {category} budget"
+        
+        message = (
+            f"Hi {name}! ⚠️\n\n"
+            f"{headline}: {format_indian_currency(spent)} spent "
+            f"of {format_indian_currency(limit)} in {period}."
+        )
+        
+        return self.send_message(phone, message)
+    
+    
+    def send_spending_alert(self, name: str, phone: str, category: str,
+                            description: str, amount: float, average: float) -> Optional[str]:
+        """
+        Send unusual spending alert
+        
+        Args:
+            name: User's name
+            phone: User's phone number
+            category: Expense category
+            description: Expense description
+            amount: Expense amount
+            average: Usual amount of an expense in the category
+            
+        Returns:
+            Message SID if successful
+        """
+        from .formatters import format_indian_currency
+        
+        message = (
+            f"Hi {name}! 🔍\n\n"
+            f"Unusual {category} expense: {description} for {format_indian_currency(amount)}. "
+            f"Your typical {category} expense is {format_indian_currency(average)}.\n\n"
+            f"If you don't recognise it, please check your accounts."
+        )
+        
+        return self.send_message(phone, message)
+
+
+def _report_send_failure(future: "asyncio.Future[Optional[str]]") -> None:
+    if not future.cancelled() and future.exception() is not None:
+        print(f"❌ Failed to send WhatsApp alert: {future.exception()}")
 
 
 # Global instance
@@ -0,0 +1,28 @@
+"""
+Standalone background job worker
+
+Run with `python -m app.worker`, optionally listing the queues to serve:
+`python -m app.worker statements default`. Set JOB_WORKERS_IN_PROCESS=false
+on the API when workers run separately.
+"""
+import asyncio
+import sys
+
+from .database import connect_to_mongo, close_mongo_connection
+from .services.job_service import JobWorker
+
+
+async def main(queues):
+    """Serve job queues until interrupted"""
+    await connect_to_mongo()
+    try:
+        await JobWorker(queues or None).run()
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(sys.argv[1:]))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,115 @@
+"""
+Shared fixtures: the API running on the in-process database backend
+
+Every test gets a fresh in-memory database through the app lifespan, so
+no MongoDB server is needed. Background jobs and rate limiting are
+switched off to keep requests deterministic.
+"""
+import os
+
+os.environ["DATABASE_BACKEND"] = "memory"
+os.environ["JOB_WORKERS_IN_PROCESS"] = "false"
+os.environ["JOB_SCHEDULER"] = "false"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+from itertools import count
+from typing import Any, Awaitable, Callable, Dict
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import get_database
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def run(client) -> Callable[[Awaitable[Any]], Any]:
+    """Run a coroutine on the app's event loop, for direct service and database access"""
+    def call(awaitable: Awaitable[Any]) -> Any:
+        async def wrapper():
+            return await awaitable
+        return client.portal.call(wrapper)
+    return call
+
+
+@pytest.fixture
+def db(client):
+    """The in-memory database behind client"""
+    return get_database()
+
+
+@pytest.fixture
+def registered(client) -> Dict[str, Any]:
+    """Token response of a newly registered user"""
+    response = client.post("/api/auth/register", json={
+        "name": "Asha",
+        "email": "asha@example.com",
+        "phone": "+911234567890",
+        "password": "secret1"
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+@pytest.fixture
+def user_id(registered) -> str:
+    return registered["user"]["_id"]
+
+
+@pytest.fixture
+def auth(registered) -> Dict[str, str]:
+    """Authorization headers of the registered user"""
+    return {"Authorization": f"Bearer {registered['access_token']}"}
+
+
+@pytest.fixture
+def add_expense(client, auth):
+    """Create an expense through the API and return the response body"""
+    def add(amount: float, date: str = "2026-03-05T10:00:00", category: str = "Others",
+            description: str = "misc", payment_method: str = "Cash") -> Dict[str, Any]:
+        response = client.post("/api/expenses/", headers=auth, json={
+            "category": category,
+            "amount": amount,
+            "description": description,
+            "date": date,
+            "payment_method": payment_method
+        })
+        assert response.status_code == 201, response.text
+        return response.json()
+    return add
+
+
+@pytest.fixture
+def transaction():
+    """Build a UPI transaction request body"""
+    def body(number: int, amount: float, payee_upi: str = "shop@upi", payee_name: str = "Shop",
+             status: str = "Success") -> Dict[str, Any]:
+        return {
+            "transaction_id": f"TXN{number:06d}",
+            "payee_name": payee_name,
+            "payee_upi": payee_upi,
+            "amount": amount,
+            "status": status
+        }
+    return body
+
+
+@pytest.fixture
+def add_transaction(client, auth, transaction):
+    """Record a UPI transaction through the API and return the response body"""
+    numbers = count(1)
+    
+    def add(amount: float, payee_upi: str = "shop@upi", payee_name: str = "Shop",
+            status: str = "Success") -> Dict[str, Any]:
+        response = client.post("/api/upi/", headers=auth, json=transaction(
+            next(numbers), amount, payee_upi, payee_name, status
+        ))
+        assert response.status_code == 201, response.text
+        return response.json()
+    return add
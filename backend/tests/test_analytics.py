@@ -0,0 +1,112 @@
+"""
+Period analytics, the spending heatmap and its conditional GET
+"""
+from datetime import date
+
+from app.services import heatmap_service
+
+
+def test_periods_of_whole_months(client, auth, add_expense):
+    add_expense(100, date="2026-01-10T10:00:00", category="Rent")
+    add_expense(50.5, date="2026-02-01T00:00:00", category="Others")
+    add_expense(25, date="2026-02-28T23:59:00", category="Rent")
+    add_expense(999, date="2026-04-01T00:00:00", category="Rent")
+    
+    response = client.get("/api/analytics/periods?from=2026-01-01&to=2026-04-01", headers=auth)
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["total"] == 175.5
+    assert result["rollup_months"] == 3
+    assert [(b["period_start"], b["total"], b["count"]) for b in result["buckets"]] == [
+        ("2026-01-01", 100, 1), ("2026-02-01", 75.5, 2)
+    ]
+    
+    quarters = client.get(
+        "/api/analytics/periods?from=2026-01-01&to=2026-07-01&granularity=quarter&group_by=category",
+        headers=auth
+    ).json()
+    assert [(b["period_start"], b["group"], b["total"]) for b in quarters["buckets"]] == [
+        ("2026-01-01", "Others", 50.5), ("2026-01-01", "Rent", 125), ("2026-04-01", "Rent", 999)
+    ]
+
+
+def test_periods_by_day_and_week_in_a_timezone(client, auth, add_expense):
+    # 2026-03-02 is a Monday; 20:00 UTC on the 4th is the 5th in Kolkata
+    add_expense(10, date="2026-03-02T10:00:00")
+    add_expense(20, date="2026-03-04T20:00:00")
+    add_expense(30, date="2026-03-09T01:00:00")
+    params = {"from": "2026-03-01", "to": "2026-03-15", "timezone": "Asia/Kolkata"}
+    
+    days = client.get("/api/analytics/periods", headers=auth, params={**params, "granularity": "day"})
+    assert days.status_code == 200, days.text
+    assert days.json()["rollup_months"] == 0
+    assert [(b["period_start"], b["total"]) for b in days.json()["buckets"]] == [
+        ("2026-03-02", 10), ("2026-03-05", 20), ("2026-03-09", 30)
+    ]
+    
+    weeks = client.get("/api/analytics/periods", headers=auth, params={**params, "granularity": "week"}).json()
+    assert [(b["period_start"], b["total"]) for b in weeks["buckets"]] == [("2026-03-02", 30), ("2026-03-09", 30)]
+
+
+def test_financial_years_over_partial_months(client, auth, add_expense):
+    add_expense(10, date="2026-03-20T10:00:00")
+    add_expense(20, date="2026-04-02T10:00:00")
+    
+    result = client.get("/api/analytics/periods", headers=auth, params={
+        "from": "2026-03-15", "to": "2026-04-15", "granularity": "fiscal_year"
+    }).json()
+    assert [(b["period_start"], b["total"]) for b in result["buckets"]] == [("2025-04-01", 10), ("2026-04-01", 20)]
+
+
+def test_periods_reject_an_empty_range(client, auth):
+    response = client.get("/api/analytics/periods?from=2026-02-01&to=2026-01-01", headers=auth)
+    assert response.status_code == 400
+
+
+def _days(heatmap):
+    return dict(zip(heatmap["offsets"], zip(heatmap["totals"], heatmap["counts"])))
+
+
+def test_heatmap_follows_expense_writes(client, auth, db, run, user_id, add_expense):
+    url = "/api/analytics/heatmap?start=2026-01-01"
+    add_expense(100, date="2026-01-01T10:00:00")
+    assert _days(client.get(url, headers=auth).json()) == {0: (100, 1)}
+    
+    second = add_expense(50, date="2026-01-01T18:00:00")
+    third = add_expense(20, date="2026-01-03T10:00:00")
+    client.put(f"/api/expenses/{second['_id']}", headers=auth, json={"amount": 70})
+    client.put(f"/api/expenses/{third['_id']}", headers=auth, json={"date": "2026-01-05T10:00:00"})
+    add_expense(500, date="2027-01-01T10:00:00")  # Outside the window
+    
+    heatmap = client.get(url, headers=auth).json()
+    assert (heatmap["start"], heatmap["end"]) == ("2026-01-01", "2027-01-01")
+    assert _days(heatmap) == {0: (170, 2), 4: (20, 1)}
+    assert heatmap["max_total"] == 170
+    
+    run(db.spending_heatmaps.delete_many({"user_id": user_id}))
+    assert client.get(url, headers=auth).json() == heatmap
+
+
+def test_heatmap_is_not_modified_until_an_expense_changes(client, auth, add_expense):
+    url = "/api/analytics/heatmap?start=2026-01-01"
+    etag = client.get(url, headers=auth).headers["ETag"]
+    
+    assert client.get(url, headers={**auth, "If-None-Match": etag}).status_code == 304
+    add_expense(100, date="2026-01-01T10:00:00")
+    assert client.get(url, headers={**auth, "If-None-Match": etag}).status_code == 200
+
+
+def test_default_heatmap_etag_changes_with_the_month(client, auth, monkeypatch):
+    first = client.get("/api/analytics/heatmap", headers=auth)
+    etag = first.headers["ETag"]
+    
+    class NextMonth(date):
+        @classmethod
+        def today(cls):
+            return date.fromisoformat(first.json()["end"])
+    
+    monkeypatch.setattr(heatmap_service, "date", NextMonth)
+    response = client.get("/api/analytics/heatmap", headers={**auth, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["start"] > first.json()["start"]
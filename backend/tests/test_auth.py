@@ -0,0 +1,58 @@
+"""
+Registration, refresh token rotation and logout
+"""
+
+
+def test_access_token_authenticates(client, auth):
+    response = client.get("/api/auth/me", headers=auth)
+    assert response.status_code == 200
+    assert response.json()["email"] == "asha@example.com"
+
+
+def test_login(client, registered):
+    response = client.post("/api/auth/login", json={"email": "asha@example.com", "password": "secret1"})
+    assert response.status_code == 200
+    assert response.json()["user"]["_id"] == registered["user"]["_id"]
+    
+    wrong = client.post("/api/auth/login", json={"email": "asha@example.com", "password": "secret2"})
+    assert wrong.status_code == 401
+
+
+def test_refresh_rotates_the_token(client, registered):
+    response = client.post("/api/auth/refresh", json={"refresh_token": registered["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != registered["refresh_token"]
+    
+    headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    
+    again = client.post("/api/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert again.status_code == 200
+
+
+def test_reusing_a_rotated_token_ends_the_session(client, registered):
+    rotated = client.post("/api/auth/refresh", json={"refresh_token": registered["refresh_token"]}).json()
+    
+    reused = client.post("/api/auth/refresh", json={"refresh_token": registered["refresh_token"]})
+    assert reused.status_code == 401
+    # The replay may come from a stolen token, so its successor stops working too
+    current = client.post("/api/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert current.status_code == 401
+
+
+def test_logout(client, registered):
+    response = client.post("/api/auth/logout", json={"refresh_token": registered["refresh_token"]})
+    assert response.status_code == 200
+    
+    refreshed = client.post("/api/auth/refresh", json={"refresh_token": registered["refresh_token"]})
+    assert refreshed.status_code == 401
+
+
+def test_logout_everywhere(client, auth, registered):
+    other = client.post("/api/auth/login", json={"email": "asha@example.com", "password": "secret1"}).json()
+    
+    response = client.delete("/api/auth/sessions", headers=auth)
+    assert response.json()["revoked"] == 2
+    for token in (registered["refresh_token"], other["refresh_token"]):
+        assert client.post("/api/auth/refresh", json={"refresh_token": token}).status_code == 401
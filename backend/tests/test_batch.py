@@ -0,0 +1,87 @@
+"""
+Batched GET requests
+"""
+import asyncio
+
+from app.services import batch_service
+from app.services.emi_service import EMIService
+
+
+def _batch(client, headers, **paths):
+    response = client.post("/api/batch/", headers=headers, json={
+        "requests": [{"id": key, "path": path} for key, path in paths.items()]
+    })
+    assert response.status_code == 200, response.text
+    return {item.pop("id"): item for item in response.json()["responses"]}
+
+
+def test_sub_requests_answer_like_their_endpoints(client, auth, add_expense):
+    expense = add_expense(100)
+    
+    results = _batch(
+        client, auth,
+        expenses="/api/expenses/",
+        expense=f"/api/expenses/{expense['_id']}?fields=amount",
+        budgets="/api/budgets/",
+        invalid="/api/upi/?month=3"
+    )
+    assert list(results) == ["expenses", "expense", "budgets", "invalid"]
+    assert [item["_id"] for item in results["expenses"]["body"]] == [expense["_id"]]
+    assert results["expense"] == {"status": 200, "headers": {}, "body": {"_id": expense["_id"], "amount": 100}}
+    assert (results["budgets"]["status"], results["budgets"]["body"]) == (200, [])
+    assert results["invalid"]["status"] == 400
+
+
+def test_sub_requests_run_as_the_batch_user(client, add_expense):
+    add_expense(100)
+    other = client.post("/api/auth/register", json={
+        "name": "Ravi", "email": "ravi@example.com", "phone": "+919876543210", "password": "secret1"
+    }).json()
+    other_auth = {"Authorization": f"Bearer {other['access_token']}"}
+    
+    results = _batch(client, other_auth, expenses="/api/expenses/", me="/api/auth/me")
+    assert results["expenses"]["body"] == []
+    assert results["me"]["body"]["email"] == "ravi@example.com"
+
+
+def test_batch_requires_authentication(client):
+    response = client.post("/api/batch/", json={"requests": [{"id": "me", "path": "/api/auth/me"}]})
+    assert response.status_code in (401, 403)
+    
+    invalid = {"Authorization": "Bearer invalid"}
+    response = client.post("/api/batch/", headers=invalid, json={"requests": [{"id": "me", "path": "/api/auth/me"}]})
+    assert response.status_code == 401
+
+
+def test_etags_are_passed_back(client, auth):
+    etag = _batch(client, auth, upi="/api/upi/")["upi"]["headers"]["etag"]
+    assert etag == client.get("/api/upi/", headers=auth).headers["ETag"]
+
+
+def test_streams_and_nested_batches_are_refused(client, auth):
+    results = _batch(
+        client, auth,
+        stream="/api/analytics/dashboard/stream?token=x",
+        nested="/api/batch/",
+        dashboard="/api/analytics/dashboard"
+    )
+    for key in ("stream", "nested"):
+        assert results[key] == {"status": 400, "headers": {}, "body": {"detail": "Endpoint cannot be batched"}}
+    assert results["dashboard"]["status"] == 200
+
+
+def test_only_api_paths_are_accepted(client, auth):
+    response = client.post("/api/batch/", headers=auth, json={"requests": [{"id": "docs", "path": "/docs"}]})
+    assert response.status_code == 422
+
+
+def test_slow_sub_requests_time_out(client, auth, monkeypatch):
+    monkeypatch.setattr(batch_service, "SUBREQUEST_TIMEOUT_SECONDS", 0.05)
+    
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(10)
+    
+    monkeypatch.setattr(EMIService, "get_upcoming_payments", hang)
+    results = _batch(client, auth, upcoming="/api/emis/upcoming", budgets="/api/budgets/")
+    assert results["upcoming"] == {"status": 504, "headers": {}, "body": {"detail": "Sub-request timed out"}}
+    assert results["budgets"]["status"] == 200
@@ -0,0 +1,115 @@
+"""
+Keyword matching and rule precedence of automatic categorization
+"""
+from app.services import categorization_service
+from app.services.categorization_service import CategorizationService
+from app.services.job_service import JobWorker
+from app.utils.categorizer import AhoCorasick, CompiledRules
+
+
+def automaton(*patterns):
+    matcher = AhoCorasick()
+    for pattern in patterns:
+        matcher.add(pattern, pattern)
+    matcher.build()
+    return matcher
+
+
+def test_finds_every_keyword_in_one_pass():
+    matcher = automaton("he", "she", "his", "hers")
+    assert sorted(matcher.search("she said hers is his")) == ["hers", "his", "she"]
+
+
+def test_overlapping_keywords_on_word_boundaries():
+    matcher = automaton("prime", "prime video", "video")
+    assert sorted(matcher.search("prime video renewal")) == ["prime", "prime video", "video"]
+
+
+def test_matches_only_whole_words():
+    matcher = automaton("ola", "sip")
+    assert list(matcher.search("chocolate gossip")) == []
+    assert list(matcher.search("ola ride")) == ["ola"]
+    assert list(matcher.search("monthly sip.")) == ["sip"]
+
+
+def test_payee_rules_beat_keyword_rules():
+    rules = CompiledRules([
+        {"rule_type": "keyword", "pattern": "swiggy", "category": "Food & Dining"},
+        {"rule_type": "payee_upi", "pattern": "landlord", "category": "Rent"}
+    ])
+    assert rules.match("swiggy order", "landlord@okaxis", 500)["category"] == "Rent"
+    assert rules.match("swiggy order", "someone@okaxis", 500)["category"] == "Food & Dining"
+
+
+def test_longer_keyword_wins_a_tie():
+    rules = CompiledRules([
+        {"rule_type": "keyword", "pattern": "prime", "category": "Shopping"},
+        {"rule_type": "keyword", "pattern": "prime video", "category": "Entertainment"}
+    ])
+    assert rules.match("prime video", None, None)["category"] == "Entertainment"
+
+
+def test_priority_beats_pattern_length():
+    rules = CompiledRules([
+        {"rule_type": "keyword", "pattern": "prime", "category": "Shopping", "priority": 1},
+        {"rule_type": "keyword", "pattern": "prime video", "category": "Entertainment"}
+    ])
+    assert rules.match("prime video", None, None)["category"] == "Shopping"
+
+
+def test_amount_bounds_must_hold():
+    rules = CompiledRules([
+        {"rule_type": "keyword", "pattern": "amazon", "category": "Shopping", "max_amount": 1000},
+        {"rule_type": "amount_range", "min_amount": 1000, "category": "Investments"}
+    ])
+    assert rules.match("amazon", None, 500)["category"] == "Shopping"
+    assert rules.match("amazon", None, 5000)["category"] == "Investments"
+    assert rules.match("amazon", None, None) is None
+
+
+def test_uncategorized_expenses_are_classified_on_create(client, auth):
+    response = client.post("/api/expenses/", headers=auth, json={
+        "amount": 250,
+        "description": "Ola ride to office",
+        "date": "2026-03-05T10:00:00",
+        "payment_method": "Cash"
+    })
+    assert response.status_code == 201
+    assert response.json()["category"] == "Transportation"
+
+
+def test_compiled_rules_are_cached_for_recent_users(run, db, monkeypatch):
+    monkeypatch.setattr(categorization_service, "RULE_CACHE_MAX_USERS", 2)
+    monkeypatch.setattr(categorization_service, "_user_rules", categorization_service.OrderedDict())
+    service = CategorizationService()
+    
+    for user in ("a", "b", "a", "c"):
+        run(service._get_user_rules(user))
+    assert list(categorization_service._user_rules) == ["a", "c"]
+
+
+def test_recategorize_runs_as_a_job(client, auth, run):
+    # Registers the handlers, as JobWorker.run does
+    from app.services import job_handlers  # noqa: F401
+    
+    expense = client.post("/api/expenses/", headers=auth, json={
+        "amount": 250, "description": "Ola ride to office", "date": "2026-03-05T10:00:00", "payment_method": "Cash"
+    }).json()
+    assert expense["category"] == "Transportation"
+    rule = client.post("/api/categorization/rules", headers=auth, json={
+        "rule_type": "keyword", "pattern": "office", "category": "Others", "priority": 10
+    })
+    assert rule.status_code == 201, rule.text
+    
+    response = client.post("/api/categorization/recategorize", headers=auth)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert client.get(f"/api/jobs/{job_id}", headers=auth).json()["status"] == "queued"
+    
+    worker = JobWorker(queues=["default"], concurrency=1)
+    run(worker._run(run(worker.job_queue.lease("default", worker.worker_id))))
+    
+    job = client.get(f"/api/jobs/{job_id}", headers=auth).json()
+    assert job["status"] == "succeeded", job["last_error"]
+    assert job["result"] == {"expenses_updated": 1, "transactions_updated": 0}
+    assert client.get(f"/api/expenses/{expense['_id']}", headers=auth).json()["category"] == "Others"
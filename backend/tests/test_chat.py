@@ -0,0 +1,38 @@
+"""
+Support chat history paging
+"""
+import pytest
+
+
+def test_history_pages_by_cursor(client, auth):
+    for number in range(5):
+        response = client.post("/api/chat/messages", headers=auth, json={"message": f"message {number}"})
+        assert response.status_code == 201
+    
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"before": cursor} if cursor else {})}
+        page = client.get("/api/chat/messages", headers=auth, params=params).json()
+        seen.extend(message["message"] for message in page["messages"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    
+    assert seen == [f"message {number}" for number in reversed(range(5))]
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "2026-01-01T00:00:00_not-an-id", "yesterday_0123456789abcdef01234567"])
+def test_malformed_cursor_is_rejected(client, auth, cursor):
+    response = client.get("/api/chat/messages", headers=auth, params={"before": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_socket_pushes_events_after_client_frames(client, auth, registered):
+    with client.websocket_connect(f"/api/chat/ws?token={registered['access_token']}") as socket:
+        socket.send_text("ping")
+        response = client.post("/api/chat/messages", headers=auth, json={"message": "hello"})
+        assert response.status_code == 201
+        event = socket.receive_json()
+        assert (event["type"], event["message"]["message"]) == ("message", "hello")
@@ -0,0 +1,93 @@
+"""
+Response compression and conditional GET of list endpoints
+"""
+import gzip
+
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+from fastapi.testclient import TestClient
+
+from app.utils.compression import CompressionMiddleware
+
+
+def _expenses(client, auth, encoding):
+    return client.get("/api/expenses/", headers={**auth, "Accept-Encoding": encoding})
+
+
+def test_large_responses_are_compressed(client, auth, add_expense):
+    for amount in range(1, 11):
+        add_expense(amount, description="a description long enough to pass the minimum size")
+    
+    brotli_response = _expenses(client, auth, "gzip, br")
+    assert brotli_response.headers["content-encoding"] == "br"
+    assert brotli_response.headers["vary"] == "Accept-Encoding"
+    assert len(brotli_response.json()) == 10
+    
+    gzip_response = _expenses(client, auth, "gzip")
+    assert gzip_response.headers["content-encoding"] == "gzip"
+    assert gzip_response.json() == brotli_response.json()
+    
+    assert "content-encoding" not in _expenses(client, auth, "identity").headers
+
+
+def test_small_responses_are_sent_as_is(client, auth, add_expense):
+    add_expense(100)
+    assert "content-encoding" not in _expenses(client, auth, "gzip, br").headers
+
+
+def test_encoded_and_streamed_responses_pass_through():
+    body = gzip.compress(b"x" * 5000)
+    
+    async def statement(request):
+        return Response(body, media_type="application/pdf", headers={"Content-Encoding": "gzip"})
+    
+    async def events(request):
+        return Response("data: {}\n\n" * 500, media_type="text/event-stream")
+    
+    app = Starlette(routes=[Route("/statement", statement), Route("/events", events)])
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    with TestClient(app) as test_client:
+        statement_response = test_client.get("/statement", headers={"Accept-Encoding": "br"})
+        assert statement_response.headers["content-encoding"] == "gzip"
+        assert statement_response.content == b"x" * 5000
+        assert "content-encoding" not in test_client.get("/events", headers={"Accept-Encoding": "br"}).headers
+
+
+def test_brotli_responder_round_trips_streamed_bodies():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for chunk in (b"a" * 2000, b"b" * 2000):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    
+    response = TestClient(CompressionMiddleware(app, minimum_size=100)).get("/", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.content == b"a" * 2000 + b"b" * 2000
+
+
+def test_unchanged_lists_are_not_modified(client, auth, add_expense):
+    add_expense(100)
+    etag = client.get("/api/expenses/", headers=auth).headers["ETag"]
+    
+    cached = client.get("/api/expenses/", headers={**auth, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    
+    # Other query strings are other representations
+    other = client.get("/api/expenses/?month=3&year=2026", headers={**auth, "If-None-Match": etag})
+    assert other.status_code == 200
+    
+    add_expense(200)
+    changed = client.get("/api/expenses/", headers={**auth, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()) == 2
+
+
+def test_upi_writes_change_the_list_etag(client, auth, add_transaction):
+    etag = client.get("/api/upi/", headers=auth).headers["ETag"]
+    assert client.get("/api/upi/", headers={**auth, "If-None-Match": etag}).status_code == 304
+    
+    add_transaction(100)
+    assert client.get("/api/upi/", headers={**auth, "If-None-Match": etag}).status_code == 200
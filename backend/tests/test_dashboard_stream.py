@@ -0,0 +1,174 @@
+"""
+Live dashboard updates over server-sent events
+"""
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from app.config import settings
+from app.models.expense import ExpenseCreate
+from app.services.dashboard_stream_service import (
+    DashboardStream, _deltas, publish_resync, watch_change_streams
+)
+from app.services.expense_service import ExpenseService
+from app.utils.events import event_bus
+
+
+class Connection:
+    """A dashboard stream read on the app's event loop"""
+    
+    def __init__(self, run, user_id):
+        self.run = run
+        self.connected = True
+        self.dashboard = DashboardStream(user_id)
+        self.events = self.dashboard.events(self.is_disconnected)
+    
+    async def is_disconnected(self):
+        return not self.connected
+    
+    def read(self):
+        name, data = self.run(self.events.__anext__()).strip().split("\n")
+        return name.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+    
+    def close(self):
+        self.connected = False
+        self.run(self.events.aclose())
+
+
+@pytest.fixture
+def stream(run, user_id):
+    connection = Connection(run, user_id)
+    yield connection
+    connection.close()
+
+
+def _expense(amount, category="Others"):
+    return ExpenseCreate(
+        category=category,
+        amount=amount,
+        description="misc",
+        date=datetime.now(),
+        payment_method="Cash"
+    )
+
+
+def test_expense_deltas_move_spending_and_category():
+    expense = {"date": datetime(2026, 3, 5), "category": "Rent", "amount": 10000}
+    moved = {**expense, "date": datetime(2026, 4, 1), "amount": 12000}
+    
+    assert _deltas("expenses", expense, moved) == {
+        ("spending", 2026, 3): -10000,
+        ("category", 2026, 3, "Rent"): -10000,
+        ("spending", 2026, 4): 12000,
+        ("category", 2026, 4, "Rent"): 12000
+    }
+    assert _deltas("expenses", expense, dict(expense)) == {}
+
+
+def test_inactive_liabilities_do_not_count():
+    active = {"status": "Active", "amount": 50000}
+    assert _deltas("liabilities", active, {**active, "status": "Closed"}) == {"total_liabilities": -50000}
+
+
+def test_stream_starts_with_the_dashboard(client, auth, stream):
+    event, snapshot = stream.read()
+    
+    assert event == "snapshot"
+    assert snapshot == client.get("/api/analytics/dashboard", headers=auth).json()
+
+
+def test_writes_arrive_as_deltas(run, user_id, stream):
+    stream.read()
+    expense = run(ExpenseService().create_expense(user_id, _expense(120.5, "Rent")))
+    
+    event, changed = stream.read()
+    assert event == "delta"
+    assert changed["monthly_spending"] == 120.5
+    assert changed["category_breakdown"] == {"Rent": 120.5}
+    
+    run(ExpenseService().delete_expense(user_id, expense.id))
+    event, changed = stream.read()
+    assert (changed["monthly_spending"], changed["category_breakdown"]) == (0, {})
+
+
+def test_deltas_keep_the_stream_equal_to_a_fresh_load(client, auth, run, user_id, stream):
+    stream.read()
+    service = ExpenseService()
+    for amount, category in [(100, "Rent"), (0.1, "Others"), (0.2, "Others")]:
+        run(service.create_expense(user_id, _expense(amount, category)))
+        stream.read()
+    
+    live = json.loads(json.dumps(stream.dashboard.summary, default=str))
+    assert live["category_breakdown"] == {"Rent": 100, "Others": 0.3}
+    assert live == client.get("/api/analytics/dashboard", headers=auth).json()
+
+
+def test_resync_sends_a_new_snapshot(run, user_id, stream):
+    stream.read()
+    run(_publish_resync(user_id))
+    
+    event, snapshot = stream.read()
+    assert event == "snapshot"
+    assert snapshot["monthly_spending"] == 0
+
+
+async def _publish_resync(user_id):
+    publish_resync(user_id)
+
+
+def test_streams_unsubscribe_when_closed(user_id, stream):
+    stream.read()
+    assert event_bus.has_subscribers(user_id)
+    
+    stream.close()
+    assert not event_bus.has_subscribers(user_id)
+
+
+def test_change_streams_carry_pre_images(db, run, user_id):
+    async def changes():
+        async with db.watch(
+            [{"$match": {"ns.coll": "expenses"}}],
+            full_document="updateLookup",
+            full_document_before_change="whenAvailable"
+        ) as changes:
+            await db.expenses.insert_one({"user_id": user_id, "amount": 100})
+            await db.assets.insert_one({"user_id": user_id, "value": 5})
+            await db.expenses.update_one({"user_id": user_id}, {"$inc": {"amount": 50}})
+            await db.expenses.delete_one({"user_id": user_id})
+            return [await changes.next() for _ in range(3)]
+    
+    insert, update, delete = run(changes())
+    assert [change["operationType"] for change in (insert, update, delete)] == ["insert", "update", "delete"]
+    assert insert["fullDocument"]["amount"] == 100
+    assert (update["fullDocumentBeforeChange"]["amount"], update["fullDocument"]["amount"]) == (100, 150)
+    assert update["updateDescription"]["updatedFields"] == {"amount": 150}
+    assert delete["fullDocumentBeforeChange"]["amount"] == 150
+    assert delete["documentKey"] == {"_id": insert["documentKey"]["_id"]}
+
+
+def test_change_streams_feed_dashboard_streams(run, user_id, stream, monkeypatch):
+    monkeypatch.setattr(settings, "DASHBOARD_CHANGE_STREAMS", True)
+    
+    async def start():
+        task = asyncio.create_task(watch_change_streams())
+        await asyncio.sleep(0)
+        return task
+    
+    async def stop(task):
+        task.cancel()
+    
+    task = run(start())
+    try:
+        stream.read()
+        run(ExpenseService().create_expense(user_id, _expense(75, "Rent")))
+        event, changed = stream.read()
+        assert event == "delta"
+        assert changed["category_breakdown"] == {"Rent": 75}
+    finally:
+        run(stop(task))
+
+
+def test_stream_requires_a_valid_token(client):
+    assert client.get("/api/analytics/dashboard/stream?token=invalid").status_code == 401
@@ -0,0 +1,40 @@
+"""
+EMI amounts and amortization schedules
+"""
+from datetime import date
+
+import pytest
+
+from app.services.emi_service import EMIService
+from app.utils.money import to_paise
+
+
+@pytest.fixture
+def service(db):
+    return EMIService()
+
+
+def test_calculate_emi(service):
+    assert service.calculate_emi(to_paise(100000), 12, 12) == 888488
+
+
+def test_calculate_emi_without_interest(service):
+    assert service.calculate_emi(to_paise(100000), 0, 12) == 833333
+
+
+@pytest.mark.parametrize("rate, tenure", [(12, 12), (8.5, 240), (0, 7)])
+def test_schedule_repays_the_principal_exactly(service, rate, tenure):
+    principal = to_paise(123456.78)
+    schedule = service.generate_payment_schedule(principal, rate, tenure, date(2026, 1, 15))
+    
+    assert len(schedule) == tenure
+    assert sum(to_paise(item.principal) for item in schedule) == principal
+    assert schedule[-1].balance == 0
+    assert all(item.balance >= 0 for item in schedule)
+
+
+def test_schedule_dates_are_monthly(service):
+    schedule = service.generate_payment_schedule(to_paise(1000), 10, 3, date(2026, 1, 15))
+    assert [item.payment_date for item in schedule] == [
+        date(2026, 1, 15), date(2026, 2, 15), date(2026, 3, 15)
+    ]
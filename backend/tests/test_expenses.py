@@ -0,0 +1,110 @@
+"""
+Expense writes and the models derived from them
+"""
+import asyncio
+import statistics
+
+from app.services.anomaly_service import SpendingAnomalyService
+from app.services.rollup_service import SpendingRollupService
+
+
+def test_offset_dates_are_stored_as_utc(client, auth, add_expense):
+    expense = add_expense(100, date="2026-03-05T01:30:00+05:30")
+    assert expense["date"] == "2026-03-04T20:00:00"
+    assert expense["budget_status"]["month"] == 3
+
+
+def test_update_and_delete(client, auth, add_expense):
+    expense = add_expense(100)
+    
+    response = client.put(f"/api/expenses/{expense['_id']}", headers=auth, json={"amount": 150.25})
+    assert response.status_code == 200
+    assert response.json()["amount"] == 150.25
+    assert client.get(f"/api/expenses/{expense['_id']}", headers=auth).json()["amount"] == 150.25
+    
+    response = client.delete(f"/api/expenses/{expense['_id']}", headers=auth)
+    assert response.status_code == 200
+    assert client.get(f"/api/expenses/{expense['_id']}", headers=auth).status_code == 404
+
+
+def test_budget_status_follows_every_write(client, auth, add_expense):
+    response = client.post("/api/budgets/", headers=auth, json={
+        "category": "Rent", "monthly_limit": 1000, "alert_threshold": 80
+    })
+    assert response.status_code == 201
+    
+    first = add_expense(500, category="Rent")
+    assert first["budget_status"]["spent"] == 500
+    assert not first["budget_status"]["threshold_reached"]
+    
+    second = add_expense(400.5, category="Rent")
+    assert second["budget_status"]["spent"] == 900.5
+    assert second["budget_status"]["threshold_reached"]
+    
+    moved = client.put(f"/api/expenses/{second['_id']}", headers=auth, json={"date": "2026-04-01T10:00:00"})
+    assert moved.json()["budget_status"]["spent"] == 400.5
+    
+    deleted = client.delete(f"/api/expenses/{first['_id']}", headers=auth).json()
+    assert deleted["budget_status"]["spent"] == 0
+
+
+def test_concurrent_rebuilds_agree(db, run, user_id, add_expense):
+    add_expense(100, category="Rent")
+    add_expense(200.5, category="Rent", date="2026-04-05T10:00:00")
+    add_expense(50, category="Others")
+    service = SpendingRollupService()
+    
+    async def rebuild_concurrently():
+        await asyncio.gather(*(service.rebuild(user_id) for _ in range(3)))
+    
+    run(rebuild_concurrently())
+    
+    rollups = run(db.spending_rollups.find({"user_id": user_id}).to_list(None))
+    assert sorted((r["year"], r["month"], r["category"], r["total"]) for r in rollups) == [
+        (2026, 3, "Others", 5000), (2026, 3, "Rent", 10000), (2026, 4, "Rent", 20050)
+    ]
+
+
+def test_rebuild_drops_buckets_without_expenses(db, run, user_id, add_expense):
+    expense = add_expense(100, category="Rent")
+    add_expense(50, category="Others")
+    run(db.expenses.delete_one({"description": expense["description"], "category": "Rent"}))
+    
+    run(SpendingRollupService().rebuild(user_id))
+    
+    rollups = run(db.spending_rollups.find({"user_id": user_id}).to_list(None))
+    assert [r["category"] for r in rollups] == ["Others"]
+
+
+def test_running_stats_match_the_expense_history(client, auth, run, user_id, add_expense):
+    amounts = [120, 80.5, 99.99, 150, 60, 101.01]
+    expenses = [add_expense(amount, category="Food & Dining") for amount in amounts]
+    client.put(f"/api/expenses/{expenses[0]['_id']}", headers=auth, json={"amount": 130})
+    client.delete(f"/api/expenses/{expenses[1]['_id']}", headers=auth)
+    remaining = [130, 99.99, 150, 60, 101.01]
+    
+    stats = client.get("/api/analytics/spending-stats", headers=auth).json()
+    assert stats == [{
+        "category": "Food & Dining",
+        "count": 5,
+        "mean": round(statistics.mean(remaining), 2),
+        "std_dev": round(statistics.stdev(remaining), 2)
+    }]
+    
+    run(SpendingAnomalyService().rebuild(user_id))
+    assert client.get("/api/analytics/spending-stats", headers=auth).json() == stats
+
+
+def test_unusual_expenses_are_flagged(client, auth, add_expense):
+    for amount in [100, 110, 90, 105, 95, 100]:
+        assert add_expense(amount, category="Food & Dining")["anomaly"] is None
+    
+    expense = add_expense(1000, category="Food & Dining")
+    assert expense["anomaly"]["expense_id"] == expense["_id"]
+    assert expense["anomaly"]["z_score"] >= 3
+    
+    anomalies = client.get("/api/analytics/anomalies", headers=auth).json()
+    assert [anomaly["expense_id"] for anomaly in anomalies] == [expense["_id"]]
+    
+    client.put(f"/api/expenses/{expense['_id']}", headers=auth, json={"amount": 101})
+    assert client.get("/api/analytics/anomalies", headers=auth).json() == []
@@ -0,0 +1,54 @@
+"""
+Sparse fieldsets (?fields=) on read endpoints
+"""
+import pytest
+
+from app.models.expense import ExpenseResponse
+from app.utils.fields import FieldSelection, partial_model
+
+
+def test_lists_return_only_the_selected_fields(client, auth, add_expense):
+    add_expense(100, category="Rent")
+    
+    response = client.get("/api/expenses/?fields=amount,category", headers=auth)
+    assert response.status_code == 200
+    [expense] = response.json()
+    assert set(expense) == {"_id", "amount", "category"}
+    assert (expense["amount"], expense["category"]) == (100, "Rent")
+    # Conditional GET keeps working on trimmed lists
+    assert response.headers["ETag"] != client.get("/api/expenses/", headers=auth).headers["ETag"]
+    assert client.get(
+        "/api/expenses/?fields=amount,category", headers={**auth, "If-None-Match": response.headers["ETag"]}
+    ).status_code == 304
+
+
+def test_details_return_only_the_selected_fields(client, auth, add_expense, add_transaction):
+    expense = add_expense(100)
+    detail = client.get(f"/api/expenses/{expense['_id']}?fields=description", headers=auth).json()
+    assert detail == {"_id": expense["_id"], "description": "misc"}
+    
+    upi = add_transaction(250, payee_name="Corner Shop")
+    detail = client.get(f"/api/upi/{upi['_id']}?fields=payee_name,amount", headers=auth).json()
+    assert detail == {"_id": upi["_id"], "payee_name": "Corner Shop", "amount": 250}
+
+
+def test_without_fields_responses_are_complete(client, auth, add_expense):
+    expense = add_expense(100)
+    detail = client.get(f"/api/expenses/{expense['_id']}", headers=auth).json()
+    assert set(detail) == {info.alias or name for name, info in ExpenseResponse.model_fields.items()}
+    assert client.get("/api/expenses/", headers=auth).json() == [detail]
+    assert client.get(f"/api/expenses/{expense['_id']}?fields=", headers=auth).json() == detail
+
+
+@pytest.mark.parametrize("path", ["/api/expenses/", "/api/upi/", "/api/goals/", "/api/bank-accounts/"])
+def test_unknown_fields_are_rejected(client, auth, path):
+    response = client.get(f"{path}?fields=amount,password", headers=auth)
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
+
+
+def test_selection_projects_by_alias():
+    selection = FieldSelection(["id", "amount"])
+    assert selection.projection(ExpenseResponse) == {"_id": 1, "amount": 1}
+    assert selection.model(ExpenseResponse) is partial_model(ExpenseResponse)
+    assert FieldSelection().projection(ExpenseResponse) is None
@@ -0,0 +1,40 @@
+"""
+Goal completion projections from contribution history
+"""
+from datetime import date, datetime
+
+import pytest
+
+from app.services.goal_service import DAYS_PER_MONTH, FinancialGoalService
+
+TODAY = date(2026, 3, 31)
+
+
+@pytest.fixture
+def velocity(client):
+    return lambda goal: FinancialGoalService()._monthly_velocity(goal, TODAY)
+
+
+def _snapshot(amount, day):
+    return {"amount": amount, "recorded_at": datetime(2026, 3, day, 12)}
+
+
+def test_a_single_snapshot_has_no_velocity(velocity):
+    goal = {"current_amount": 50000, "created_at": datetime(2026, 3, 1), "contribution_history": [_snapshot(50000, 1)]}
+    assert velocity(goal) == 0
+
+
+def test_progress_is_spread_until_today(velocity):
+    goal = {
+        "current_amount": 30000,
+        "created_at": datetime(2026, 3, 1),
+        "contribution_history": [_snapshot(0, 1), _snapshot(20000, 11), _snapshot(30000, 16)]
+    }
+    # 30 days since the first snapshot, not the 15 up to the last one
+    assert velocity(goal) == pytest.approx(30000 / 30 * DAYS_PER_MONTH)
+
+
+def test_goals_without_history_count_from_creation(velocity):
+    goal = {"current_amount": 15000, "created_at": datetime(2026, 3, 16)}
+    assert velocity(goal) == pytest.approx(15000 / 15 * DAYS_PER_MONTH)
+
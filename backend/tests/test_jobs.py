@@ -0,0 +1,130 @@
+"""
+Job queue deduplication and expiry of finished jobs
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.services import job_service
+from app.services.job_service import FINISHED_JOB_TTL_SECONDS, JobQueue, JobWorker
+
+
+@pytest.fixture
+def queue(db):
+    return JobQueue()
+
+
+def _finish(run, queue, worker_id="worker-1"):
+    job = run(queue.lease("default", worker_id))
+    run(queue.complete(job, worker_id))
+    return run(queue.collection.find_one({"_id": job["_id"]}))
+
+
+def test_dedupe_key_enqueues_once(run, queue):
+    first = run(queue.enqueue("reports.build", dedupe_key="reports:2026-03"))
+    second = run(queue.enqueue("reports.build", dedupe_key="reports:2026-03"))
+    other = run(queue.enqueue("reports.build", dedupe_key="reports:2026-04"))
+    
+    assert first == second != other
+    assert run(queue.collection.count_documents({})) == 2
+
+
+def test_finished_jobs_expire(run, queue):
+    run(queue.enqueue("reports.build"))
+    job = _finish(run, queue)
+    
+    assert job["status"] == "succeeded"
+    ttl = job["expire_at"] - job["finished_at"]
+    assert ttl == timedelta(seconds=FINISHED_JOB_TTL_SECONDS)
+
+
+def test_deduplicated_jobs_expire_after_their_period(run, queue):
+    # BSON dates keep milliseconds
+    period_end = (datetime.utcnow() + timedelta(days=40)).replace(microsecond=0)
+    run(queue.enqueue("reports.build", dedupe_key="reports:2026-03", dedupe_until=period_end))
+    
+    assert _finish(run, queue)["expire_at"] == period_end
+
+
+def test_deduplicated_jobs_expire_no_sooner_than_other_jobs(run, queue):
+    run(queue.enqueue("reports.build", dedupe_key="reports:2026-03", dedupe_until=datetime(2000, 1, 1)))
+    
+    job = _finish(run, queue)
+    assert job["expire_at"] - job["finished_at"] == timedelta(seconds=FINISHED_JOB_TTL_SECONDS)
+
+
+def test_dedupe_survives_the_duplicate_expiring(run, queue, monkeypatch):
+    run(queue.enqueue("reports.build", dedupe_key="reports:2026-03"))
+    find_one = queue.collection.find_one
+    
+    async def expire_first(*args, **kwargs):
+        # The TTL monitor removes the job between the failed insert and the read
+        await queue.collection.delete_many({"dedupe_key": "reports:2026-03"})
+        monkeypatch.setattr(queue.collection, "find_one", find_one)
+        return await find_one(*args, **kwargs)
+    
+    monkeypatch.setattr(queue.collection, "find_one", expire_first)
+    job_id = run(queue.enqueue("reports.build", dedupe_key="reports:2026-03"))
+    
+    jobs = run(queue.collection.find({}).to_list(None))
+    assert [str(job["_id"]) for job in jobs] == [job_id]
+
+
+def _expire_lease(run, queue, attempts):
+    run(queue.enqueue("reports.build", max_attempts=3))
+    job = run(queue.lease("default", "worker-1"))
+    run(queue.collection.update_one({"_id": job["_id"]}, {"$set": {
+        "attempts": attempts, "lease_until": datetime.utcnow() - timedelta(seconds=1)
+    }}))
+    return job["_id"]
+
+
+def test_expired_leases_are_requeued(run, queue):
+    job_id = _expire_lease(run, queue, attempts=2)
+    
+    assert run(queue.requeue_expired()) == 1
+    job = run(queue.collection.find_one({"_id": job_id}))
+    assert (job["status"], job["worker_id"], job["last_error"]) == ("queued", None, "Lease expired")
+
+
+def test_expired_leases_on_the_last_attempt_are_dead(run, queue):
+    job_id = _expire_lease(run, queue, attempts=3)
+    
+    assert run(queue.requeue_expired()) == 1
+    job = run(queue.collection.find_one({"_id": job_id}))
+    assert (job["status"], job["last_error"]) == ("dead", "Lease expired")
+    assert job["expire_at"] - job["finished_at"] == timedelta(seconds=FINISHED_JOB_TTL_SECONDS)
+
+
+def test_worker_slot_survives_database_errors(run, queue, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_POLL_INTERVAL_SECONDS", 0.01)
+    monkeypatch.setitem(job_service._handlers, "tests.record", lambda payload: asyncio.sleep(0))
+    worker = JobWorker(queues=["default"], concurrency=1)
+    
+    lease = worker.job_queue.lease
+    failures = iter([True, True])
+    
+    async def flaky_lease(*args):
+        if next(failures, False):
+            raise ConnectionError("connection reset")
+        return await lease(*args)
+    
+    monkeypatch.setattr(worker.job_queue, "lease", flaky_lease)
+    job_id = run(queue.enqueue("tests.record"))
+    
+    async def work_until_done():
+        slot = asyncio.create_task(worker._slot())
+        try:
+            for _ in range(200):
+                job = await queue.collection.find_one({})
+                if job["status"] == "succeeded":
+                    return job
+                await asyncio.sleep(0.01)
+        finally:
+            slot.cancel()
+    
+    job = run(work_until_done())
+    assert str(job["_id"]) == job_id
+    assert job["status"] == "succeeded"
@@ -0,0 +1,70 @@
+"""
+Paise conversion and the Money field type
+"""
+from decimal import Decimal
+
+import pytest
+from pydantic import BaseModel, Field, ValidationError
+
+from app.utils.money import Money, divide, from_storage, to_paise, to_rupees, to_storage
+
+
+class Payment(BaseModel):
+    amount: Money = Field(..., gt=0)
+    note: str = ""
+
+
+@pytest.mark.parametrize("rupees, paise", [
+    (0.1, 10),
+    (19.99, 1999),
+    (100, 10000),
+    (0.005, 1),  # Halves round away from zero
+    (-0.005, -1),
+    (Decimal("1234.565"), 123457)
+])
+def test_to_paise(rupees, paise):
+    assert to_paise(rupees) == paise
+
+
+def test_to_rupees_rounds_fractional_paise():
+    assert to_rupees(1999) == 19.99
+    assert to_rupees(1999.5) == 20.0
+
+
+def test_divide_rounds_to_the_nearest_paisa():
+    assert divide(1000, 3) == 333
+    assert divide(2000, 3) == 667
+    assert sum(divide(10000, 3) for _ in range(3)) == 9999
+
+
+def test_money_fields_round_to_paise():
+    assert Payment(amount=10.006).amount == 10.01
+    assert Payment(amount="10.004").amount == 10.0
+
+
+def test_money_bound_applies_to_the_rounded_amount():
+    with pytest.raises(ValidationError):
+        Payment(amount=0.001)
+    assert Payment(amount=0.005).amount == 0.01
+
+
+def test_money_rejects_non_numbers():
+    with pytest.raises(ValidationError):
+        Payment(amount="ten")
+
+
+def test_storage_round_trip():
+    stored = to_storage({"amount": 19.99, "note": "tea"}, Payment)
+    assert stored == {"amount": 1999, "note": "tea"}
+    assert from_storage(stored, Payment) == {"amount": 19.99, "note": "tea"}
+
+
+def test_sub_paisa_amount_is_rejected_by_the_api(client, auth):
+    response = client.post("/api/expenses/", headers=auth, json={
+        "category": "Others",
+        "amount": 0.001,
+        "description": "rounding",
+        "date": "2026-03-05T10:00:00",
+        "payment_method": "Cash"
+    })
+    assert response.status_code == 422
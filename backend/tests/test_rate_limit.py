@@ -0,0 +1,116 @@
+"""
+Token bucket rate limiting
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.utils import rate_limit
+from app.utils.rate_limit import MemoryBucketStore, RateLimitMiddleware
+from app.utils.security import create_access_token
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic for the bucket store"""
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    """Client of a small app behind the middleware, with tight budgets"""
+    monkeypatch.setitem(settings.RATE_LIMITS, "auth", "2/minute")
+    monkeypatch.setitem(settings.RATE_LIMITS, "auth_refresh", "3/minute")
+    monkeypatch.setitem(settings.RATE_LIMITS, "default", "2/minute")
+    
+    app = FastAPI()
+    
+    @app.post("/api/auth/login")
+    @app.post("/api/auth/refresh")
+    @app.get("/api/expenses/")
+    @app.get("/health")
+    async def endpoint():
+        return {}
+    
+    app.add_middleware(RateLimitMiddleware, store=MemoryBucketStore())
+    return TestClient(app)
+
+
+def _take(store, key, capacity, rate):
+    """Run MemoryBucketStore.take, which never suspends"""
+    try:
+        store.take(key, capacity, rate).send(None)
+    except StopIteration as done:
+        return done.value
+    raise AssertionError("take suspended")
+
+
+def _bearer(user_id):
+    return {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+
+
+def test_bucket_allows_its_capacity_then_refills(clock):
+    store = MemoryBucketStore()
+    assert [_take(store, "key", 2, 1.0)[0] for _ in range(3)] == [True, True, False]
+    
+    clock[0] += 0.5
+    assert not _take(store, "key", 2, 1.0)[0]
+    clock[0] += 0.5
+    assert _take(store, "key", 2, 1.0) == (True, 0)
+
+
+def test_bucket_store_drops_the_least_recently_used_key(clock):
+    store = MemoryBucketStore(max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        _take(store, key, 1, 0.001)
+    
+    assert list(store._buckets) == ["a", "c"]
+    # Evicted buckets start full again
+    assert _take(store, "b", 1, 0.001)[0]
+
+
+def test_over_budget_requests_get_429(limited):
+    assert [limited.post("/api/auth/login").status_code for _ in range(2)] == [200, 200]
+    
+    rejected = limited.post("/api/auth/login")
+    assert rejected.status_code == 429
+    assert rejected.json() == {"detail": "Too many requests"}
+    assert rejected.headers["Retry-After"] == "30"
+    assert rejected.headers["X-RateLimit-Remaining"] == "0"
+
+
+def test_routes_without_a_rule_are_not_limited(limited):
+    assert {limited.get("/health").status_code for _ in range(5)} == {200}
+
+
+def test_refresh_is_limited_per_ip(limited):
+    statuses = [limited.post("/api/auth/refresh", headers=_bearer(f"user-{n}")).status_code for n in range(4)]
+    assert statuses == [200, 200, 200, 429]
+
+
+def test_users_have_separate_budgets(limited):
+    assert [limited.get("/api/expenses/", headers=_bearer("asha")).status_code for _ in range(3)] == [200, 200, 429]
+    assert limited.get("/api/expenses/", headers=_bearer("ravi")).status_code == 200
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies(limited):
+    statuses = [
+        limited.post("/api/auth/login", headers={"X-Forwarded-For": f"10.0.0.{n}"}).status_code
+        for n in range(3)
+    ]
+    assert statuses == [200, 200, 429]
+
+
+def test_client_cannot_forge_its_address_behind_a_trusted_proxy(limited, monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HOPS", 1)
+    
+    def login(forged, client):
+        # The proxy appends the address it saw to whatever the client sent
+        headers = {"X-Forwarded-For": f"{forged}, {client}"}
+        return limited.post("/api/auth/login", headers=headers).status_code
+    
+    assert [login(f"10.0.0.{n}", "203.0.113.7") for n in range(3)] == [200, 200, 429]
+    assert login("10.0.0.9", "203.0.113.8") == 200
@@ -0,0 +1,77 @@
+"""
+Faceted expense and UPI search
+"""
+import pytest
+
+from app.config import settings
+
+
+
+def test_expense_search_facets_and_paging(client, auth, add_expense):
+    add_expense(100, category="Rent", payment_method="UPI", date="2026-03-01T10:00:00")
+    add_expense(300, category="Rent", payment_method="Cash", date="2026-03-02T10:00:00")
+    add_expense(200, category="Others", payment_method="UPI", date="2026-03-03T10:00:00")
+    
+    result = client.get("/api/search/expenses", headers=auth, params={"page_size": 2}).json()
+    assert result["total"] == 3
+    assert not result["counts_capped"]
+    assert [item["amount"] for item in result["items"]] == [200, 300]
+    assert {facet["value"]: facet["count"] for facet in result["facets"]["category"]} == {"Rent": 2, "Others": 1}
+    assert {facet["value"]: facet["count"] for facet in result["facets"]["payment_method"]} == {"UPI": 2, "Cash": 1}
+    
+    second_page = client.get("/api/search/expenses", headers=auth, params={"page_size": 2, "page": 2}).json()
+    assert [item["amount"] for item in second_page["items"]] == [100]
+
+
+def test_expense_search_filters_and_sort(client, auth, add_expense):
+    add_expense(100, category="Rent")
+    add_expense(300, category="Rent")
+    add_expense(200, category="Others")
+    
+    result = client.get("/api/search/expenses", headers=auth, params={
+        "category": "Rent", "min_amount": 50, "sort": "amount"
+    }).json()
+    assert result["total"] == 2
+    assert [item["amount"] for item in result["items"]] == [300, 100]
+
+
+def test_upi_search_status_facets(client, auth, add_transaction):
+    add_transaction(100)
+    add_transaction(200, status="Failed")
+    add_transaction(300)
+    
+    result = client.get("/api/search/upi", headers=auth, params={"status": "Success"}).json()
+    assert result["total"] == 2
+    assert {item["amount"] for item in result["items"]} == {100, 300}
+    # A facet ignores its own filter, so the other statuses stay selectable
+    assert {facet["value"]: facet["count"] for facet in result["facets"]["status"]} == {"Success": 2, "Failed": 1}
+
+
+def test_expense_search_by_text(client, auth, add_expense):
+    add_expense(100, description="Weekly groceries at the market", date="2026-03-01T10:00:00")
+    add_expense(200, description="Dinner, then groceries", date="2026-03-02T10:00:00")
+    add_expense(300, description="Movie tickets", date="2026-03-03T10:00:00")
+    
+    def search(q, **params):
+        return client.get("/api/search/expenses", headers=auth, params={"q": q, **params}).json()
+    
+    assert [item["amount"] for item in search("GROCERIES")["items"]] == [200, 100]
+    assert [item["amount"] for item in search("groceries market", sort="relevance")["items"]] == [100, 200]
+    assert [item["amount"] for item in search("groceries -dinner")["items"]] == [100]
+    assert search("grocer")["total"] == 2
+    assert search("theatre")["total"] == 0
+
+
+@pytest.mark.parametrize("storage", ["documents", "buckets"])
+def test_upi_search_by_payee(client, auth, add_transaction, monkeypatch, storage):
+    monkeypatch.setattr(settings, "UPI_STORAGE", storage)
+    add_transaction(100, payee_name="Corner Shop", payee_upi="corner@upi")
+    add_transaction(200, payee_name="Landlord", payee_upi="rent@upi")
+    
+    def search(q):
+        result = client.get("/api/search/upi", headers=auth, params={"q": q}).json()
+        return [item["amount"] for item in result["items"]]
+    
+    assert search("corner") == [100]
+    assert search("RENT@UPI") == [200]
+    assert search("TXN000002") == [200]
@@ -0,0 +1,20 @@
+"""
+Monthly statements and their stored bodies
+"""
+from datetime import datetime
+
+
+def test_late_statements_date_their_net_worth(client, auth, add_expense):
+    add_expense(100, date="2026-01-10T10:00:00", category="Rent")
+    
+    response = client.get("/api/statements/2026/1", headers=auth)
+    assert response.status_code == 200, response.text
+    statement = response.json()
+    assert statement["spending_by_category"] == {"Rent": 100}
+    # Generated after the month closed: the balances are today's, and say so
+    as_of = datetime.fromisoformat(statement["net_worth"]["as_of"])
+    assert as_of >= datetime(2026, 2, 1)
+    assert as_of <= datetime.fromisoformat(statement["generated_at"])
+    
+    assert [(s["year"], s["month"]) for s in client.get("/api/statements/", headers=auth).json()] == [(2026, 1)]
+    assert client.get("/api/statements/2026/1", headers=auth).json() == statement
@@ -0,0 +1,164 @@
+"""
+UPI transaction ingestion, listing, reconciliation and payee statistics
+"""
+from datetime import datetime
+
+import pytest
+
+from app.services.payee_service import PayeeStatsService
+from app.services.upi_store import BucketUPIStore, DocumentUPIStore
+
+
+def test_create_is_idempotent(client, auth, transaction):
+    headers = {**auth, "Idempotency-Key": "txn-1"}
+    first = client.post("/api/upi/", headers=headers, json=transaction(1, 250))
+    replay = client.post("/api/upi/", headers=headers, json=transaction(1, 250))
+    
+    assert first.status_code == replay.status_code == 201
+    assert replay.json()["_id"] == first.json()["_id"]
+    assert len(client.get("/api/upi/", headers=auth).json()) == 1
+
+
+def test_batch_skips_recorded_transactions(client, auth, transaction, add_transaction):
+    add_transaction(100)
+    response = client.post("/api/upi/batch", headers=auth, json=[
+        transaction(1, 100), transaction(2, 200), transaction(2, 200), transaction(3, 300)
+    ])
+    
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["received"], result["unique"], result["inserted"], result["existing"]) == (4, 3, 2, 1)
+    assert len(client.get("/api/upi/", headers=auth).json()) == 3
+
+
+@pytest.mark.parametrize("query", ["month=3", "year=2026"])
+def test_month_filter_needs_month_and_year(client, auth, query):
+    response = client.get(f"/api/upi/?{query}", headers=auth)
+    assert response.status_code == 400
+
+
+def test_month_filter(client, auth, add_transaction):
+    add_transaction(100)
+    now = datetime.utcnow()
+    assert len(client.get(f"/api/upi/?month={now.month}&year={now.year}", headers=auth).json()) == 1
+    assert client.get(f"/api/upi/?month={now.month}&year={now.year - 1}", headers=auth).json() == []
+
+
+def test_editing_a_matched_field_relinks_the_expense(client, auth, add_expense, add_transaction):
+    upi = add_transaction(250, payee_name="Corner Shop")
+    expense = add_expense(250, date=datetime.utcnow().isoformat(), description="corner shop",
+                          payment_method="UPI")
+    assert expense["upi_transaction_id"] == upi["_id"]
+    
+    def linked_expense():
+        return client.get(f"/api/upi/{upi['_id']}", headers=auth).json()["linked_expense_id"]
+    
+    assert linked_expense() == expense["_id"]
+    
+    changed = client.put(f"/api/expenses/{expense['_id']}", headers=auth, json={"amount": 260})
+    assert changed.json()["upi_transaction_id"] is None
+    assert client.get(f"/api/expenses/{expense['_id']}", headers=auth).json()["upi_transaction_id"] is None
+    assert linked_expense() is None
+    
+    restored = client.put(f"/api/expenses/{expense['_id']}", headers=auth, json={"amount": 250})
+    assert restored.json()["upi_transaction_id"] == upi["_id"]
+    assert linked_expense() == expense["_id"]
+    
+    cash = client.put(f"/api/expenses/{expense['_id']}", headers=auth, json={"payment_method": "Cash"})
+    assert cash.json()["upi_transaction_id"] is None
+    assert linked_expense() is None
+
+
+def test_top_payees(client, auth, run, user_id, add_transaction):
+    add_transaction(100, payee_upi="shop@upi", payee_name="Shop")
+    add_transaction(150.5, payee_upi="shop@upi", payee_name="Corner Shop")
+    add_transaction(400, payee_upi="rent@upi", payee_name="Landlord")
+    add_transaction(999, payee_upi="rent@upi", payee_name="Landlord", status="Failed")
+    
+    by_amount = client.get("/api/upi/payees/top", headers=auth).json()["payees"]
+    assert [(p["payee_upi"], p["payee_name"], p["total"], p["count"]) for p in by_amount] == [
+        ("rent@upi", "Landlord", 400, 1), ("shop@upi", "Corner Shop", 250.5, 2)
+    ]
+    by_count = client.get("/api/upi/payees/top?sort=count", headers=auth).json()["payees"]
+    assert [p["payee_upi"] for p in by_count] == ["shop@upi", "rent@upi"]
+    
+    run(PayeeStatsService().rebuild(user_id))
+    rebuilt = client.get("/api/upi/payees/top", headers=auth).json()["payees"]
+    assert [(p["payee_upi"], p["total"], p["count"]) for p in rebuilt] == [
+        (p["payee_upi"], p["total"], p["count"]) for p in by_amount
+    ]
+
+
+def _document(user_id, number, amount, timestamp):
+    return {
+        "user_id": user_id,
+        "transaction_id": f"TXN{number:06d}",
+        "payee_name": "Shop",
+        "payee_upi": "shop@upi",
+        "amount": amount,
+        "status": "Success",
+        "timestamp": timestamp,
+        "created_at": timestamp
+    }
+
+
+def test_bucket_store_packs_transactions_by_month(db, run, user_id):
+    store = BucketUPIStore()
+    march, april = datetime(2026, 3, 5), datetime(2026, 4, 2)
+    
+    assert run(store.insert(_document(user_id, 1, 10000, march)))
+    assert run(store.insert(_document(user_id, 1, 10000, march))) is None
+    inserted = run(store.insert_many([
+        _document(user_id, 1, 10000, march),
+        _document(user_id, 2, 2550, march),
+        _document(user_id, 3, 500, april)
+    ]))
+    assert sorted(inserted) == [1, 2]
+    
+    buckets = run(db.upi_buckets.find({"user_id": user_id}).sort("month", 1).to_list(None))
+    assert [(b["month"], b["count"], b["total"]) for b in buckets] == [
+        (datetime(2026, 3, 1), 2, 12550), (datetime(2026, 4, 1), 1, 500)
+    ]
+    
+    march_transactions = run(store.list_month(user_id, 2026, 3))
+    assert sorted(t["transaction_id"] for t in march_transactions) == ["TXN000001", "TXN000002"]
+    
+    large = run(store.find({"user_id": user_id, "amount": {"$gte": 1000}}).to_list(None))
+    assert sorted(t["transaction_id"] for t in large) == ["TXN000001", "TXN000002"]
+
+
+def test_bucket_store_updates_and_deletes_transactions(db, run, user_id):
+    store = BucketUPIStore()
+    march = datetime(2026, 3, 5)
+    inserted = run(store.insert_many([_document(user_id, number, 1000 * number, march) for number in (1, 2, 3)]))
+    first, second, third = (inserted[index] for index in range(3))
+    
+    assert run(store.get(user_id, second))["transaction_id"] == "TXN000002"
+    assert run(store.find_by_transaction_id(user_id, "TXN000003"))["_id"] == third
+    
+    assert run(store.update(user_id, second, {"status": "Failed"}))
+    run(store.update_many(user_id, {"status": "Success"}, {"linked_expense_id": "expense"}))
+    transactions = {t["_id"]: t for t in run(store.list_month(user_id, 2026, 3))}
+    assert [transactions[i].get("linked_expense_id") for i in (first, second, third)] == ["expense", None, "expense"]
+    
+    deleted = run(store.delete(user_id, first))
+    assert deleted["amount"] == 1000
+    assert run(store.get(user_id, first)) is None
+    bucket = run(db.upi_buckets.find_one({"user_id": user_id}))
+    assert (bucket["count"], bucket["total"]) == (2, 5000)
+    
+    run(store.delete(user_id, second))
+    run(store.delete(user_id, third))
+    assert run(db.upi_buckets.count_documents({"user_id": user_id})) == 0
+
+
+@pytest.mark.parametrize("store", [DocumentUPIStore, BucketUPIStore])
+def test_bulk_update_only_touches_the_users_transactions(run, user_id, store):
+    store = store()
+    march = datetime(2026, 3, 5)
+    mine = run(store.insert(_document(user_id, 1, 100, march)))
+    theirs = run(store.insert(_document("someone-else", 2, 200, march)))
+    
+    run(store.bulk_update(user_id, [(mine, {"category": "Food"}), (theirs, {"category": "Food"})]))
+    assert run(store.get(user_id, mine))["category"] == "Food"
+    assert "category" not in run(store.get("someone-else", theirs))
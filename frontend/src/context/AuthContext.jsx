@@ -28,9 +28,10 @@ export const AuthProvider = ({ children }) => {
     const login = async (email, password) => {
         try {
             const response = await authAPI.login({ email, password });
-            const { access_token, user: userData } = response.data;
+            const { access_token, refresh_token, user: userData } = response.data;
 
             localStorage.setItem('token', access_token);
+            localStorage.setItem('refresh_token', refresh_token);
             localStorage.setItem('user', JSON.stringify(userData));
 
             setToken(access_token);
@@ -48,9 +49,10 @@ export const AuthProvider = ({ children }) => {
     const register = async (name, email, phone, password) => {
         try {
             const response = await authAPI.register({ name, email, phone, password });
-            const { access_token, user: userData } = response.data;
+            const { access_token, refresh_token, user: userData } = response.data;
 
             localStorage.setItem('token', access_token);
+            localStorage.setItem('refresh_token', refresh_token);
             localStorage.setItem('user', JSON.stringify(userData));
 
             setToken(access_token);
@@ -66,7 +68,12 @@ export const AuthProvider = ({ children }) => {
     };
 
     const logout = () => {
+        const refreshToken = localStorage.getItem('refresh_token');
+        if (refreshToken) {
+            authAPI.logout(refreshToken).catch(() => {});
+        }
         localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
         localStorage.removeItem('user');
         setToken(null);
         setUser(null);
@@ -37,19 +37,31 @@ const Dashboard = () => {
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
-        fetchDashboardData();
         fetchUpcomingEMIs();
     }, []);
 
-    const fetchDashboardData = async () => {
-        try {
-            const response = await analyticsAPI.getDashboard();
-            setDashboardData(response.data);
-        } catch (error) {
-            toast.error('Failed to load dashboard data');
-        }
-        setLoading(false);
-    };
+    // The stream's first snapshot is the dashboard, then only changed fields arrive
+    useEffect(() => {
+        let received = false;
+        return analyticsAPI.streamDashboard({
+            snapshot: (event) => {
+                received = true;
+                setDashboardData(JSON.parse(event.data));
+                setLoading(false);
+            },
+            delta: (event) => {
+                const changes = JSON.parse(event.data);
+                setDashboardData((current) => ({ ...current, ...changes }));
+            },
+            error: () => {
+                if (!received) {
+                    received = true;
+                    toast.error('Failed to load dashboard data');
+                    setLoading(false);
+                }
+            }
+        });
+    }, []);
 
     const fetchUpcomingEMIs = async () => {
         try {
@@ -27,13 +27,48 @@ api.interceptors.request.use(
     }
 );
 
+// Refresh tokens are single use, so concurrent 401s share one refresh
+let refreshing = null;
+
+const refreshAccessToken = () => {
+    if (!refreshing) {
+        const refreshToken = localStorage.getItem('refresh_token');
+        refreshing = axios
+            .post(`${API_BASE_URL}/api/auth/refresh`, { refresh_token: refreshToken })
+            .then((response) => {
+                const { access_token, refresh_token } = response.data;
+                localStorage.setItem('token', access_token);
+                localStorage.setItem('refresh_token', refresh_token);
+                return access_token;
+            })
+            .finally(() => {
+                refreshing = null;
+            });
+    }
+    return refreshing;
+};
+
 // Response interceptor - Handle errors globally
 api.interceptors.response.use(
     (response) => response,
-    (error) => {
+    async (error) => {
+        const request = error.config;
         if (error.response?.status === 401) {
+            // Expired access token - refresh once and retry the request
+            const isAuthRequest = request?.url?.startsWith('/api/auth/');
+            if (request && !request._retried && !isAuthRequest && localStorage.getItem('refresh_token')) {
+                request._retried = true;
+                try {
+                    const token = await refreshAccessToken();
+                    request.headers.Authorization = `Bearer ${token}`;
+                    return api(request);
+                } catch {
+                    // Session ended - fall through to login
+                }
+            }
             // Unauthorized - clear token and redirect to login
             localStorage.removeItem('token');
+            localStorage.removeItem('refresh_token');
             localStorage.removeItem('user');
             window.location.href = '/login';
         }
@@ -47,6 +82,7 @@ export default api;
 export const authAPI = {
     register: (data) => api.post('/api/auth/register', data),
     login: (data) => api.post('/api/auth/login', data),
+    logout: (refreshToken) => api.post('/api/auth/logout', { refresh_token: refreshToken }),
     getCurrentUser: () => api.get('/api/auth/me')
 };
 
@@ -75,9 +111,50 @@ export const emiAPI = {
     delete: (id) => api.delete(`/api/emis/${id}`)
 };
 
+// Server-sent events with the access token in the query string, since
+// EventSource cannot send headers. The browser retries dropped connections
+// with the URL it was given, so once the token expires those retries are
+// rejected and it gives up; the stream is then reopened with a refreshed
+// token, backing off while it keeps failing. Returns a function closing it.
+const openStream = (path, listeners) => {
+    let source = null;
+    let closed = false;
+    let failures = 0;
+
+    const connect = () => {
+        if (closed) return;
+        const token = encodeURIComponent(localStorage.getItem('token') || '');
+        source = new EventSource(`${API_BASE_URL}${path}?token=${token}`);
+        Object.entries(listeners).forEach(([event, listener]) => source.addEventListener(event, listener));
+        source.addEventListener('open', () => {
+            failures = 0;
+        });
+        source.addEventListener('error', () => {
+            if (closed || source.readyState !== EventSource.CLOSED) return;
+            const delay = failures ? Math.min(1000 * 2 ** failures, 60000) : 0;
+            failures += 1;
+            setTimeout(() => {
+                if (closed) return;
+                refreshAccessToken().then(connect, (error) => {
+                    // A rejected refresh token means the session ended
+                    if (error.response?.status !== 401) connect();
+                });
+            }, delay);
+        });
+    };
+
+    connect();
+    return () => {
+        closed = true;
+        source?.close();
+    };
+};
+
 // Analytics API
 export const analyticsAPI = {
-    getDashboard: () => api.get('/api/analytics/dashboard')
+    getDashboard: () => api.get('/api/analytics/dashboard'),
+    // `listeners` maps event names ('snapshot', 'delta', 'error') to handlers
+    streamDashboard: (listeners) => openStream('/api/analytics/dashboard/stream', listeners)
 };
 
 // Bank Account API
@@ -124,3 +201,16 @@ export const goalAPI = {
     update: (id, data) => api.put(`/api/goals/${id}`, data),
     delete: (id) => api.delete(`/api/goals/${id}`)
 };
+
+// Batch API
+export const batchAPI = {
+    // Fetch several GET resources in one round trip.
+    // `requests` maps a key to a path, e.g. { upcoming: '/api/emis/upcoming?days=7' };
+    // resolves to the same keys mapped to { status, headers, body }
+    get: async (requests) => {
+        const response = await api.post('/api/batch/', {
+            requests: Object.entries(requests).map(([id, path]) => ({ id, path }))
+        });
+        return Object.fromEntries(response.data.responses.map(({ id, ...result }) => [id, result]));
+    }
+};